@@ -5,20 +5,33 @@
 - 查询匹配的法规条款
 - 管理审核角色和单据类型
 - 搜索法规条款
+- 检查业务单据中与匹配条款相关的段落
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
+import inspect
+import json
 import os
 import shutil
-from pathlib import Path
 
-from database import get_db, AuditorRole, DocumentType, Regulation, Clause, AuditRule
-from matcher import SimpleMatcher
+from database import get_db, get_async_db, migrate_database, USE_ASYNC_DB, async_engine, Regulation
+from search_query import QuerySyntaxError
+from matcher import SimpleMatcher, AsyncSimpleMatcher, match_cache
+from starlette.concurrency import run_in_threadpool
+from semantic import SemanticIndexUnavailable, get_semantic_index, semantic_search
+from checker import CHECK_MIN_SCORE, CHECK_TOP_PASSAGES, check_document
 from document_parser import DocumentParser
+from hierarchy import LEVELS, LEVEL_ARTICLE, get_structure, get_chapter_clauses, get_article
+from jobs import (
+    ALLOWED_EXTENSIONS, UPLOAD_DIR, PDF_PAGE_WORKERS, new_job_id, job_upload_dir, job_file_path,
+    save_upload, submit_job, remove_job_file, get_job as get_ingest_job, list_jobs,
+    start_embedded_worker, stop_embedded_worker, parse_cache
+)
 
 
 # ============ 响应模型定义 ============
@@ -119,6 +132,21 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def prepare_database():
+    """启动时补建缺失的表和索引（兼容旧版本创建的数据库），并启动导入任务工作进程"""
+    migrate_database()
+    start_embedded_worker()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """关闭异步数据库连接池，停止导入任务工作进程"""
+    if async_engine is not None:
+        await async_engine.dispose()
+    await run_in_threadpool(stop_embedded_worker)
+
+
 # ============ API 路由 ============
 
 @app.get("/", tags=["根路径"])
@@ -138,12 +166,13 @@ def root():
             "roles": "/api/roles",
             "document_types": "/api/document-types",
             "regulations": "/api/regulations",
-            "search": "/api/search"
+            "search": "/api/search",
+            "semantic_search": "/api/semantic-search",
+            "check": "/api/check"
         }
     }
 
 
-@app.get("/api/match", response_model=MatchResponse, tags=["核心功能"])
 def match_clauses(
     role: str = Query(..., description="审核角色名称，如：商务管理员"),
     document_type: str = Query(..., description="单据类型名称，如：采购招标/比选/谈判/评审结论建议"),
@@ -166,20 +195,55 @@ def match_clauses(
     GET /api/match?role=商务管理员&document_type=采购招标/比选/谈判/评审结论建议
     ```
     """
-    matcher = SimpleMatcher(db)
+    # 结果只在规则变更时变化，命中缓存时跳过全部查询
+    cache_key = (role, document_type)
+    results = match_cache.get(cache_key)
     
-    # 验证角色是否存在
-    role_obj = db.query(AuditorRole).filter(AuditorRole.role_name == role).first()
-    if not role_obj:
-        raise HTTPException(status_code=404, detail=f"未找到审核角色: {role}")
+    if results is None:
+        generation = match_cache.generation
+        matcher = SimpleMatcher(db)
+        
+        # 验证角色是否存在
+        if not matcher.role_exists(role):
+            raise HTTPException(status_code=404, detail=f"未找到审核角色: {role}")
+        
+        # 验证单据类型是否存在
+        if not matcher.document_type_exists(document_type):
+            raise HTTPException(status_code=404, detail=f"未找到单据类型: {document_type}")
+        
+        # 执行匹配
+        results = matcher.match_clauses(role, document_type)
+        match_cache.set(cache_key, results, generation)
     
-    # 验证单据类型是否存在
-    doc_type_obj = db.query(DocumentType).filter(DocumentType.type_name == document_type).first()
-    if not doc_type_obj:
-        raise HTTPException(status_code=404, detail=f"未找到单据类型: {document_type}")
+    return {
+        'role': role,
+        'document_type': document_type,
+        'matched_clauses': results,
+        'total': len(results)
+    }
+
+
+async def match_clauses_async(
+    role: str = Query(..., description="审核角色名称，如：商务管理员"),
+    document_type: str = Query(..., description="单据类型名称，如：采购招标/比选/谈判/评审结论建议"),
+    db=Depends(get_async_db)
+):
+    """match_clauses的异步数据库版本（DB_ASYNC=1时启用）"""
+    cache_key = (role, document_type)
+    results = match_cache.get(cache_key)
     
-    # 执行匹配
-    results = matcher.match_clauses(role, document_type)
+    if results is None:
+        generation = match_cache.generation
+        matcher = AsyncSimpleMatcher(db)
+        
+        if not await matcher.role_exists(role):
+            raise HTTPException(status_code=404, detail=f"未找到审核角色: {role}")
+        
+        if not await matcher.document_type_exists(document_type):
+            raise HTTPException(status_code=404, detail=f"未找到单据类型: {document_type}")
+        
+        results = await matcher.match_clauses(role, document_type)
+        match_cache.set(cache_key, results, generation)
     
     return {
         'role': role,
@@ -189,6 +253,16 @@ def match_clauses(
     }
 
 
+app.add_api_route(
+    "/api/match",
+    match_clauses_async if USE_ASYNC_DB else match_clauses,
+    methods=["GET"],
+    response_model=MatchResponse,
+    tags=["核心功能"],
+    description=inspect.cleandoc(match_clauses.__doc__)
+)
+
+
 @app.get("/api/roles", response_model=List[RoleResponse], tags=["数据管理"])
 def list_roles(db: Session = Depends(get_db)):
     """
@@ -225,28 +299,140 @@ def list_regulations(db: Session = Depends(get_db)):
     return regulations
 
 
-@app.get("/api/search", tags=["搜索功能"])
+def get_regulation_or_404(db: Session, regulation_id: int) -> Regulation:
+    """查询法规，不存在时返回404"""
+    regulation = db.get(Regulation, regulation_id)
+    if regulation is None:
+        raise HTTPException(status_code=404, detail=f"法规不存在: {regulation_id}")
+    return regulation
+
+
+@app.get("/api/regulations/{regulation_id}/structure", tags=["数据管理"])
+def regulation_structure(
+    regulation_id: int,
+    max_level: str = Query(LEVEL_ARTICLE, description="返回到哪一级: part/chapter/section/article/paragraph/item"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取法规的层级结构
+    
+    返回编/章/节/条/款/项组成的结构树，每个节点包含层级、序号（由中文数字转换）、
+    编号、标题和内容，children为下级节点。
+    
+    **示例:**
+    ```
+    GET /api/regulations/1/structure
+    GET /api/regulations/1/structure?max_level=chapter
+    ```
+    """
+    if max_level not in LEVELS:
+        raise HTTPException(status_code=400, detail=f"max_level只能是: {', '.join(LEVELS)}")
+    regulation = get_regulation_or_404(db, regulation_id)
+    return {
+        'regulation_id': regulation.id,
+        'title': regulation.title,
+        'nodes': get_structure(db, regulation_id, max_level)
+    }
+
+
+@app.get("/api/regulations/{regulation_id}/chapters/{chapter}/clauses", tags=["数据管理"])
+def chapter_clauses(regulation_id: int, chapter: int, db: Session = Depends(get_db)):
+    """
+    获取法规某一章的所有条款
+    
+    按结构节点索引查找章及其下各节中的条，按原文顺序返回。
+    
+    **示例:**
+    ```
+    GET /api/regulations/1/chapters/4/clauses
+    ```
+    """
+    get_regulation_or_404(db, regulation_id)
+    result = get_chapter_clauses(db, regulation_id, chapter)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"第{chapter}章不存在")
+    return result
+
+
+@app.get("/api/regulations/{regulation_id}/articles/{article}", tags=["数据管理"])
+def article_detail(
+    regulation_id: int,
+    article: int,
+    paragraph: Optional[int] = Query(None, ge=1, description="只返回第几款"),
+    item: Optional[int] = Query(None, ge=1, description="只返回第几项"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取法规的某一条及其下的款、项
+    
+    **参数:**
+    - **article**: 条序号，第三条为3
+    - **paragraph**: 款序号（可选）
+    - **item**: 项序号（可选），第（二）项为2；未指定款时在各款中查找
+    
+    **示例:**
+    ```
+    GET /api/regulations/1/articles/3
+    GET /api/regulations/1/articles/3?item=2
+    ```
+    """
+    get_regulation_or_404(db, regulation_id)
+    result = get_article(db, regulation_id, article, paragraph, item)
+    if result is None:
+        raise HTTPException(status_code=404, detail="指定的条、款或项不存在")
+    return result
+
+
 def search_clauses(
-    keyword: str = Query(..., description="搜索关键词"),
+    keyword: str = Query(..., description="搜索关键词或检索式"),
     limit: int = Query(20, ge=1, le=100, description="返回结果数量限制"),
     db: Session = Depends(get_db)
 ):
     """
     根据关键词搜索条款
     
-    在所有法规条款中搜索包含指定关键词的条款。
+    在所有法规条款中搜索包含指定关键词的条款，结果按BM25相关度排序。
+    每条结果附带相关度得分score和关键词在content中的命中位置highlights。
     
     **参数:**
-    - **keyword**: 搜索关键词
+    - **keyword**: 搜索关键词或检索式，支持:
+        - 空格或AND: `公开招标 AND 国有资金`
+        - OR: `废标 OR 流标`
+        - NOT或-前缀: `招标 NOT 邀请招标`、`招标 -邀请招标`
+        - 引号短语和括号分组: `"公开招标方式"`、`(废标 OR 流标) 供应商`
+        - 法规过滤: `regulation:政府采购法 公开招标`（也可写作`法规:`）
     - **limit**: 返回结果数量限制（1-100）
     
     **示例:**
     ```
     GET /api/search?keyword=公开招标&limit=10
+    GET /api/search?keyword=公开招标 AND 国有资金
     ```
     """
     matcher = SimpleMatcher(db)
-    results = matcher.search_clauses_by_keyword(keyword, limit)
+    try:
+        results = matcher.search_clauses_by_keyword(keyword, limit)
+    except QuerySyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"检索式错误: {str(e)}")
+    
+    return {
+        'keyword': keyword,
+        'results': results,
+        'total': len(results)
+    }
+
+
+async def search_clauses_async(
+    keyword: str = Query(..., description="搜索关键词或检索式"),
+    limit: int = Query(20, ge=1, le=100, description="返回结果数量限制"),
+    db=Depends(get_async_db)
+):
+    """search_clauses的异步数据库版本（DB_ASYNC=1时启用）"""
+    matcher = AsyncSimpleMatcher(db)
+    try:
+        results = await matcher.search_clauses_by_keyword(keyword, limit)
+    except QuerySyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"检索式错误: {str(e)}")
     
     return {
         'keyword': keyword,
@@ -255,6 +441,147 @@ def search_clauses(
     }
 
 
+app.add_api_route(
+    "/api/search",
+    search_clauses_async if USE_ASYNC_DB else search_clauses,
+    methods=["GET"],
+    tags=["搜索功能"],
+    description=inspect.cleandoc(search_clauses.__doc__)
+)
+
+
+@app.get("/api/semantic-search", tags=["搜索功能"])
+def semantic_search_clauses(
+    query: str = Query(..., min_length=1, description="查询文本，如一段单据内容或一个问题"),
+    limit: int = Query(20, ge=1, le=100, description="返回结果数量限制"),
+    db: Session = Depends(get_db)
+):
+    """
+    语义检索条款
+    
+    按字符n-gram TF-IDF向量的余弦相似度检索条款，不要求查询中的词原样
+    出现在条款中，适合用一句话或一段单据内容查找相关条款。结果按相似度
+    score（0~1）从高到低排序。索引由 `python semantic.py` 或数据初始化脚本
+    构建，不调用任何外部服务。
+    
+    **示例:**
+    ```
+    GET /api/semantic-search?query=供应商不足三家时如何处理&limit=5
+    ```
+    """
+    try:
+        results = semantic_search(db, query, limit)
+    except SemanticIndexUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return {
+        'query': query,
+        'results': results,
+        'total': len(results)
+    }
+
+
+def load_check_clauses(db: Session, role: str, document_type: str) -> List[dict]:
+    """
+    验证角色和单据类型，返回匹配的条款
+    
+    与 /api/match 共用匹配结果缓存；check_document只读取条款，
+    结果中的条款是复制后再附加段落的，不会修改缓存中的列表。
+    """
+    cache_key = (role, document_type)
+    results = match_cache.get(cache_key)
+    if results is not None:
+        return results
+    
+    generation = match_cache.generation
+    matcher = SimpleMatcher(db)
+    if not matcher.role_exists(role):
+        raise HTTPException(status_code=404, detail=f"未找到审核角色: {role}")
+    if not matcher.document_type_exists(document_type):
+        raise HTTPException(status_code=404, detail=f"未找到单据类型: {document_type}")
+    results = matcher.match_clauses(role, document_type)
+    match_cache.set(cache_key, results, generation)
+    return results
+
+
+def semantic_idf():
+    """语义索引的逆文档频率，索引不存在时返回None（检查时不加权）"""
+    try:
+        return get_semantic_index().idf
+    except SemanticIndexUnavailable:
+        return None
+
+
+@app.post("/api/check", tags=["核心功能"])
+async def check_business_document(
+    file: UploadFile = File(...),
+    role: str = Form(..., description="审核角色名称，如：商务管理员"),
+    document_type: str = Form(..., description="单据类型名称，如：采购招标/比选/谈判/评审结论建议"),
+    top: int = Form(CHECK_TOP_PASSAGES, ge=1, le=20, description="每个条款返回的段落数"),
+    min_score: float = Form(CHECK_MIN_SCORE, ge=0, le=1, description="段落得分下限"),
+    db: Session = Depends(get_db)
+):
+    """
+    检查业务单据
+    
+    上传标书、合同等PDF/Word单据，按审核角色和单据类型匹配条款（同 `/api/match`），
+    找出单据中与每个条款相关的段落。段落得分为字符n-gram TF-IDF余弦相似度与
+    词面覆盖率的加权和（0~1）。
+    
+    结果以NDJSON流式返回（每行一个JSON对象），单据边解析边打分，不必等整篇处理完:
+    - `start`: 匹配到的条款
+    - `match`: 一批段落中与某个条款相关的段落（页码、文本、得分）
+    - `progress`: 已处理的页数和段落数
+    - `done`: 耗时统计，以及每个条款在整篇单据中得分最高的段落
+    - `error`: 单据解析失败
+    
+    **示例:**
+    ```bash
+    curl -N -X POST "http://localhost:10000/api/check" \
+         -F "file=@投标文件.pdf" -F "role=商务管理员" \
+         -F "document_type=采购招标/比选/谈判/评审结论建议"
+    ```
+    """
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件格式: {file.filename}。仅支持: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    
+    clauses = await run_in_threadpool(load_check_clauses, db, role, document_type)
+    idf = await run_in_threadpool(semantic_idf)
+    
+    file_path = UPLOAD_DIR / 'check' / new_job_id() / os.path.basename(file.filename)
+    try:
+        await save_upload(file, file_path)
+    except Exception as e:
+        remove_job_file(str(file_path))
+        raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
+    
+    def stream():
+        try:
+            yield json.dumps({
+                'event': 'start',
+                'role': role,
+                'document_type': document_type,
+                'clauses': [
+                    {key: clause[key] for key in ('clause_id', 'regulation_title', 'clause_number')}
+                    for clause in clauses
+                ]
+            }, ensure_ascii=False) + '\n'
+            try:
+                parser = DocumentParser(page_workers=PDF_PAGE_WORKERS)
+                for event in check_document(str(file_path), clauses, idf, top, min_score, parser=parser):
+                    yield json.dumps(event, ensure_ascii=False) + '\n'
+            except Exception as e:
+                yield json.dumps({'event': 'error', 'detail': f"文档处理失败: {str(e)}"}, ensure_ascii=False) + '\n'
+        finally:
+            remove_job_file(str(file_path))
+    
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+
 @app.get("/health", tags=["系统"])
 def health_check():
     """
@@ -265,6 +592,18 @@ def health_check():
     return {"status": "healthy", "service": "smart_compliance"}
 
 
+@app.get("/api/cache/stats", tags=["系统"])
+def cache_stats():
+    """
+    缓存统计
+    
+    返回/api/match结果缓存的容量、命中率、淘汰和失效次数，用于调整
+    MATCH_CACHE_SIZE / MATCH_CACHE_TTL 配置；以及上传文档解析缓存的
+    条目数和占用空间（命中次数只统计API进程），用于调整 PARSE_CACHE_MAX_BYTES。
+    """
+    return {"match": match_cache.stats(), "parse": parse_cache.stats()}
+
+
 @app.get("/api/audit-rules", tags=["数据管理"])
 def get_audit_rules(db: Session = Depends(get_db)):
     """
@@ -272,58 +611,54 @@ def get_audit_rules(db: Session = Depends(get_db)):
     
     返回角色-单据类型-条款之间的关联关系。
     """
-    rules = (
-        db.query(AuditRule)
-        .join(AuditorRole, AuditRule.role_id == AuditorRole.id)
-        .join(DocumentType, AuditRule.document_type_id == DocumentType.id)
-        .join(Clause, AuditRule.clause_id == Clause.id)
-        .join(Regulation, Clause.regulation_id == Regulation.id)
-        .all()
-    )
+    matcher = SimpleMatcher(db)
+    return matcher.get_all_audit_rules()
+
+
+async def create_upload_job(files: List[UploadFile]) -> dict:
+    """检查文件格式，分块保存上传文件并登记导入任务"""
+    for file in files:
+        file_ext = os.path.splitext(file.filename)[1].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的文件格式: {file.filename}。仅支持: {', '.join(ALLOWED_EXTENSIONS)}"
+            )
     
-    results = []
-    for rule in rules:
-        results.append({
-            'id': rule.id,
-            'role': {
-                'id': rule.role.id,
-                'role_name': rule.role.role_name
-            },
-            'document_type': {
-                'id': rule.document_type.id,
-                'type_name': rule.document_type.type_name
-            },
-            'clause': {
-                'id': rule.clause.id,
-                'clause_number': rule.clause.clause_number,
-                'content': rule.clause.content,
-                'regulation': {
-                    'id': rule.clause.regulation.id,
-                    'title': rule.clause.regulation.title
-                }
-            },
-            'source': rule.source,
-            'priority': rule.priority
-        })
+    job_id = new_job_id()
+    saved = []
+    try:
+        # 分块保存文件
+        for index, file in enumerate(files):
+            file_path = job_file_path(job_id, index, file.filename)
+            file_hash = await save_upload(file, file_path)
+            saved.append((file.filename, str(file_path), file_hash))
+    except Exception as e:
+        shutil.rmtree(job_upload_dir(job_id), ignore_errors=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"文件保存失败: {str(e)}"
+        )
     
-    return results
+    # 登记后由工作进程在后台解析和导入
+    return await run_in_threadpool(submit_job, job_id, saved)
 
 
-@app.post("/api/regulations/upload", tags=["数据管理"])
-async def upload_regulation(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
-):
+@app.post("/api/regulations/upload", status_code=202, tags=["数据管理"])
+async def upload_regulation(file: UploadFile = File(...)):
     """
     上传法规文档
     
     支持PDF和Word文档（.pdf, .docx, .doc），自动解析并导入系统。
+    文件分块写入磁盘后立即返回任务ID（只包含一个文件的导入任务），
+    解析和导入在后台进行，通过 `GET /api/jobs/{job_id}` 查询进度和结果。
+    与已有法规内容相同的文件（即使文件名不同）标记为 `duplicate`，不会重复导入。
     
     **参数:**
     - **file**: 上传的文件
     
     **返回:**
-    - 导入的法规信息和条款数量
+    - 任务ID和初始状态
     
     **示例:**
     ```bash
@@ -331,88 +666,60 @@ async def upload_regulation(
          -F "file=@法规文档.pdf"
     ```
     """
-    # 检查文件类型
-    allowed_extensions = ['.pdf', '.doc', '.docx']
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    return await create_upload_job([file])
+
+
+@app.post("/api/jobs", status_code=202, tags=["数据管理"])
+async def create_job(files: List[UploadFile] = File(...)):
+    """
+    批量上传法规文档
     
-    if file_ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的文件格式。仅支持: {', '.join(allowed_extensions)}"
-        )
+    一次提交多个PDF/Word文档，作为一个导入任务在后台并行解析和导入，
+    适合一次导入成百上千部法规。
     
-    # 创建临时目录
-    upload_dir = Path("./data/uploads")
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    **参数:**
+    - **files**: 上传的文件（可重复）
     
-    # 保存上传的文件
-    temp_file_path = upload_dir / file.filename
+    **返回:**
+    - 任务ID和初始状态
     
-    try:
-        # 保存文件
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 解析文档
-        parser = DocumentParser()
-        title, clauses = parser.parse_file(str(temp_file_path))
-        
-        if not clauses:
-            raise HTTPException(
-                status_code=400,
-                detail="未能从文档中提取到有效的法规条款"
-            )
-        
-        # 检查法规是否已存在
-        existing = db.query(Regulation).filter(
-            Regulation.title == title
-        ).first()
-        
-        if existing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"法规 '{title}' 已存在于系统中"
-            )
-        
-        # 创建法规记录
-        regulation = Regulation(
-            title=title,
-            source_file=file.filename
-        )
-        db.add(regulation)
-        db.flush()  # 获取regulation.id
-        
-        # 创建条款记录
-        for clause_data in clauses:
-            clause = Clause(
-                regulation_id=regulation.id,
-                clause_number=clause_data['clause_number'],
-                content=clause_data['content']
-            )
-            db.add(clause)
-        
-        db.commit()
-        
-        return {
-            "success": True,
-            "regulation_id": regulation.id,
-            "regulation_title": regulation.title,
-            "clause_count": len(clauses),
-            "message": f"成功导入法规 '{title}'，共 {len(clauses)} 条"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=500,
-            detail=f"文档处理失败: {str(e)}"
-        )
-    finally:
-        # 清理临时文件
-        if temp_file_path.exists():
-            temp_file_path.unlink()
+    **示例:**
+    ```bash
+    curl -X POST "http://localhost:10000/api/jobs" \
+         -F "files=@法规一.pdf" -F "files=@法规二.docx"
+    ```
+    """
+    return await create_upload_job(files)
+
+
+@app.get("/api/jobs", tags=["数据管理"])
+def get_jobs(
+    limit: int = Query(20, ge=1, le=200, description="返回最近的任务数"),
+    db: Session = Depends(get_db)
+):
+    """获取最近的导入任务"""
+    return list_jobs(db, limit)
+
+
+@app.get("/api/jobs/{job_id}", tags=["数据管理"])
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    查询导入任务状态
+    
+    任务status取值: queued（排队）/ running（处理中）/ succeeded（全部成功）/
+    failed（全部失败）/ partial（部分失败）。
+    
+    返回内容:
+    - **progress**: 文件总数、已完成数、成功数、失败数和完成百分比
+    - **throughput**: 已耗时、已导入条款数、每秒处理文件数和条款数
+    - **files**: 每个文件的状态（queued/parsing/importing/succeeded/failed）、
+      解析和写库耗时、导入的法规和条款数、失败原因
+    - **errors**: 失败文件及原因
+    """
+    job = get_ingest_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"未找到任务: {job_id}")
+    return job
 
 
 # ============ 启动说明 ============
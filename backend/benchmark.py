@@ -0,0 +1,1111 @@
+"""
+性能基准测试脚本
+
+使用由regulations目录中真实句子拼接出的合成语料，
+在临时数据库上评估各项查询路径的性能。
+
+用法:
+    python benchmark.py search      # 关键词搜索：全表扫描 vs 全文索引
+    python benchmark.py boolean     # 组合检索：多次扫描求交 vs 单个检索式
+    python benchmark.py regulations # 法规列表：逐个COUNT vs 分组聚合
+    python benchmark.py indexes     # 外键/查询列索引：建索引前后的查询计划和耗时
+    python benchmark.py ingest      # 法规导入：逐条ORM写入 vs 批量insert
+    python benchmark.py parse       # 法规目录解析：单进程 vs 多进程
+    python benchmark.py segment     # 条款切分：惰性前瞻正则 vs 行首边界单次扫描
+    python benchmark.py clauses     # 条款切分吞吐和内存：旧版正则+dict vs 单次扫描+dict vs 单次扫描+ClauseRecord
+    python benchmark.py pdf         # PDF解析内存：整篇拼接 vs 逐页流式切分（合成1000页PDF）
+    python benchmark.py pdfpages    # PDF文本提取：单进程 vs 按页段多进程
+    python benchmark.py parsecache  # 上传文档：首次解析 vs 解析缓存命中 vs 上传时识别重复
+    python benchmark.py linker      # 审核规则关联：逐关键词LIKE扫描 vs Aho–Corasick自动机（1万关键词 × 10万条款）
+    python benchmark.py semantic    # 语义检索：全矩阵扫描 vs 倒排表，逐个查询 vs 批量查询（10万条款）
+    python benchmark.py ann         # 语义检索：精确检索 vs IVF近似检索的召回率和延迟，上传后增量更新 vs 整体重建
+    python benchmark.py suggest     # 审核规则推荐：逐个组合 vs 所有角色×单据类型组合一次计算
+    python benchmark.py check       # 单据检查：300页PDF逐段落逐条款 vs 分批打分，首个结果的等待时间
+"""
+
+import os
+import sys
+import glob
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+# 基准测试使用独立的临时数据库，必须在导入database之前设置
+BENCH_DIR = tempfile.mkdtemp(prefix='compliance_bench_')
+os.environ['DATABASE_PATH'] = os.path.join(BENCH_DIR, 'bench.db')
+os.environ['PARSE_CACHE_DIR'] = os.path.join(BENCH_DIR, 'parse_cache')
+
+from sqlalchemy import event, insert, func
+
+from database import (
+    init_database, migrate_database, SessionLocal, engine, Base,
+    Regulation, Clause, AuditorRole, DocumentType, AuditRule
+)
+from matcher import SimpleMatcher
+from parser import RegulationParser
+from ingest import insert_regulations
+from PyPDF2 import PdfReader
+from document_parser import DocumentParser
+from hierarchy import int_to_cn
+from segmenter import (
+    segment_clauses, iter_clause_spans, legacy_segment_clauses, normalize_clause,
+    LEGACY_CLAUSE_PATTERN, MIN_CLAUSE_LENGTH
+)
+
+REGULATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'regulations')
+
+
+def reset_database():
+    """删除临时数据库文件并重新建表，使各项基准测试互不影响"""
+    engine.dispose()
+    db_file = os.environ['DATABASE_PATH']
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
+    init_database()
+
+
+def load_sentences():
+    """从法规文档中切分出句子，作为合成语料的素材"""
+    sentences = []
+    for path in glob.glob(os.path.join(REGULATIONS_DIR, '*.md')):
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for sentence in re.split(r'[。；\n]', content):
+            sentence = sentence.strip()
+            if len(sentence) > 8:
+                sentences.append(sentence + '。')
+    return sentences
+
+
+def grow_corpus(session, target, sentences, rng, clauses_per_regulation=100):
+    """
+    向数据库追加合成法规，直到条款总数达到target
+
+    Args:
+        session: 数据库会话
+        target: 目标条款数
+        sentences: 句子素材
+        rng: 随机数生成器
+        clauses_per_regulation: 每部合成法规的条款数
+    """
+    current = session.query(func.count(Clause.id)).scalar()
+    while current < target:
+        regulation = Regulation(
+            title=f'合成法规{current // clauses_per_regulation + 1:06d}',
+            source_file='synthetic'
+        )
+        session.add(regulation)
+        session.flush()
+
+        batch = min(clauses_per_regulation, target - current)
+        rows = []
+        for i in range(1, batch + 1):
+            body = ''.join(rng.choice(sentences) for _ in range(rng.randint(2, 5)))
+            number = f'第{int_to_cn(i)}条'
+            rows.append({
+                'regulation_id': regulation.id,
+                'clause_number': number,
+                'content': f'{number} {body}'
+            })
+        session.execute(insert(Clause), rows)
+        current += batch
+    session.commit()
+
+
+def measure(fn, repeat=20):
+    """多次执行并返回耗时中位数（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def like_scan(session, keyword, limit):
+    """旧版实现：LIKE '%keyword%' 全表扫描"""
+    return (
+        session.query(Clause)
+        .join(Regulation)
+        .filter(Clause.content.like(f'%{keyword}%'))
+        .limit(limit)
+        .all()
+    )
+
+
+def bench_search(sizes=(1000, 10000, 100000), limit=20):
+    """关键词搜索：LIKE全表扫描与全文索引的耗时对比"""
+    print("=== 关键词搜索: LIKE扫描 vs 全文索引 ===")
+    reset_database()
+    rng = random.Random(42)
+    sentences = load_sentences()
+    # 常见词很快凑满limit，罕见词/不存在的词迫使扫描走完全表
+    keywords = ['公开招标', '国有资金', '废标', '不存在的词语']
+
+    session = SessionLocal()
+    matcher = SimpleMatcher(session)
+    try:
+        print(f"{'条款数':>8} {'关键词':<10} {'扫描(ms)':>10} {'索引(ms)':>10} {'加速比':>8}")
+        for size in sizes:
+            grow_corpus(session, size, sentences, rng)
+            for keyword in keywords:
+                scan_ms = measure(lambda: like_scan(session, keyword, limit), repeat=5)
+                index_ms = measure(lambda: matcher.search_clauses_by_keyword(keyword, limit))
+                speedup = scan_ms / index_ms if index_ms else float('inf')
+                print(f"{size:>8} {keyword:<10} {scan_ms:>10.3f} {index_ms:>10.3f} {speedup:>7.1f}x")
+    finally:
+        session.close()
+
+
+def bench_boolean(size=100000, limit=20):
+    """组合检索：逐个关键词LIKE扫描后在内存中求交 vs 单个检索式"""
+    print("=== 组合检索: 多次扫描求交 vs 单个检索式 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    matcher = SimpleMatcher(session)
+
+    def scan_and_intersect(keywords):
+        ids = None
+        for keyword in keywords:
+            matched = {
+                clause_id for (clause_id,) in
+                session.query(Clause.id).filter(Clause.content.like(f'%{keyword}%'))
+            }
+            ids = matched if ids is None else ids & matched
+        return sorted(ids)[:limit]
+
+    try:
+        grow_corpus(session, size, load_sentences(), rng)
+        cases = [
+            ['公开招标', '国有资金'],
+            ['招标', '供应商', '评标委员会'],
+        ]
+        print(f"{'条款数':>8} {'检索式':<24} {'多次扫描(ms)':>12} {'检索式(ms)':>12}")
+        for keywords in cases:
+            query = ' AND '.join(keywords)
+            scan_ms = measure(lambda: scan_and_intersect(keywords), repeat=3)
+            index_ms = measure(lambda: matcher.search_clauses_by_keyword(query, limit))
+            print(f"{size:>8} {query:<24} {scan_ms:>12.3f} {index_ms:>12.3f}")
+    finally:
+        session.close()
+
+
+def regulations_summary_per_row(session):
+    """旧版实现：每部法规单独执行一次COUNT"""
+    results = []
+    for reg in session.query(Regulation).all():
+        clause_count = session.query(Clause).filter(Clause.regulation_id == reg.id).count()
+        results.append((reg.id, reg.title, reg.source_file, clause_count))
+    return results
+
+
+def bench_regulations(sizes=(100, 1000, 5000), clauses_per_regulation=10):
+    """法规列表：逐个COUNT与分组聚合的耗时对比"""
+    print("=== 法规列表: 逐个COUNT vs 分组聚合 ===")
+    reset_database()
+    rng = random.Random(42)
+    sentences = load_sentences()
+    session = SessionLocal()
+    matcher = SimpleMatcher(session)
+    try:
+        print(f"{'法规数':>8} {'逐个COUNT(ms)':>14} {'分组聚合(ms)':>14}")
+        for size in sizes:
+            grow_corpus(session, size * clauses_per_regulation, sentences, rng,
+                        clauses_per_regulation=clauses_per_regulation)
+            per_row_ms = measure(lambda: regulations_summary_per_row(session), repeat=3)
+            aggregate_ms = measure(matcher.get_regulations_summary, repeat=5)
+            print(f"{size:>8} {per_row_ms:>14.3f} {aggregate_ms:>14.3f}")
+    finally:
+        session.close()
+
+
+def capture_plans(fn):
+    """执行fn，返回期间每条SQL语句的EXPLAIN QUERY PLAN"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plans.append([row[-1] for row in rows])
+    return plans
+
+
+def add_synthetic_rules(session, role_count=20, doc_type_count=20, rules_per_pair=500, rng=None):
+    """生成角色、单据类型，并为每个组合随机关联若干条款"""
+    roles = [AuditorRole(role_name=f'角色{i}') for i in range(role_count)]
+    doc_types = [DocumentType(type_name=f'单据类型{i}') for i in range(doc_type_count)]
+    session.add_all(roles + doc_types)
+    session.flush()
+
+    max_clause_id = session.query(func.max(Clause.id)).scalar()
+    rows = []
+    for role in roles:
+        for doc_type in doc_types:
+            # 同一组合内不重复（审核规则有唯一索引）
+            for clause_id in rng.sample(range(1, max_clause_id + 1), rules_per_pair):
+                rows.append({
+                    'role_id': role.id,
+                    'document_type_id': doc_type.id,
+                    'clause_id': clause_id,
+                    'source': 'example',
+                    'priority': rng.randint(0, 10)
+                })
+    session.execute(insert(AuditRule), rows)
+    session.commit()
+
+
+def drop_indexes():
+    """删除模型上声明的所有索引，模拟旧版本数据库"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(bind=engine, checkfirst=True)
+
+
+def bench_indexes(size=100000):
+    """外键和查询列索引：建索引前后的查询计划与耗时对比"""
+    print("=== 数据库索引: 建索引前后对比 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    matcher = SimpleMatcher(session)
+    try:
+        grow_corpus(session, size, load_sentences(), rng)
+        add_synthetic_rules(session, rng=rng)
+        rule_count = session.query(func.count(AuditRule.id)).scalar()
+        print(f"条款数: {size}, 审核规则数: {rule_count}")
+
+        queries = [
+            ('条款匹配', lambda: matcher.match_clauses('角色7', '单据类型3')),
+            ('法规列表', matcher.get_regulations_summary),
+            ('按法规取条款', lambda: session.query(Clause).filter(Clause.regulation_id == 500).all()),
+            ('按标题查法规', lambda: session.query(Regulation).filter(Regulation.title == '合成法规000500').first()),
+            ('按条款查规则', lambda: session.query(AuditRule).filter(AuditRule.clause_id == 4242).all()),
+        ]
+
+        for label, prepare in (('无索引', drop_indexes), ('有索引', migrate_database)):
+            prepare()
+            session.expire_all()
+            print(f"\n--- {label} ---")
+            for name, fn in queries:
+                elapsed = measure(fn, repeat=5)
+                plan = capture_plans(fn)[0]
+                print(f"{name:<8} {elapsed:>10.3f} ms  | {' / '.join(plan)}")
+    finally:
+        session.close()
+
+
+def generate_regulations(count, clauses_per_regulation, sentences, rng):
+    """生成 (法规标题, 源文件, 条款列表) 形式的合成解析结果"""
+    regulations = []
+    for r in range(count):
+        clauses = []
+        for i in range(1, clauses_per_regulation + 1):
+            number = f'第{int_to_cn(i)}条'
+            body = ''.join(rng.choice(sentences) for _ in range(rng.randint(2, 5)))
+            clauses.append({'clause_number': number, 'content': f'{number} {body}'})
+        regulations.append((f'合成法规{r:06d}', 'synthetic', clauses))
+    return regulations
+
+
+def import_per_object(session, regulations):
+    """旧版实现：逐条创建ORM对象，每部法规提交一次"""
+    for title, source_file, clauses in regulations:
+        regulation = Regulation(title=title, source_file=source_file)
+        session.add(regulation)
+        session.flush()
+        for clause_data in clauses:
+            session.add(Clause(
+                regulation_id=regulation.id,
+                clause_number=clause_data['clause_number'],
+                content=clause_data['content']
+            ))
+        session.commit()
+
+
+def import_bulk(session, regulations, batch_size=200):
+    """批量insert，每批法规一个事务"""
+    for start in range(0, len(regulations), batch_size):
+        insert_regulations(session, regulations[start:start + batch_size])
+        session.commit()
+
+
+def bench_ingest(synthetic_regulations=1000, clauses_per_regulation=100):
+    """法规导入：逐条ORM写入与批量insert的吞吐量对比"""
+    print("=== 法规导入: 逐条ORM写入 vs 批量insert ===")
+    parser = RegulationParser()
+    corpora = [
+        ('regulations目录', parser.parse_directory(REGULATIONS_DIR)),
+        ('合成语料', generate_regulations(synthetic_regulations, clauses_per_regulation,
+                                       load_sentences(), random.Random(42))),
+    ]
+
+    print(f"{'语料':<16} {'条款数':>8} {'方式':<8} {'耗时(s)':>10} {'条款/秒':>12}")
+    for name, regulations in corpora:
+        clause_count = sum(len(clauses) for _, _, clauses in regulations)
+        for method_name, method in (('逐条ORM', import_per_object), ('批量', import_bulk)):
+            reset_database()
+            session = SessionLocal()
+            try:
+                start = time.perf_counter()
+                method(session, regulations)
+                elapsed = time.perf_counter() - start
+            finally:
+                session.close()
+            print(f"{name:<16} {clause_count:>8} {method_name:<8} {elapsed:>10.3f} {clause_count / elapsed:>12.0f}")
+
+
+def write_markdown_corpus(directory, file_count, clauses_per_file, sentences, rng):
+    """生成file_count个markdown法规文件，格式与regulations目录一致"""
+    os.makedirs(directory, exist_ok=True)
+    for f in range(file_count):
+        lines = [f'# 合成法规{f:05d}', '']
+        for i in range(1, clauses_per_file + 1):
+            body = ''.join(rng.choice(sentences) for _ in range(rng.randint(2, 5)))
+            lines.append(f'第{int_to_cn(i)}条 {body}')
+            lines.append('')
+        with open(os.path.join(directory, f'合成法规{f:05d}_20240101.md'), 'w', encoding='utf-8') as out:
+            out.write('\n'.join(lines))
+
+
+def bench_parse(file_count=2000, clauses_per_file=60):
+    """法规目录解析：单进程与多进程的耗时对比，并检查输出一致"""
+    print("=== 法规目录解析: 单进程 vs 多进程 ===")
+    corpus_dir = os.path.join(BENCH_DIR, 'corpus')
+    write_markdown_corpus(corpus_dir, file_count, clauses_per_file, load_sentences(), random.Random(42))
+    print(f"合成语料: {file_count} 个文件，每个 {clauses_per_file} 条")
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpu_count})
+    parser = RegulationParser()
+    baseline = None
+
+    print(f"{'进程数':>6} {'耗时(s)':>10} {'文件/秒':>10} {'加速比':>8} "
+          f"{'单文件p50(ms)':>14} {'单文件p95(ms)':>14} {'单文件max(ms)':>14} {'结果一致':>8}")
+    for workers in worker_counts:
+        results = parser.parse_directory(corpus_dir, workers=workers, verbose=False)
+        stats = parser.last_parse_stats
+        if baseline is None:
+            baseline = (results, stats['elapsed_seconds'])
+
+        file_ms = sorted(stat['seconds'] * 1000 for stat in stats['files'])
+        p95 = file_ms[min(len(file_ms) - 1, int(len(file_ms) * 0.95))]
+        print(f"{stats['workers']:>6} {stats['elapsed_seconds']:>10.3f} {stats['files_per_second']:>10.0f} "
+              f"{baseline[1] / stats['elapsed_seconds']:>8.2f} {statistics.median(file_ms):>14.2f} "
+              f"{p95:>14.2f} {file_ms[-1]:>14.2f} {str(results == baseline[0]):>8}")
+
+
+def build_large_document(target_bytes):
+    """把regulations目录中的法规文本重复拼接到target_bytes大小（UTF-8）"""
+    parts = []
+    for path in sorted(glob.glob(os.path.join(REGULATIONS_DIR, '*.md'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            parts.append(f.read())
+    unit = '\n'.join(parts)
+    repeat = max(1, target_bytes // len(unit.encode('utf-8')))
+    return '\n'.join([unit] * repeat)
+
+
+def bench_segment(sizes_mb=(1, 4, 16)):
+    """条款切分：旧版惰性前瞻正则与行首边界单次扫描的耗时对比"""
+    print("=== 条款切分: 惰性前瞻正则 vs 行首边界单次扫描 ===")
+    print(f"{'文档大小':>8} {'方式':<10} {'找边界(ms)':>12} {'总耗时(ms)':>12} {'MB/秒':>8} {'条款数':>8}")
+    methods = (
+        ('旧版正则', lambda c: [m.span() for m in LEGACY_CLAUSE_PATTERN.finditer(c)], legacy_segment_clauses),
+        ('单次扫描', lambda c: list(iter_clause_spans(c)), segment_clauses),
+    )
+    for size_mb in sizes_mb:
+        content = build_large_document(size_mb * 1024 * 1024)
+        actual_mb = len(content.encode('utf-8')) / 1024 / 1024
+        for name, scan, segment in methods:
+            scan_ms = measure(lambda: scan(content), repeat=5)
+            total_ms = measure(lambda: segment(content), repeat=5)
+            print(f"{actual_mb:>6.1f}MB {name:<10} {scan_ms:>12.1f} {total_ms:>12.1f} "
+                  f"{actual_mb / total_ms * 1000:>8.1f} {len(segment(content)):>8}")
+
+
+def segment_clauses_as_dicts(content):
+    """单次扫描切分，但像改造前一样每个条款构造一个dict（用于对比ClauseRecord）"""
+    clauses = []
+    for clause_number, start, end in iter_clause_spans(content):
+        clause_content = normalize_clause(content[start:end])
+        if len(clause_content) > MIN_CLAUSE_LENGTH:
+            clauses.append({'clause_number': clause_number, 'content': clause_content})
+    return clauses
+
+
+def bench_clauses(size_mb=8):
+    """条款切分吞吐（条/秒）和结果占用的内存：改造前后对比"""
+    print("=== 条款切分吞吐和内存 ===")
+    content = build_large_document(size_mb * 1024 * 1024)
+    print(f"文档大小: {len(content.encode('utf-8')) / 1024 / 1024:.1f}MB")
+    print(f"{'方式':<24} {'条款数':>8} {'耗时(ms)':>10} {'条/秒':>10} {'结果内存(MB)':>14}")
+    methods = (
+        ('旧版正则 + dict', legacy_segment_clauses),
+        ('单次扫描 + dict', segment_clauses_as_dicts),
+        ('单次扫描 + ClauseRecord', segment_clauses),
+    )
+    for name, segment in methods:
+        elapsed_ms = measure(lambda: segment(content), repeat=5)
+
+        # 结果列表本身占用的内存（条款文本之外的对象开销也计入）
+        tracemalloc.start()
+        clauses = segment(content)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print(f"{name:<24} {len(clauses):>8} {elapsed_ms:>10.1f} "
+              f"{len(clauses) / elapsed_ms * 1000:>10.0f} {retained / 1024 / 1024:>14.1f}")
+        del clauses
+
+
+def write_synthetic_pdf(path, pages):
+    """
+    生成只含文本的PDF文件（不依赖第三方库）
+
+    使用Identity-H编码的Type0字体，字符编码即Unicode码位，
+    ToUnicode映射表只包含用到的字符，与常见的子集化中文字体一致。
+
+    Args:
+        path: 输出路径
+        pages: 每页的文本行列表
+    """
+    chars = sorted({ch for lines in pages for line in lines for ch in line})
+    cmap_lines = [
+        '/CIDInit /ProcSet findresource begin', '12 dict begin', 'begincmap',
+        '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def',
+        '/CMapName /Adobe-Identity-UCS def', '/CMapType 2 def',
+        '1 begincodespacerange', '<0000> <FFFF>', 'endcodespacerange'
+    ]
+    for start in range(0, len(chars), 100):
+        chunk = chars[start:start + 100]
+        cmap_lines.append(f'{len(chunk)} beginbfchar')
+        cmap_lines.extend(f'<{ord(ch):04X}> <{ord(ch):04X}>' for ch in chunk)
+        cmap_lines.append('endbfchar')
+    cmap_lines += ['endcmap', 'CMapName currentdict /CMap defineresource pop', 'end', 'end']
+    cmap = '\n'.join(cmap_lines).encode('ascii')
+
+    # 对象1-6: 目录、页树、Type0字体、CID字体、ToUnicode映射、字体描述；之后每页一个页面对象和一个内容流
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /Type0 /BaseFont /SimSun /Encoding /Identity-H '
+           b'/DescendantFonts [4 0 R] /ToUnicode 5 0 R >>',
+        4: b'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /SimSun '
+           b'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> '
+           b'/FontDescriptor 6 0 R /DW 1000 /CIDToGIDMap /Identity >>',
+        5: b'<< /Length %d >>\nstream\n' % len(cmap) + cmap + b'\nendstream',
+        6: b'<< /Type /FontDescriptor /FontName /SimSun /Flags 4 /FontBBox [0 -141 1000 859] '
+           b'/ItalicAngle 0 /Ascent 859 /Descent -141 /CapHeight 700 /StemV 80 >>',
+    }
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id = 7 + 2 * i
+        content_id = page_id + 1
+        kids.append(f'{page_id} 0 R')
+        operations = ['BT', '/F1 10 Tf', '12 TL', '40 800 Td']
+        operations += [f'<{line.encode("utf-16-be").hex().upper()}> Tj T*' for line in lines]
+        operations.append('ET')
+        data = zlib.compress('\n'.join(operations).encode('ascii'))
+        objects[content_id] = b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data) + data + b'\nendstream'
+        objects[page_id] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>'
+        ).encode('ascii')
+    objects[2] = f'<< /Type /Pages /Count {len(pages)} /Kids [{" ".join(kids)}] >>'.encode('ascii')
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        offsets = {}
+        for object_id in sorted(objects):
+            offsets[object_id] = f.tell()
+            f.write(b'%d 0 obj\n' % object_id + objects[object_id] + b'\nendobj\n')
+        xref_offset = f.tell()
+        size = max(objects) + 1
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+        for object_id in range(1, size):
+            f.write(b'%010d 00000 n \n' % offsets[object_id])
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref_offset))
+
+
+def generate_pdf_pages(page_count, sentences, rng, lines_per_page=40, chars_per_line=36):
+    """生成合成法规的分页文本，每页若干条款，条款正文按固定宽度折行"""
+    pages = []
+    lines = []
+    number = 1
+    while len(pages) < page_count:
+        # 条款编号在第九百九十九条之后重新从第一条开始
+        body = f'第{int_to_cn((number - 1) % 999 + 1)}条　' + ''.join(
+            rng.choice(sentences) for _ in range(rng.randint(2, 6))
+        )
+        number += 1
+        for start in range(0, len(body), chars_per_line):
+            lines.append(body[start:start + chars_per_line])
+            if len(lines) == lines_per_page:
+                pages.append(lines)
+                lines = []
+    return pages[:page_count]
+
+
+def legacy_parse_pdf(file_path):
+    """旧版实现：拼接全部页面文本后整体切分"""
+    reader = PdfReader(file_path)
+    text_content = ""
+    for page in reader.pages:
+        text_content += page.extract_text() + "\n"
+    return legacy_segment_clauses(text_content)
+
+
+def bench_pdf(page_counts=(250, 1000)):
+    """PDF解析内存：整篇拼接与逐页流式切分的峰值内存对比（tracemalloc统计Python分配）"""
+    print("=== PDF解析内存: 整篇拼接 vs 逐页流式切分 ===")
+    sentences = load_sentences()
+    parser = DocumentParser()
+    # 各方式返回条款数
+    methods = (
+        ('整篇拼接', lambda path: len(legacy_parse_pdf(path))),
+        ('流式切分', lambda path: len(parser.parse_pdf(path)[1])),
+        # 逐条消费、不保留条款（层级结构节点仍随解析保留在last_hierarchy中）
+        ('流式逐条', lambda path: sum(1 for _ in parser.iter_clauses(path))),
+    )
+
+    print(f"{'页数':>6} {'文件(MB)':>9} {'方式':<10} {'耗时(s)':>9} {'峰值内存(MB)':>13} {'条款数':>8}")
+    for page_count in page_counts:
+        pdf_path = os.path.join(BENCH_DIR, f'synthetic_{page_count}.pdf')
+        write_synthetic_pdf(pdf_path, generate_pdf_pages(page_count, sentences, random.Random(42)))
+        file_mb = os.path.getsize(pdf_path) / 1024 / 1024
+
+        for name, parse in methods:
+            tracemalloc.start()
+            start = time.perf_counter()
+            clause_count = parse(pdf_path)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{page_count:>6} {file_mb:>9.2f} {name:<10} {elapsed:>9.1f} "
+                  f"{peak / 1024 / 1024:>13.1f} {clause_count:>8}")
+
+
+def bench_pdf_pages(page_count=400, pages_per_task=16):
+    """PDF文本提取：单进程逐页与按页段多进程的耗时对比，并检查结果一致"""
+    print("=== PDF文本提取: 单进程 vs 按页段多进程 ===")
+    pdf_path = os.path.join(BENCH_DIR, f'synthetic_{page_count}.pdf')
+    write_synthetic_pdf(pdf_path, generate_pdf_pages(page_count, load_sentences(), random.Random(42)))
+    print(f"合成PDF: {page_count} 页，每个任务 {pages_per_task} 页")
+
+    cpu_count = os.cpu_count() or 1
+    baseline = None
+    print(f"{'进程数':>6} {'耗时(s)':>9} {'页/秒':>8} {'加速比':>8} {'结果一致':>8}  耗时最长的页面")
+    for workers in sorted({1, 2, 4, cpu_count}):
+        parser = DocumentParser(page_workers=workers, pages_per_task=pages_per_task)
+        start = time.perf_counter()
+        result = parser.parse_pdf(pdf_path)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = (result, elapsed)
+
+        slowest = ', '.join(
+            f"第{page['page']}页 {page['seconds'] * 1000:.0f}ms"
+            for page in parser.page_stats_summary(top=3)['slowest_pages']
+        )
+        print(f"{workers:>6} {elapsed:>9.2f} {page_count / elapsed:>8.1f} "
+              f"{baseline[1] / elapsed:>8.2f} {str(result == baseline[0]):>8}  {slowest}")
+
+
+def bench_parse_cache(page_count=400):
+    """上传文档：首次解析、换文件名后命中解析缓存、上传时直接识别为重复的耗时"""
+    from jobs import parse_document, parse_cache, create_job, new_job_id
+    from cache import file_digest
+    from ingest import import_parsed_regulation
+
+    print("=== 上传文档: 首次解析 vs 解析缓存 vs 重复识别 ===")
+    reset_database()
+    pdf_path = os.path.join(BENCH_DIR, '招标投标法.pdf')
+    write_synthetic_pdf(pdf_path, generate_pdf_pages(page_count, load_sentences(), random.Random(42)))
+    renamed_path = os.path.join(BENCH_DIR, '招标投标法（副本）.pdf')
+    shutil.copyfile(pdf_path, renamed_path)
+
+    start = time.perf_counter()
+    file_hash = file_digest(pdf_path)
+    digest_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    title, clauses, _, _, cached = parse_document(pdf_path, file_hash)
+    parse_seconds = time.perf_counter() - start
+    assert not cached
+
+    start = time.perf_counter()
+    renamed_title, cached_clauses, _, _, cached = parse_document(renamed_path, file_hash)
+    hit_seconds = time.perf_counter() - start
+    assert cached and cached_clauses == clauses and renamed_title != title
+
+    session = SessionLocal()
+    import_parsed_regulation(session, title, os.path.basename(pdf_path), clauses)
+    session.commit()
+    start = time.perf_counter()
+    job = create_job(session, new_job_id(), [(os.path.basename(renamed_path), renamed_path, file_hash)])
+    duplicate_seconds = time.perf_counter() - start
+    session.close()
+    assert job['files'][0]['status'] == 'duplicate'
+
+    stats = parse_cache.stats()
+    print(f"合成PDF: {page_count} 页，{os.path.getsize(pdf_path) / 1024:.0f} KB，{len(clauses)} 条；"
+          f"缓存条目 {stats['bytes'] / 1024:.0f} KB")
+    print(f"计算SHA-256:           {digest_seconds * 1000:>9.1f} ms")
+    print(f"首次解析:             {parse_seconds * 1000:>9.1f} ms")
+    print(f"换文件名后命中缓存:   {hit_seconds * 1000:>9.1f} ms  ({parse_seconds / hit_seconds:.0f}x)")
+    print(f"上传时识别为重复:     {duplicate_seconds * 1000:>9.1f} ms（登记任务，不写法规表）")
+
+
+def legacy_link_rules(session, mappings):
+    """旧版实现：每个关键词一次LIKE全表扫描，每个候选条款一次规则存在性查询"""
+    for role_id, document_type_id, keyword in mappings:
+        clauses = session.query(Clause).filter(Clause.content.like(f'%{keyword[:20]}%')).all()
+        for clause in clauses:
+            existing_rule = session.query(AuditRule).filter(
+                AuditRule.role_id == role_id,
+                AuditRule.document_type_id == document_type_id,
+                AuditRule.clause_id == clause.id
+            ).first()
+            if not existing_rule:
+                session.add(AuditRule(
+                    role_id=role_id, document_type_id=document_type_id,
+                    clause_id=clause.id, source='example', priority=10
+                ))
+                break
+    session.flush()
+
+
+def rule_links(session):
+    """当前所有审核规则的 (角色, 单据类型, 条款) 集合"""
+    return set(session.query(AuditRule.role_id, AuditRule.document_type_id, AuditRule.clause_id))
+
+
+def bench_linker(size=100000, keyword_count=10000, miss_ratio=0.05, legacy_sample=100):
+    """审核规则关联：逐关键词LIKE扫描 vs Aho–Corasick自动机单次扫描"""
+    from rule_linker import link_rules
+
+    print("=== 审核规则关联: 逐关键词LIKE扫描 vs 自动机单次扫描 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    try:
+        grow_corpus(session, size, load_sentences(), rng)
+        roles = [AuditorRole(role_name=f'角色{i}') for i in range(10)]
+        doc_type = DocumentType(type_name='单据类型0')
+        session.add_all(roles + [doc_type])
+        session.commit()
+
+        # 关键词取自随机条款的片段，另有一部分在语料中不存在，迫使扫描走完全表
+        contents = [content for (content,) in session.query(Clause.content)]
+        mappings = []
+        for i in range(keyword_count):
+            role_id = rng.choice(roles).id
+            if rng.random() < miss_ratio:
+                keyword = f'不存在的关键词{i:05d}'
+            else:
+                content = rng.choice(contents)
+                start = rng.randint(0, max(0, len(content) - 20))
+                keyword = content[start:start + rng.randint(8, 30)]
+            mappings.append((role_id, doc_type.id, keyword))
+        del contents
+
+        # 抽样对比：两种实现在空规则表上产生的关联必须一致
+        sample = rng.sample(mappings, legacy_sample)
+        start = time.perf_counter()
+        legacy_link_rules(session, sample)
+        legacy_seconds = time.perf_counter() - start
+        legacy_links = rule_links(session)
+        session.rollback()
+
+        start = time.perf_counter()
+        link_rules(session, sample)
+        sample_seconds = time.perf_counter() - start
+        same = rule_links(session) == legacy_links
+        session.rollback()
+
+        start = time.perf_counter()
+        stats = link_rules(session, mappings)
+        session.commit()
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rerun = link_rules(session, mappings)
+        session.commit()
+        rerun_seconds = time.perf_counter() - start
+
+        print(f"条款数: {size}，关键词: {keyword_count}（去重后 {stats['phrases']}），"
+              f"未匹配: {len(stats['unmatched'])}")
+        print(f"{'实现':<22} {'关键词':>8} {'耗时(s)':>10} {'关键词/秒':>10}")
+        print(f"{'LIKE扫描（抽样）':<22} {legacy_sample:>8} {legacy_seconds:>10.2f} "
+              f"{legacy_sample / legacy_seconds:>10.1f}")
+        print(f"{'自动机（抽样）':<22} {legacy_sample:>8} {sample_seconds:>10.2f} "
+              f"{legacy_sample / sample_seconds:>10.1f}")
+        print(f"{'自动机（全部）':<22} {keyword_count:>8} {full_seconds:>10.2f} "
+              f"{keyword_count / full_seconds:>10.1f}")
+        print(f"{'自动机（重复执行）':<22} {keyword_count:>8} {rerun_seconds:>10.2f} "
+              f"{keyword_count / rerun_seconds:>10.1f}")
+        print(f"LIKE扫描按抽样外推到 {keyword_count} 个关键词约 "
+              f"{legacy_seconds / legacy_sample * keyword_count:.0f} s"
+              f"（{legacy_seconds / legacy_sample * keyword_count / full_seconds:.0f}x）")
+        print(f"抽样关联结果一致: {same}；新增规则 {stats['rules_inserted']} 条，"
+              f"重复执行新增 {rerun['rules_inserted']} 条")
+    finally:
+        session.close()
+
+
+def semantic_queries(sentences, rng, count):
+    """语义检索的查询：句子片段（短查询）和整句改写（打乱分句顺序的长查询）"""
+    queries = []
+    for _ in range(count):
+        sentence = rng.choice(sentences)
+        if rng.random() < 0.5:
+            start = rng.randint(0, max(0, len(sentence) - 8))
+            queries.append(sentence[start:start + rng.randint(6, 16)])
+        else:
+            pieces = re.split('[，、]', sentence)
+            rng.shuffle(pieces)
+            queries.append('，'.join(pieces))
+    return queries
+
+
+def bench_semantic(size=100000, query_count=200, batch_size=64, k=20):
+    """语义检索：全部非零元素扫描 vs 倒排表只取查询特征；逐个查询 vs 批量查询"""
+    import numpy as np
+    from semantic import SemanticIndex, build_semantic_index, FEATURE_SPACE
+    from vector_index import top_k
+
+    print("=== 语义检索: 全矩阵扫描 vs 倒排表，逐个 vs 批量 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    try:
+        sentences = load_sentences()
+        grow_corpus(session, size, sentences, rng)
+        directory = os.path.join(BENCH_DIR, 'semantic_index')
+        stats = build_semantic_index(session, directory, 'exact')
+        print(f"条款数: {stats['clauses']}，非零元素: {stats['nnz']}，"
+              f"索引 {stats['bytes'] / 1024 / 1024:.0f} MB，构建 {stats['seconds']:.1f} s")
+
+        index = SemanticIndex(directory)
+        queries = semantic_queries(sentences, rng, query_count)
+
+        # 对照：把查询向量展开成稠密向量，与矩阵的全部非零元素相乘
+        column_of = np.repeat(np.arange(FEATURE_SPACE), np.diff(index.searcher.indptr))
+        rows = np.asarray(index.searcher.rows)
+        weights = np.asarray(index.searcher.weights)
+
+        def scan_all(query):
+            documents, features, values = index.vectorize([query])
+            dense = np.zeros(FEATURE_SPACE, dtype=np.float32)
+            dense[features] = values
+            scores = np.bincount(rows, weights=weights * dense[column_of], minlength=len(index))
+            top_rows, top_scores = top_k(scores, k)
+            return list(zip(index.clause_ids[top_rows].tolist(), top_scores.tolist()))
+
+        def timed(fn, items):
+            timings = []
+            outputs = []
+            for item in items:
+                start = time.perf_counter()
+                outputs.append(fn(item))
+                timings.append((time.perf_counter() - start) * 1000)
+            return outputs, timings
+
+        scan_results, scan_ms = timed(scan_all, queries[:20])
+        single_results, single_ms = timed(lambda query: index.search([query], k)[0], queries)
+        batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+        batch_results, batch_ms = timed(lambda batch: index.search(batch, k), batches)
+        batch_results = [hits for batch in batch_results for hits in batch]
+
+        def same(left, right):
+            return all([c for c, _ in a] == [c for c, _ in b] and
+                       np.allclose([s for _, s in a], [s for _, s in b], atol=1e-5)
+                       for a, b in zip(left, right))
+
+        print(f"{'方式':<20} {'查询数':>6} {'中位数(ms)':>11} {'P95(ms)':>9} {'每查询(ms)':>11}")
+        for label, timings, count in (
+            ('全矩阵扫描', scan_ms, len(scan_ms)),
+            ('倒排表，逐个查询', single_ms, len(single_ms)),
+            (f'倒排表，每批{batch_size}个', batch_ms, len(queries)),
+        ):
+            p95 = sorted(timings)[int(len(timings) * 0.95)] if len(timings) > 1 else timings[0]
+            print(f"{label:<20} {count:>6} {statistics.median(timings):>11.2f} {p95:>9.2f} "
+                  f"{sum(timings) / count:>11.2f}")
+        print(f"结果一致: 全矩阵扫描 {same(scan_results, single_results)}，"
+              f"批量 {same(batch_results, single_results)}")
+    finally:
+        session.close()
+
+
+def bench_ann(size=100000, query_count=200, k=20, probes=(4, 8, 16, 32, 64), upload_clauses=100):
+    """语义检索近似索引：IVF各nprobe下的召回率和延迟（以精确检索为准），上传后的增量更新耗时"""
+    from semantic import SemanticIndex, build_semantic_index, update_semantic_index
+
+    print("=== 语义检索: 精确检索 vs IVF近似检索 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    try:
+        sentences = load_sentences()
+        grow_corpus(session, size, sentences, rng)
+        queries = semantic_queries(sentences, rng, query_count)
+
+        indexes = {}
+        for ann in ('exact', 'ivf'):
+            directory = os.path.join(BENCH_DIR, f'semantic_{ann}')
+            stats = build_semantic_index(session, directory, ann)
+            indexes[ann] = SemanticIndex(directory)
+            lists = f"，{indexes[ann].meta['lists']} 个簇" if ann == 'ivf' else ''
+            print(f"{ann:<6} 构建 {stats['seconds']:>5.1f} s，{stats['bytes'] / 1024 / 1024:>4.0f} MB{lists}")
+
+        def run(index, **options):
+            timings = []
+            results = []
+            for query in queries:
+                start = time.perf_counter()
+                results.append(index.search([query], k, **options)[0])
+                timings.append((time.perf_counter() - start) * 1000)
+            return results, timings
+
+        exact_results, exact_ms = run(indexes['exact'])
+        rows = [('精确检索', exact_ms, 1.0, 1.0)]
+        for nprobe in probes:
+            results, timings = run(indexes['ivf'], nprobe=nprobe)
+            recall = statistics.mean(
+                len({c for c, _ in got} & {c for c, _ in want}) / len(want)
+                for got, want in zip(results, exact_results) if want
+            )
+            top1 = statistics.mean(
+                got[0][0] == want[0][0] for got, want in zip(results, exact_results) if want and got
+            )
+            rows.append((f'IVF nprobe={nprobe}', timings, recall, top1))
+
+        print(f"{'方式':<16} {'中位数(ms)':>11} {'P95(ms)':>9} {'平均(ms)':>9} {f'召回@{k}':>8} {'Top1一致':>9}")
+        for label, timings, recall, top1 in rows:
+            p95 = sorted(timings)[int(len(timings) * 0.95)]
+            print(f"{label:<16} {statistics.median(timings):>11.2f} {p95:>9.2f} "
+                  f"{statistics.mean(timings):>9.2f} {recall:>8.3f} {top1:>9.3f}")
+
+        # 上传一部法规后的增量更新 vs 整体重建
+        regulation = Regulation(title='上传法规', source_file='upload.pdf')
+        session.add(regulation)
+        session.flush()
+        session.execute(insert(Clause), [
+            {'regulation_id': regulation.id, 'clause_number': f'第{int_to_cn(i)}条',
+             'content': f'第{int_to_cn(i)}条 ' + ''.join(rng.choice(sentences) for _ in range(3))}
+            for i in range(1, upload_clauses + 1)
+        ])
+        session.commit()
+        directory = os.path.join(BENCH_DIR, 'semantic_ivf')
+        start = time.perf_counter()
+        stats = update_semantic_index(session, directory)
+        update_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        build_semantic_index(session, os.path.join(BENCH_DIR, 'semantic_rebuild'), 'ivf')
+        rebuild_seconds = time.perf_counter() - start
+        print(f"上传 {upload_clauses} 条后: 增量更新 {update_seconds * 1000:.0f} ms（{stats['mode']}），"
+              f"整体重建 {rebuild_seconds:.1f} s")
+    finally:
+        session.close()
+
+
+def bench_suggest(size=100000, shapes=((2, 5), (10, 10), (20, 50), (50, 100)), k=10, loop_sample=20):
+    """审核规则推荐：逐个组合计算得分 vs 所有组合一次计算，不同组合数下的耗时"""
+    import numpy as np
+    from semantic import SemanticIndex, build_semantic_index
+    from rule_suggester import LEXICAL_WEIGHT, suggest_rules, top_pairs
+
+    print("=== 审核规则推荐: 逐个组合 vs 所有组合一次计算 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    try:
+        sentences = load_sentences()
+        grow_corpus(session, size, sentences, rng)
+        directory = os.path.join(BENCH_DIR, 'semantic_index')
+        build_semantic_index(session, directory, 'exact')
+        index = SemanticIndex(directory)
+
+        role_count = max(r for r, _ in shapes)
+        doc_type_count = max(d for _, d in shapes)
+        role_texts = [''.join(rng.sample(sentences, 2)) for _ in range(role_count)]
+        doc_texts = [''.join(rng.sample(sentences, 2)) for _ in range(doc_type_count)]
+
+        def combined(texts):
+            _, cosine, coverage = index.score_all(texts)
+            return (1.0 - LEXICAL_WEIGHT) * cosine + LEXICAL_WEIGHT * coverage
+
+        # 对照：每个组合单独取角色文本和单据文本的倒排表、计算得分并取前k个
+        def per_pair(role, doc_type):
+            scores = combined([role_texts[role], doc_texts[doc_type]])
+            return top_pairs(scores[:1], scores[1:], k)
+
+        sample = [(rng.randrange(role_count), rng.randrange(doc_type_count)) for _ in range(loop_sample)]
+        start = time.perf_counter()
+        for role, doc_type in sample:
+            per_pair(role, doc_type)
+        per_pair_ms = (time.perf_counter() - start) * 1000 / loop_sample
+
+        print(f"条款数: {size}，逐个组合 {per_pair_ms:.1f} ms/组合（抽样 {loop_sample} 个）")
+        print(f"{'角色×单据':<12} {'组合数':>7} {'逐个组合(s，外推)':>18} {'一次计算(s)':>12} "
+              f"{'每组合(ms)':>11} {'加速':>7}")
+        for roles, doc_types in shapes:
+            start = time.perf_counter()
+            scores = combined(role_texts[:roles] + doc_texts[:doc_types])
+            top_pairs(scores[:roles], scores[roles:], k)
+            seconds = time.perf_counter() - start
+            pairs = roles * doc_types
+            loop_seconds = per_pair_ms * pairs / 1000
+            print(f"{f'{roles}×{doc_types}':<12} {pairs:>7} {loop_seconds:>18.1f} {seconds:>12.2f} "
+                  f"{seconds * 1000 / pairs:>11.2f} {loop_seconds / seconds:>6.0f}x")
+
+        # 抽样组合的结果一致
+        scores = combined(role_texts + doc_texts)
+        role_rows, doc_rows, columns, _ = top_pairs(scores[:role_count], scores[role_count:], k)
+        same = all(
+            np.array_equal(per_pair(role, doc_type)[2],
+                           columns[(role_rows == role) & (doc_rows == doc_type)])
+            for role, doc_type in sample[:5]
+        )
+        print(f"抽样组合结果一致: {same}")
+
+        # 完整任务（含更新索引检查和写库），使用最大的组合数
+        session.add_all([AuditorRole(role_name=f'角色{i}', responsibilities=text)
+                         for i, text in enumerate(role_texts)])
+        session.add_all([DocumentType(type_name=f'单据{i}', description=text)
+                         for i, text in enumerate(doc_texts)])
+        session.commit()
+        stats = suggest_rules(session, k=k, directory=directory)
+        session.commit()
+        print(f"完整任务: {stats['pairs']} 个组合，计算 {stats['score_seconds']:.2f} s，"
+              f"总计 {stats['seconds']:.2f} s，写入 {stats['rules_inserted']} 条自动规则")
+    finally:
+        session.close()
+
+
+def bench_check(page_count=300, corpus_size=20000, clause_count=200, chunk_sizes=(1, 32, 256),
+                loop_sample=20):
+    """单据检查：300页PDF与匹配条款逐段比对，逐对计算 vs 按批计算，首个结果的等待时间"""
+    from checker import ClauseScorer, check_document, iter_document_units, split_passages
+    from semantic import SemanticIndex, build_semantic_index, extract_features, tfidf_weights
+
+    print("=== 单据检查: 逐段落逐条款 vs 分批打分 ===")
+    reset_database()
+    rng = random.Random(42)
+    session = SessionLocal()
+    try:
+        sentences = load_sentences()
+        grow_corpus(session, corpus_size, sentences, rng)
+        directory = os.path.join(BENCH_DIR, 'semantic_index')
+        build_semantic_index(session, directory, 'exact')
+        idf = SemanticIndex(directory).idf
+        rows = session.query(Clause.id, Clause.content).all()
+        clauses = [{'clause_id': clause_id, 'content': content} for clause_id, content in rng.sample(rows, clause_count)]
+    finally:
+        session.close()
+
+    pdf_path = os.path.join(BENCH_DIR, f'bid_{page_count}.pdf')
+    write_synthetic_pdf(pdf_path, generate_pdf_pages(page_count, sentences, random.Random(7)))
+    parser = DocumentParser()
+    start = time.perf_counter()
+    passages = [passage['text'] for passage in split_passages(iter_document_units(parser, pdf_path))]
+    parse_seconds = time.perf_counter() - start
+    print(f"合成PDF: {page_count} 页，{len(passages)} 个段落，{clause_count} 个匹配条款；"
+          f"文本提取和切分 {parse_seconds:.2f} s")
+
+    # 对照：逐个段落、逐个条款用字典计算点积
+    def vectors(texts):
+        documents, features, counts = extract_features(texts)
+        weights = tfidf_weights(documents, features, counts, idf, len(texts))
+        result = [{} for _ in texts]
+        for document, feature, weight in zip(documents.tolist(), features.tolist(), weights.tolist()):
+            result[document][feature] = weight
+        return result
+
+    clause_vectors = vectors([clause['content'] for clause in clauses])
+    start = time.perf_counter()
+    for passage in passages[:loop_sample]:
+        passage_vector = vectors([passage])[0]
+        for clause_vector in clause_vectors:
+            sum(weight * clause_vector.get(feature, 0.0) for feature, weight in passage_vector.items())
+    loop_seconds = (time.perf_counter() - start) / loop_sample * len(passages)
+
+    print(f"{'方式':<22} {'打分耗时(s)':>11} {'每段落(ms)':>11}")
+    print(f"{'逐段落逐条款（外推）':<22} {loop_seconds:>11.2f} {loop_seconds * 1000 / len(passages):>11.3f}")
+    scorer = ClauseScorer([clause['content'] for clause in clauses], idf)
+    for chunk_size in chunk_sizes:
+        start = time.perf_counter()
+        for offset in range(0, len(passages), chunk_size):
+            scorer.score(passages[offset:offset + chunk_size])
+        seconds = time.perf_counter() - start
+        print(f"{f'每批{chunk_size}个段落':<22} {seconds:>11.2f} {seconds * 1000 / len(passages):>11.3f}")
+
+    # 完整流程：边提取文本边打分
+    start = time.perf_counter()
+    first_event = None
+    for event in check_document(pdf_path, clauses, idf, parser=DocumentParser()):
+        if first_event is None:
+            first_event = time.perf_counter() - start
+        if event['event'] == 'done':
+            done = event
+    print(f"完整检查: 总计 {done['seconds']:.2f} s（解析 {done['parse_seconds']:.2f} s，"
+          f"打分 {done['score_seconds']:.2f} s），首个结果 {first_event:.2f} s，"
+          f"有相关段落的条款 {sum(1 for result in done['results'] if result['passages'])} 个")
+
+
+BENCHMARKS = {
+    'search': bench_search,
+    'boolean': bench_boolean,
+    'regulations': bench_regulations,
+    'indexes': bench_indexes,
+    'ingest': bench_ingest,
+    'parse': bench_parse,
+    'segment': bench_segment,
+    'clauses': bench_clauses,
+    'pdf': bench_pdf,
+    'pdfpages': bench_pdf_pages,
+    'parsecache': bench_parse_cache,
+    'linker': bench_linker,
+    'semantic': bench_semantic,
+    'ann': bench_ann,
+    'suggest': bench_suggest,
+    'check': bench_check,
+}
+
+
+def main():
+    """主函数"""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"未知的基准测试: {', '.join(unknown)}")
+        print(f"可选: {', '.join(BENCHMARKS)}")
+        sys.exit(1)
+
+    try:
+        for name in names:
+            BENCHMARKS[name]()
+            print()
+    finally:
+        engine.dispose()
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+结果缓存
+
+- TTLCache: 进程内带容量上限和过期时间的LRU缓存，用于缓存只在规则变更时
+  才会变化的查询结果（如 /api/match）。
+- ParseCache: 磁盘上的文档解析结果缓存，按文件内容的SHA-256和解析器版本
+  索引，多个解析进程共享，按总大小做LRU淘汰。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from segmenter import ClauseRecord
+
+# 计算文件哈希时每次读取的字节数
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+# 解析缓存中层级结构节点的字段顺序
+NODE_FIELDS = ('level', 'ordinal', 'label', 'title', 'content', 'parent')
+
+
+class TTLCache:
+    """带过期时间的LRU缓存（线程安全）"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最多缓存的条目数，超出后淘汰最久未使用的条目
+            ttl: 条目有效期（秒），小于等于0表示永不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 每次clear()递增，用于丢弃在失效前就开始计算的结果
+        self.generation = 0
+
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        读取缓存
+
+        Returns:
+            缓存的值，未命中或已过期时返回None
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            generation: 开始计算value时读取的generation；期间缓存被清空过
+                则说明value可能已过时，不再写入
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存（数据变更时调用）"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含容量、命中率、淘汰次数等信息的字典
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+def file_digest(file_path: str) -> str:
+    """分块计算文件内容的SHA-256，不一次性读入内存"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(DIGEST_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    磁盘解析结果缓存
+
+    每个条目是一个gzip压缩的JSON文件，文件名由内容哈希和解析器版本组成，
+    解析器升级后旧条目不再命中，随后被淘汰。条款按 [编号, 内容]、
+    层级结构节点按字段值列表存储，不重复保存字段名。
+    命中时更新文件的修改时间，总大小超过上限时按修改时间从旧到新删除（LRU）。
+    写入先写临时文件再原子改名，多个进程同时读写同一目录是安全的。
+    """
+
+    SUFFIX = '.json.gz'
+
+    def __init__(self, directory: str, max_bytes: int, version: str):
+        """
+        初始化缓存
+
+        Args:
+            directory: 缓存目录
+            max_bytes: 缓存总大小上限（字节），小于等于0表示禁用缓存
+            version: 解析器版本，解析结果变化时应当递增
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.version = version
+
+        # 本进程内的统计计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, digest: str) -> Path:
+        """条目文件路径"""
+        return self.directory / f"{digest}-{self.version}{self.SUFFIX}"
+
+    def get(self, digest: str) -> Optional[Dict]:
+        """
+        读取解析结果
+
+        Args:
+            digest: 文件内容的SHA-256
+
+        Returns:
+            {'clauses': 条款列表, 'page_stats': 逐页耗时汇总, 'nodes': 层级结构节点}，
+            未命中时返回None
+        """
+        if self.max_bytes <= 0:
+            return None
+
+        path = self._path(digest)
+        try:
+            with gzip.open(path, 'rb') as f:
+                entry = json.loads(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError):
+            # 损坏的条目当作未命中并删除
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            'clauses': [ClauseRecord(number, content) for number, content in entry['clauses']],
+            'page_stats': entry.get('page_stats'),
+            'nodes': [dict(zip(NODE_FIELDS, values)) for values in entry.get('nodes', [])]
+        }
+
+    def put(self, digest: str, clauses: List[Dict], page_stats: Optional[Dict] = None,
+            nodes: Optional[List[Dict]] = None):
+        """
+        写入解析结果，超出容量时淘汰最久未使用的条目
+
+        Args:
+            digest: 文件内容的SHA-256
+            clauses: 条款列表
+            page_stats: PDF逐页耗时汇总
+            nodes: 层级结构节点
+        """
+        if self.max_bytes <= 0:
+            return
+
+        entry = {
+            'clauses': [[clause['clause_number'], clause['content']] for clause in clauses],
+            'page_stats': page_stats,
+            'nodes': [[node[field] for field in NODE_FIELDS] for node in nodes or []]
+        }
+        data = gzip.compress(
+            json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+            compresslevel=6
+        )
+        if len(data) > self.max_bytes:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.directory / f".tmp-{uuid.uuid4().hex}"
+        temp_path.write_bytes(data)
+        os.replace(temp_path, self._path(digest))
+        self.evict()
+
+    def _entries(self) -> List[Tuple[str, os.stat_result]]:
+        """缓存条目的 (路径, 文件状态) 列表"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for item in iterator:
+                    if not item.name.endswith(self.SUFFIX):
+                        continue
+                    try:
+                        entries.append((item.path, item.stat()))
+                    except FileNotFoundError:
+                        pass
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def evict(self):
+        """删除最久未使用的条目，直到总大小不超过上限"""
+        entries = self._entries()
+        total = sum(stat.st_size for _, stat in entries)
+        if total <= self.max_bytes:
+            return
+
+        for path, stat in sorted(entries, key=lambda entry: entry[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+
+    def stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            条目数、总大小、上限和本进程的命中统计
+        """
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(entries),
+            'bytes': sum(stat.st_size for _, stat in entries),
+            'max_bytes': self.max_bytes,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,259 @@
+"""
+单据合规检查
+
+把上传的业务单据（标书、合同等PDF/Word文档）与 /api/match 匹配到的条款
+逐段比对，找出单据中与每个条款相关的段落。
+
+- 文本提取沿用DocumentParser，PDF逐页、Word逐段流式读取，不等整篇文档解析完；
+- 每页（Word为连续段落）按句末标点切成不超过PASSAGE_CHARS个字符的段落；
+- 段落攒够CHECK_CHUNK_PASSAGES个为一批，与全部匹配条款一次计算相似度:
+  字符n-gram TF-IDF向量的余弦相似度（与语义检索相同的向量表示）和
+  条款n-gram按IDF加权在段落中出现的比例（词面覆盖率），两者加权求和；
+- 每批算完立即产出该批中得分达到CHECK_MIN_SCORE的段落，调用方边解析边输出。
+
+条款向量只计算一次，每批段落的特征在条款特征的有序数组上二分查找，
+一次bincount得到 (段落数, 条款数) 得分矩阵，不逐个段落、逐个条款比较。
+"""
+
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from document_parser import DocumentParser
+from segmenter import normalize_clause
+from semantic import FEATURE_SPACE, extract_features, tfidf_weights
+from vector_index import expand_ranges
+
+# 段落的最大字符数
+PASSAGE_CHARS = int(os.getenv('CHECK_PASSAGE_CHARS', '200'))
+
+# 每批计算得分的段落数
+CHECK_CHUNK_PASSAGES = int(os.getenv('CHECK_CHUNK_PASSAGES', '256'))
+
+# 每个条款最终返回的段落数
+CHECK_TOP_PASSAGES = int(os.getenv('CHECK_TOP_PASSAGES', '3'))
+
+# 得分低于该值的段落不返回
+CHECK_MIN_SCORE = float(os.getenv('CHECK_MIN_SCORE', '0.15'))
+
+# 词面覆盖率的权重（向量余弦相似度的权重为 1 - 该值）
+CHECK_LEXICAL_WEIGHT = float(os.getenv('CHECK_LEXICAL_WEIGHT', '0.5'))
+
+# 句末标点，段落在其后切开
+SENTENCE_END_PATTERN = re.compile(r'(?<=[。；！？!?;])')
+
+
+def iter_document_units(parser: DocumentParser, file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """
+    流式读取单据文本
+
+    Args:
+        parser: 文档解析器
+        file_path: 文件路径
+
+    Returns:
+        (页码, 文本) 的迭代器；PDF每页一项（页内换行是排版折行，直接拼接），
+        Word每个段落一项，页码为None
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext == '.pdf':
+        for number, text in enumerate(parser.iter_pdf_pages(file_path), start=1):
+            yield number, ''.join(line.strip() for line in text.splitlines())
+    elif file_ext in ['.doc', '.docx']:
+        for text in parser.iter_word_paragraphs(file_path):
+            yield None, text
+    else:
+        raise ValueError(f"不支持的文件格式: {file_ext}")
+
+
+def split_passages(units: Iterable[Tuple[Optional[int], str]],
+                   max_chars: int = PASSAGE_CHARS) -> Iterator[Dict]:
+    """
+    把文本切成段落
+
+    句子（以句末标点或Word段落结尾）依次合并，直到再加一句会超过max_chars；
+    超长的句子按max_chars截断。段落不跨页。
+
+    Args:
+        units: (页码, 文本) 序列
+        max_chars: 段落的最大字符数
+
+    Returns:
+        段落字典的迭代器，包含序号index、页码page和文本text
+    """
+    index = 0
+    current = ''
+    current_page = None
+
+    for page, text in units:
+        if page != current_page and current:
+            yield {'index': index, 'page': current_page, 'text': current}
+            index += 1
+            current = ''
+        current_page = page
+
+        for sentence in SENTENCE_END_PATTERN.split(normalize_clause(text)):
+            sentence = sentence.strip()
+            while sentence:
+                if current and len(current) + len(sentence) > max_chars:
+                    yield {'index': index, 'page': current_page, 'text': current}
+                    index += 1
+                    current = ''
+                piece = sentence[:max_chars - len(current)]
+                current += piece
+                sentence = sentence[len(piece):]
+
+    if current:
+        yield {'index': index, 'page': current_page, 'text': current}
+
+
+class ClauseScorer:
+    """
+    一组条款的段落打分器
+
+    条款的 (特征, 条款下标, TF-IDF权重, 覆盖率权重) 按特征编号排序保存，
+    段落特征在其中二分查找出各自的区间。
+    """
+
+    def __init__(self, clause_texts: Sequence[str], idf: Optional[np.ndarray] = None,
+                 lexical_weight: float = CHECK_LEXICAL_WEIGHT):
+        """
+        计算条款向量
+
+        Args:
+            clause_texts: 条款内容
+            idf: 各特征的逆文档频率（通常取自语义索引），为None时不加权
+            lexical_weight: 词面覆盖率的权重
+        """
+        self.clause_count = len(clause_texts)
+        self.idf = idf if idf is not None else np.ones(FEATURE_SPACE, dtype=np.float32)
+        self.lexical_weight = lexical_weight
+
+        documents, features, counts = extract_features(clause_texts)
+        weights = tfidf_weights(documents, features, counts, self.idf, self.clause_count)
+        feature_idf = self.idf[features].astype(np.float64)
+        idf_sums = np.bincount(documents, weights=feature_idf, minlength=self.clause_count)
+        coverage = feature_idf / np.where(idf_sums > 0, idf_sums, 1.0)[documents]
+
+        order = np.argsort(features, kind='stable')
+        self.features = features[order]
+        self.clauses = documents[order]
+        self.weights = weights[order].astype(np.float64)
+        self.coverage = coverage[order]
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        计算一批段落与全部条款的得分
+
+        Args:
+            texts: 段落文本
+
+        Returns:
+            (段落数, 条款数) 得分矩阵，(1 - w) × 余弦相似度 + w × 覆盖率
+        """
+        passages, features, counts = extract_features(texts)
+        weights = tfidf_weights(passages, features, counts, self.idf, len(texts))
+
+        starts = np.searchsorted(self.features, features, side='left')
+        lengths = np.searchsorted(self.features, features, side='right') - starts
+        positions = expand_ranges(starts, lengths)
+        cells = np.repeat(passages, lengths) * self.clause_count + self.clauses[positions]
+        size = len(texts) * self.clause_count
+
+        cosine = np.bincount(cells, weights=self.weights[positions] * np.repeat(weights, lengths),
+                             minlength=size)
+        coverage = np.bincount(cells, weights=self.coverage[positions], minlength=size)
+        scores = (1.0 - self.lexical_weight) * cosine + self.lexical_weight * coverage
+        return scores.reshape(len(texts), self.clause_count)
+
+
+def check_document(
+    file_path: str,
+    clauses: List[Dict],
+    idf: Optional[np.ndarray] = None,
+    top: int = CHECK_TOP_PASSAGES,
+    min_score: float = CHECK_MIN_SCORE,
+    chunk_passages: int = CHECK_CHUNK_PASSAGES,
+    parser: Optional[DocumentParser] = None
+) -> Iterator[Dict]:
+    """
+    逐批检查单据，产出检查过程中的事件
+
+    事件依次为:
+    - {'event': 'match', 'clause_id', 'passages'}: 一批段落中与该条款相关的段落
+      （该批内得分最高的top个，且不低于min_score），每批可能产出多个；
+    - {'event': 'progress', 'pages', 'passages'}: 每批处理完后的进度；
+    - {'event': 'done', ...}: 页数、段落数、解析和打分耗时，以及每个条款
+      在整篇单据中得分最高的top个段落。
+
+    Args:
+        file_path: 单据文件路径（.pdf / .doc / .docx）
+        clauses: 匹配到的条款（含clause_id、content，其余字段原样带回结果）
+        idf: 逆文档频率，为None时不加权
+        top: 每个条款返回的段落数
+        min_score: 段落得分下限
+        chunk_passages: 每批计算得分的段落数
+        parser: 文档解析器
+
+    Returns:
+        事件字典的迭代器
+    """
+    start = time.perf_counter()
+    parser = parser or DocumentParser()
+    scorer = ClauseScorer([clause['content'] for clause in clauses], idf)
+    best: List[List[Dict]] = [[] for _ in clauses]
+    page_count = 0
+    passage_count = 0
+    score_seconds = 0.0
+
+    def score_chunk(chunk: List[Dict]) -> Iterator[Dict]:
+        nonlocal score_seconds
+        score_start = time.perf_counter()
+        scores = scorer.score([passage['text'] for passage in chunk])
+        events = []
+        if len(chunk) and len(clauses):
+            k = min(top, len(chunk))
+            candidates = np.argpartition(-scores, k - 1, axis=0)[:k]
+            for column in np.flatnonzero((scores >= min_score).any(axis=0)):
+                rows = candidates[:, column]
+                rows = rows[np.argsort(-scores[rows, column], kind='stable')]
+                hits = [
+                    dict(chunk[row], score=round(float(scores[row, column]), 4))
+                    for row in rows if scores[row, column] >= min_score
+                ]
+                best[column] = sorted(best[column] + hits, key=lambda hit: (-hit['score'], hit['index']))[:top]
+                events.append({'event': 'match', 'clause_id': clauses[column]['clause_id'], 'passages': hits})
+        score_seconds += time.perf_counter() - score_start
+        yield from events
+        yield {'event': 'progress', 'pages': page_count, 'passages': passage_count}
+
+    def counted_units():
+        nonlocal page_count
+        for page, text in iter_document_units(parser, file_path):
+            if page is not None:
+                page_count = page
+            yield page, text
+
+    chunk = []
+    for passage in split_passages(counted_units()):
+        chunk.append(passage)
+        passage_count += 1
+        if len(chunk) >= chunk_passages:
+            yield from score_chunk(chunk)
+            chunk = []
+    if chunk or not passage_count:
+        yield from score_chunk(chunk)
+
+    seconds = time.perf_counter() - start
+    yield {
+        'event': 'done',
+        'pages': page_count,
+        'passages': passage_count,
+        'parse_seconds': round(seconds - score_seconds, 3),
+        'score_seconds': round(score_seconds, 3),
+        'seconds': round(seconds, 3),
+        'results': [dict(clause, passages=passages) for clause, passages in zip(clauses, best)]
+    }
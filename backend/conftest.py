@@ -0,0 +1,85 @@
+"""
+测试公共夹具
+
+提供内存数据库（已注册全文索引的分词函数）、会话工厂和会话，
+按条款内容导入测试法规的辅助函数，以及使用该数据库的API测试客户端。
+测试模块可以在此基础上覆盖engine或session夹具，写入各自需要的数据。
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import app
+from database import Base, get_db
+from ingest import sync_regulations
+from matcher import match_cache
+from search_index import register_functions
+
+
+def make_clauses(contents):
+    """由条款内容生成条款列表，条款编号取内容中第一个空格之前的部分"""
+    return [{'clause_number': content.split(' ')[0], 'content': content} for content in contents]
+
+
+@pytest.fixture
+def engine():
+    """内存数据库，所有连接共用同一个SQLite连接（可跨线程使用）"""
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda connection, _: register_functions(connection))
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """绑定到内存数据库的会话工厂"""
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def session(session_factory):
+    """内存数据库会话"""
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def add_regulation(session):
+    """
+    导入测试法规的函数
+
+    add_regulation(title, contents, source_file='test.md')经由sync_regulations
+    写入一部法规并提交，contents为以条款编号开头的条款内容。
+    """
+    def add(title, contents, source_file='test.md'):
+        sync_regulations(session, [(title, source_file, make_clauses(contents))])
+        session.commit()
+    return add
+
+
+@pytest.fixture
+def client(session_factory):
+    """
+    使用测试数据库的API客户端
+
+    不进入TestClient的上下文，启动事件不会执行，因此不迁移真实数据库、
+    不启动内嵌导入工作进程。匹配结果缓存是进程内全局的，前后各清空一次。
+    """
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    match_cache.clear()
+    app.dependency_overrides[get_db] = get_test_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    match_cache.clear()
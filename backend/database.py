@@ -9,11 +9,16 @@
 - AuditRule: 审核规则（角色-单据-条款的关联）
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, Integer, Float, Boolean, String, Text, ForeignKey, Index
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
 
+from search_index import register_functions, ensure_search_index
+
 # 数据库文件路径
 # 生产环境使用环境变量指定的路径，开发环境使用本地路径
 db_path = os.getenv('DATABASE_PATH', './data/compliance.db')
@@ -24,16 +29,83 @@ db_dir = os.path.dirname(db_path) if '/' in db_path else './data'
 if db_dir and db_dir != '/data':  # /data通常是Railway的volume mount point
     os.makedirs(db_dir, exist_ok=True)
 
+# SQLite连接参数，均可通过环境变量调整
+# - WAL模式下读写互不阻塞，上传法规写库时其他请求仍可读取
+# - synchronous=NORMAL在WAL模式下是安全的，且显著减少fsync
+# - cache_size为负数时单位是KiB
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+}
+
+# 连接池配置（每个uvicorn worker进程各自维护一个连接池）
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+
 # 创建数据库引擎
 engine = create_engine(
     DATABASE_URL, 
     connect_args={"check_same_thread": False},  # SQLite特定配置
+    poolclass=QueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
     echo=False  # 设置为True可以看到SQL语句
 )
 
+
+def apply_pragmas(dbapi_connection):
+    """在新建的SQLite连接上设置PRAGMA参数"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    """新建连接时设置PRAGMA，并注册全文索引触发器所需的分词函数"""
+    apply_pragmas(dbapi_connection)
+    register_functions(dbapi_connection)
+
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步数据库访问（DB_ASYNC=1时启用，需要安装aiosqlite）
+# 启用后 /api/match 和 /api/search 使用async路由，数据库IO不再占用线程池
+USE_ASYNC_DB = os.getenv('DB_ASYNC', '0').lower() in ('1', 'true', 'yes')
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{db_path}"
+
+async_engine = None
+AsyncSessionLocal = None
+
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_pre_ping=True,
+        echo=False
+    )
+    event.listen(async_engine.sync_engine, "connect", _on_connect)
+    
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 # 声明基类
 Base = declarative_base()
 
@@ -41,13 +113,22 @@ Base = declarative_base()
 class Regulation(Base):
     """法规文档表"""
     __tablename__ = 'regulations'
+    __table_args__ = (
+        # 按内容哈希识别重复上传的文档
+        Index('ix_regulations_content_hash', 'content_hash'),
+        # 法规按标题区分，多个导入工作进程并发写入同名法规时由唯一索引拒绝后写入的一个
+        Index('uq_regulations_title', 'title', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(500), nullable=False, comment="法规标题")
     source_file = Column(String(255), comment="源文件路径")
+    content_hash = Column(String(64), comment="全部条款的内容哈希，用于增量导入时判断法规是否变化")
+    structure_hash = Column(String(64), comment="层级结构的哈希，用于增量导入时判断是否需要重建结构节点")
     
     # 关联关系
     clauses = relationship('Clause', back_populates='regulation', cascade="all, delete-orphan")
+    nodes = relationship('RegulationNode', back_populates='regulation', cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Regulation(id={self.id}, title='{self.title}')>"
@@ -58,9 +139,10 @@ class Clause(Base):
     __tablename__ = 'clauses'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    regulation_id = Column(Integer, ForeignKey('regulations.id'), nullable=False, comment="所属法规ID")
+    regulation_id = Column(Integer, ForeignKey('regulations.id'), nullable=False, index=True, comment="所属法规ID")
     clause_number = Column(String(50), comment="条款编号，如：第二十八条")
     content = Column(Text, nullable=False, comment="条款内容")
+    content_hash = Column(String(64), comment="条款编号和内容的哈希，用于增量导入时判断条款是否变化")
     
     # 关联关系
     regulation = relationship('Regulation', back_populates='clauses')
@@ -107,11 +189,17 @@ class AuditRule(Base):
     定义了审核角色-单据类型-法规条款之间的关联关系
     """
     __tablename__ = 'audit_rules'
+    __table_args__ = (
+        # 匹配查询按角色+单据类型过滤并按优先级排序，复合索引同时覆盖只按角色过滤的查询
+        Index('ix_audit_rules_role_doctype_priority', 'role_id', 'document_type_id', 'priority'),
+        # 同一角色、单据类型和条款只有一条规则，批量关联时用ON CONFLICT DO NOTHING去重
+        Index('uq_audit_rules_role_doctype_clause', 'role_id', 'document_type_id', 'clause_id', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     role_id = Column(Integer, ForeignKey('auditor_roles.id'), nullable=False, comment="审核角色ID")
-    document_type_id = Column(Integer, ForeignKey('document_types.id'), nullable=False, comment="单据类型ID")
-    clause_id = Column(Integer, ForeignKey('clauses.id'), nullable=False, comment="条款ID")
+    document_type_id = Column(Integer, ForeignKey('document_types.id'), nullable=False, index=True, comment="单据类型ID")
+    clause_id = Column(Integer, ForeignKey('clauses.id'), nullable=False, index=True, comment="条款ID")
     source = Column(String(50), default='example', comment="规则来源: example/manual/auto")
     priority = Column(Integer, default=0, comment="优先级，数字越大优先级越高")
     
@@ -124,6 +212,98 @@ class AuditRule(Base):
         return f"<AuditRule(id={self.id}, role_id={self.role_id}, document_type_id={self.document_type_id})>"
 
 
+class RegulationNode(Base):
+    """
+    法规结构节点表
+    
+    保存编/章/节/条/款/项的层级结构: 每个节点指向父节点，ordinal是由
+    中文数字转换的序号（第四章为4，（二）为2），按 (法规, 层级, 序号)
+    和 (父节点, 序号) 建索引，"第四章的所有条款""第三条第（二）项"
+    等查询走索引，不必在条款内容中做子串匹配。
+    """
+    __tablename__ = 'regulation_nodes'
+    __table_args__ = (
+        Index('ix_regulation_nodes_lookup', 'regulation_id', 'level', 'ordinal'),
+        Index('ix_regulation_nodes_parent', 'parent_id', 'ordinal'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    regulation_id = Column(Integer, ForeignKey('regulations.id'), nullable=False, comment="所属法规ID")
+    parent_id = Column(Integer, ForeignKey('regulation_nodes.id'), comment="父节点ID，顶层节点为空")
+    level = Column(String(20), nullable=False, comment="层级: part/chapter/section/article/paragraph/item")
+    ordinal = Column(Integer, nullable=False, comment="同一父节点下的序号（由中文数字转换）")
+    position = Column(Integer, nullable=False, comment="在法规中的先后顺序")
+    label = Column(String(50), nullable=False, comment="编号，如：第四章、第三条、第二款、（二）")
+    title = Column(String(500), comment="编、章、节的标题")
+    content = Column(Text, comment="款、项的内容（条的内容见clauses表）")
+    clause_id = Column(Integer, ForeignKey('clauses.id'), index=True, comment="对应的条款ID（条及其下的款、项）")
+    
+    # 关联关系
+    regulation = relationship('Regulation', back_populates='nodes')
+    
+    def __repr__(self):
+        return f"<RegulationNode(id={self.id}, level='{self.level}', label='{self.label}')>"
+
+
+class IngestJob(Base):
+    """
+    文档导入任务表
+    
+    一个任务包含一批上传文件，任务状态和进度由各文件的状态汇总得出
+    """
+    __tablename__ = 'ingest_jobs'
+    
+    id = Column(String(32), primary_key=True, comment="任务ID")
+    created_at = Column(Float, nullable=False, comment="创建时间（Unix时间戳）")
+    
+    # 关联关系
+    files = relationship('IngestJobFile', back_populates='job', cascade="all, delete-orphan",
+                         order_by='IngestJobFile.id')
+    
+    def __repr__(self):
+        return f"<IngestJob(id='{self.id}')>"
+
+
+class IngestJobFile(Base):
+    """
+    导入任务中的单个文件
+    
+    工作进程按id顺序领取status为queued的文件；处理中的文件带有租约，
+    工作进程异常退出后租约过期，文件会被重新领取。
+    """
+    __tablename__ = 'ingest_job_files'
+    __table_args__ = (
+        # 工作进程按状态领取待处理文件
+        Index('ix_ingest_job_files_status', 'status', 'id'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(32), ForeignKey('ingest_jobs.id'), nullable=False, index=True, comment="所属任务ID")
+    filename = Column(String(255), nullable=False, comment="原始文件名")
+    file_path = Column(String(1000), nullable=False, comment="已保存的上传文件路径")
+    status = Column(String(20), nullable=False, default='queued', comment="状态: queued/parsing/importing/succeeded/failed/duplicate")
+    file_hash = Column(String(64), comment="文件内容的SHA-256，用于查找解析缓存和识别重复上传")
+    attempts = Column(Integer, nullable=False, default=0, comment="已领取次数")
+    worker_id = Column(String(100), comment="处理该文件的工作进程")
+    lease_expires_at = Column(Float, comment="租约到期时间，过期未完成视为工作进程已退出")
+    started_at = Column(Float, comment="开始处理时间")
+    finished_at = Column(Float, comment="处理结束时间")
+    parse_seconds = Column(Float, comment="解析耗时（秒）")
+    parse_cached = Column(Boolean, comment="解析结果是否来自解析缓存")
+    import_seconds = Column(Float, comment="写库耗时（秒）")
+    page_stats = Column(Text, comment="PDF逐页提取耗时汇总（JSON），用于定位异常耗时的页面")
+    regulation_id = Column(Integer, comment="导入生成的法规ID（重复上传时为已有法规的ID）")
+    regulation_title = Column(String(500), comment="导入的法规标题")
+    clause_count = Column(Integer, comment="导入的条款数")
+    error = Column(Text, comment="失败原因")
+    
+    # 关联关系
+    job = relationship('IngestJob', back_populates='files')
+    
+    def __repr__(self):
+        return f"<IngestJobFile(id={self.id}, filename='{self.filename}', status='{self.status}')>"
+
+
 def init_database():
     """初始化数据库，创建所有表"""
     import os
@@ -134,6 +314,79 @@ def init_database():
     # 创建所有表
     Base.metadata.create_all(bind=engine)
     print("数据库表创建成功!")
+    
+    # 为已有数据库补建索引
+    migrate_database()
+
+
+def migrate_database():
+    """
+    轻量级数据库迁移
+    
+    create_all只会创建缺失的表，不会给已有的表补建列和索引。这里对每张表
+    补建缺失的列（只支持可为空的列）和索引，再确保条款全文索引存在。
+    可以重复执行，对早期版本创建的compliance.db同样适用。
+    """
+    Base.metadata.create_all(bind=engine)
+    
+    add_missing_columns()
+    remove_duplicate_audit_rules()
+    rename_duplicate_regulations()
+    
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    # 创建条款全文索引
+    ensure_search_index(engine)
+
+
+def add_missing_columns():
+    """为已有的表补建模型中新增的列（ALTER TABLE ADD COLUMN）"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                ))
+                print(f"已补建列: {table.name}.{column.name}")
+
+
+def remove_duplicate_audit_rules():
+    """建唯一索引前删除重复的审核规则（同一角色、单据类型和条款保留最早的一条）"""
+    existing = {index['name'] for index in inspect(engine).get_indexes('audit_rules')}
+    if 'uq_audit_rules_role_doctype_clause' in existing:
+        return
+    with engine.begin() as connection:
+        removed = connection.execute(text(
+            'DELETE FROM audit_rules WHERE id NOT IN '
+            '(SELECT MIN(id) FROM audit_rules GROUP BY role_id, document_type_id, clause_id)'
+        )).rowcount
+    if removed:
+        print(f"已删除重复的审核规则: {removed} 条")
+
+
+def rename_duplicate_regulations():
+    """
+    建唯一索引前给同名法规改名（保留最早的一部，其余在标题后加上法规ID）
+
+    只改标题，不删除条款和关联的审核规则。
+    """
+    existing = {index['name'] for index in inspect(engine).get_indexes('regulations')}
+    if 'uq_regulations_title' in existing:
+        return
+    with engine.begin() as connection:
+        renamed = connection.execute(text(
+            "UPDATE regulations SET title = title || '（' || id || '）' WHERE id NOT IN "
+            "(SELECT MIN(id) FROM regulations GROUP BY title)"
+        )).rowcount
+    if renamed:
+        print(f"已给同名法规改名: {renamed} 部")
 
 
 def get_db():
@@ -149,6 +402,16 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    获取异步数据库会话的依赖函数
+    
+    仅在DB_ASYNC=1时可用
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 if __name__ == "__main__":
     # 直接运行此文件可以初始化数据库
     init_database()
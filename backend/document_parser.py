@@ -6,24 +6,232 @@
 
 import re
 import os
-from typing import List, Dict, Tuple
-from PyPDF2 import PdfReader
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Iterator
+from PyPDF2 import PdfReader, PageObject
+from PyPDF2.generic import ArrayObject, IndirectObject
 from docx import Document
 
+from segmenter import stream_clauses
+from hierarchy import HierarchyBuilder
+
+
+# 并行提取时每个任务处理的页数
+PAGES_PER_TASK = 16
+
+# 文件名中的扩展名
+TITLE_SUFFIX_PATTERN = re.compile(r'\.(pdf|docx?)$', re.IGNORECASE)
+
+# 解析器版本，文本提取、条款切分或层级结构规则变化时递增，使解析结果缓存失效
+PARSER_VERSION = '2'
+
+
+def _content_stream_keys(page: PageObject) -> List[Tuple[int, int]]:
+    """
+    页面内容流（/Contents）在PdfReader对象缓存中的键
+    
+    Returns:
+        (generation, idnum) 列表；内容流直接写在页面字典中时为空
+    """
+    keys = []
+    contents = page.raw_get('/Contents') if '/Contents' in page else None
+    if isinstance(contents, IndirectObject):
+        keys.append((contents.generation, contents.idnum))
+        contents = contents.get_object()
+    if isinstance(contents, ArrayObject):
+        keys.extend((item.generation, item.idnum) for item in contents if isinstance(item, IndirectObject))
+    return keys
+
+
+def _extract_pages(reader: PdfReader, start: int, end: int) -> Iterator[Tuple[str, float]]:
+    """
+    逐页提取reader中 [start, end) 范围的文本并计时
+    
+    PdfReader会缓存解析过的对象，其中每页解压后的内容流只用一次，
+    提取完即从缓存中移除，缓存占用的内存不随页数增长；字体、ToUnicode
+    映射表等页面间共用的资源保留在缓存中，不必每页重新解析。
+    
+    Returns:
+        (页面文本, 提取耗时秒数) 的迭代器
+    """
+    cache = getattr(reader, 'resolved_objects', None)
+    
+    for index in range(start, end):
+        begin = time.perf_counter()
+        page = reader.pages[index]
+        text = page.extract_text() or ''
+        if cache is not None:
+            for key in _content_stream_keys(page):
+                cache.pop(key, None)
+        yield text, time.perf_counter() - begin
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[str, float]]:
+    """在子进程中提取一段页面的文本"""
+    with open(file_path, 'rb') as stream:
+        return list(_extract_pages(PdfReader(stream), start, end))
+
 
 class DocumentParser:
     """文档解析器，支持PDF和Word格式"""
     
-    def __init__(self):
-        """初始化解析器"""
-        # 条款编号的正则模式
-        self.clause_pattern = re.compile(
-            r'第[零一二三四五六七八九十百千]+条[\s\S]*?(?=第[零一二三四五六七八九十百千]+条|$)',
-            re.MULTILINE
-        )
+    def __init__(self, page_workers: int = 1, pages_per_task: int = PAGES_PER_TASK):
+        """
+        初始化解析器
+        
+        Args:
+            page_workers: 提取PDF文本的进程数，1表示在当前进程中逐页提取
+            pages_per_task: 并行提取时每个任务处理的页数
+        """
+        self.page_workers = max(1, page_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        
+        # 最近一次解析PDF时每页的提取耗时，用于定位异常耗时的页面
+        self.last_page_stats: List[Dict] = []
+        
+        # 最近一次解析的文档的编/章/节/条/款/项层级结构
+        self.last_hierarchy: List[Dict] = []
+    
+    def parse_title(self, file_path: str) -> str:
+        """
+        从文件名提取法规标题
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            去掉扩展名的文件名
+        """
+        filename = os.path.basename(file_path)
+        return TITLE_SUFFIX_PATTERN.sub('', filename)
+    
+    def iter_pdf_pages(self, file_path: str) -> Iterator[str]:
+        """
+        逐页提取PDF文本
+        
+        page_workers大于1时把页面按pages_per_task分段交给进程池提取，
+        按页码顺序合并结果。每页耗时记录在 self.last_page_stats 中。
+        
+        PDF以文件句柄打开并在迭代期间保持打开，PyPDF2按需从文件中读取
+        对象（传入路径时PyPDF2会把整个文件读入内存）。
+        
+        Args:
+            file_path: PDF文件路径
+            
+        Returns:
+            每页文本的迭代器（以换行结尾），按页码顺序
+        """
+        self.last_page_stats = []
+        with open(file_path, 'rb') as stream:
+            reader = PdfReader(stream)
+            page_count = len(reader.pages)
+            
+            if self.page_workers == 1 or page_count <= self.pages_per_task:
+                pages = _extract_pages(reader, 0, page_count)
+            else:
+                pages = self._extract_pages_parallel(file_path, page_count)
+            
+            for index, (text, seconds) in enumerate(pages):
+                self.last_page_stats.append({
+                    'page': index + 1,
+                    'seconds': seconds,
+                    'chars': len(text)
+                })
+                yield text + "\n"
+    
+    def _extract_pages_parallel(self, file_path: str, page_count: int) -> Iterator[Tuple[str, float]]:
+        """在进程池中按页码段提取文本，按顺序产出"""
+        ranges = [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+        workers = min(self.page_workers, len(ranges))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map按提交顺序返回结果，前面的页段完成后即可开始切分
+            for results in executor.map(
+                _extract_page_range,
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            ):
+                yield from results
+    
+    def page_stats_summary(self, top: int = 5) -> Dict:
+        """
+        汇总最近一次解析PDF的逐页耗时
+        
+        Args:
+            top: 返回耗时最长的页数
+            
+        Returns:
+            页数、总耗时和耗时最长的页面（按耗时降序）
+        """
+        return {
+            'page_count': len(self.last_page_stats),
+            'total_seconds': round(sum(stat['seconds'] for stat in self.last_page_stats), 3),
+            'slowest_pages': [
+                {'page': stat['page'], 'seconds': round(stat['seconds'], 3), 'chars': stat['chars']}
+                for stat in sorted(self.last_page_stats, key=lambda stat: stat['seconds'], reverse=True)[:top]
+            ]
+        }
+    
+    def _stream_clauses(self, chunks: Iterator[str]) -> Iterator[Dict]:
+        """从文本段中增量切分条款，同时提取层级结构"""
+        self.last_hierarchy = []
+        return stream_clauses(self._track_hierarchy(chunks))
+    
+    def _track_hierarchy(self, chunks: Iterator[str]) -> Iterator[str]:
+        """
+        原样传递文本段，同时提取层级结构
+        
+        文本只提取一遍，条款切分和层级结构提取共用；
+        全部文本处理完后结果保存在 self.last_hierarchy 中。
+        """
+        builder = HierarchyBuilder()
+        for chunk in chunks:
+            builder.feed(chunk)
+            yield chunk
+        self.last_hierarchy = builder.close()
+    
+    def iter_word_paragraphs(self, file_path: str) -> Iterator[str]:
+        """
+        逐段提取Word文档文本
         
-        # 用于提取条款编号
-        self.number_pattern = re.compile(r'第[零一二三四五六七八九十百千]+条')
+        Args:
+            file_path: Word文件路径
+            
+        Returns:
+            每个段落文本的迭代器（以换行结尾）
+        """
+        doc = Document(file_path)
+        for paragraph in doc.paragraphs:
+            yield paragraph.text + "\n"
+    
+    def iter_clauses(self, file_path: str) -> Iterator[Dict]:
+        """
+        流式解析文档，条款一结束就产出
+        
+        PDF逐页、Word逐段提取文本，同一遍中提取层级结构，迭代结束后
+        保存在 self.last_hierarchy 中。不保留整篇文本，PDF也不整体读入内存，
+        调用方逐条处理时，文本占用的内存与文档大小无关（PDF的交叉引用表和
+        页面间共用的资源仍常驻内存）。
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            条款的迭代器
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext == '.pdf':
+            chunks = self.iter_pdf_pages(file_path)
+        elif file_ext in ['.doc', '.docx']:
+            chunks = self.iter_word_paragraphs(file_path)
+        else:
+            raise ValueError(f"不支持的文件格式: {file_ext}")
+        return self._stream_clauses(chunks)
     
     def parse_pdf(self, file_path: str) -> Tuple[str, List[Dict]]:
         """
@@ -36,20 +244,11 @@ class DocumentParser:
             (文档标题, 条款列表)
         """
         try:
-            # 读取PDF
-            reader = PdfReader(file_path)
-            
-            # 提取文本内容
-            text_content = ""
-            for page in reader.pages:
-                text_content += page.extract_text() + "\n"
-            
             # 从文件名提取标题
-            filename = os.path.basename(file_path)
-            title = re.sub(r'\.pdf$', '', filename, flags=re.IGNORECASE)
+            title = self.parse_title(file_path)
             
-            # 提取条款
-            clauses = self._extract_clauses(text_content)
+            # 逐页提取文本并增量切分条款，不拼接整篇文本
+            clauses = list(self._stream_clauses(self.iter_pdf_pages(file_path)))
             
             return title, clauses
             
@@ -67,20 +266,11 @@ class DocumentParser:
             (文档标题, 条款列表)
         """
         try:
-            # 读取Word文档
-            doc = Document(file_path)
-            
-            # 提取文本内容
-            text_content = ""
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
-            
             # 从文件名提取标题
-            filename = os.path.basename(file_path)
-            title = re.sub(r'\.(docx?|DOCX?)$', '', filename)
+            title = self.parse_title(file_path)
             
-            # 提取条款
-            clauses = self._extract_clauses(text_content)
+            # 逐段提取文本并增量切分条款
+            clauses = list(self._stream_clauses(self.iter_word_paragraphs(file_path)))
             
             return title, clauses
             
@@ -105,42 +295,6 @@ class DocumentParser:
             return self.parse_word(file_path)
         else:
             raise ValueError(f"不支持的文件格式: {file_ext}")
-    
-    def _extract_clauses(self, content: str) -> List[Dict]:
-        """
-        从文档内容中提取所有条款
-        
-        Args:
-            content: 文档内容
-            
-        Returns:
-            条款列表，每个条款包含编号和内容
-        """
-        clauses = []
-        
-        # 使用正则表达式查找所有"第X条"
-        matches = self.clause_pattern.finditer(content)
-        
-        for match in matches:
-            clause_text = match.group(0).strip()
-            
-            # 提取条款编号
-            number_match = self.number_pattern.search(clause_text)
-            if number_match:
-                clause_number = number_match.group(0)
-                
-                # 清理条款内容（去除多余空白）
-                clause_content = clause_text.strip()
-                clause_content = re.sub(r'\s+', ' ', clause_content)
-                
-                # 跳过太短的条款（可能是误匹配）
-                if len(clause_content) > 10:
-                    clauses.append({
-                        'clause_number': clause_number,
-                        'content': clause_content
-                    })
-        
-        return clauses
 
 
 def test_parser():
@@ -0,0 +1,610 @@
+"""
+法规层级结构
+
+从法规文本中提取编/章/节/条/款/项的层级结构，保存到regulation_nodes表
+（每个节点指向父节点，序号由中文数字转换为整数），并提供按序号查询的函数，
+"第四章的所有条款""第三条第（二）项"等查询走索引，不再在条款内容中做子串匹配。
+
+与segmenter.py一样按行增量处理，可以逐页输入PDF文本:
+- 编、章、节标题行（包括markdown标题"## 第一章　总则"）开始新的结构单元；
+  目录中的标题下没有任何条，结束时删除；
+- "第X条"开始新的条，条标题后的文字和之后的每个自然段各是一款；
+- "（一）"开头的行是当前款下的一项，"1．"开头的行并入当前项；
+- PDF按版面折行，上一行没有以句末标点结束时视为同一款（项）的续行。
+"""
+
+import hashlib
+import json
+import re
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from database import Regulation, Clause, RegulationNode
+from segmenter import CN_DIGITS, normalize_clause
+
+# 层级（由高到低）
+LEVEL_PART = 'part'
+LEVEL_CHAPTER = 'chapter'
+LEVEL_SECTION = 'section'
+LEVEL_ARTICLE = 'article'
+LEVEL_PARAGRAPH = 'paragraph'
+LEVEL_ITEM = 'item'
+LEVELS = (LEVEL_PART, LEVEL_CHAPTER, LEVEL_SECTION, LEVEL_ARTICLE, LEVEL_PARAGRAPH, LEVEL_ITEM)
+HEADING_LEVELS = (LEVEL_PART, LEVEL_CHAPTER, LEVEL_SECTION)
+HEADING_SUFFIXES = {'编': LEVEL_PART, '章': LEVEL_CHAPTER, '节': LEVEL_SECTION}
+
+# 行首空白（含全角空格）
+SPACES = ' \t　'
+
+# 编、章、节标题行，允许markdown标题前缀
+HEADING_PATTERN = re.compile(rf'^[{SPACES}]*#*[{SPACES}]*(第([{CN_DIGITS}]+)([编章节]))(.*)$')
+
+# 条标题行
+ARTICLE_PATTERN = re.compile(rf'^[{SPACES}]*(第([{CN_DIGITS}]+)条)(.*)$')
+
+# 项: （一）、(一)
+ITEM_PATTERN = re.compile(rf'^[{SPACES}]*([（(]([{CN_DIGITS}]+)[）)])')
+
+# 目: 1．、1.、1、（并入所属的项）
+SUBITEM_PATTERN = re.compile(rf'^[{SPACES}]*[0-9０-９]+[.．、]')
+
+# 款、项结束时的标点，没有以这些标点结束的行视为折行
+SENTENCE_END = '。：；！？:;!?'
+
+CN_NUMERAL_VALUES = {
+    '零': 0, '〇': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4,
+    '五': 5, '六': 6, '七': 7, '八': 8, '九': 9
+}
+CN_UNIT_VALUES = {'十': 10, '百': 100, '千': 1000}
+
+
+def cn_to_int(text: str) -> int:
+    """
+    把中文数字转换为整数，如"十二"→12、"一百零三"→103
+
+    Raises:
+        ValueError: 包含无法识别的字符
+    """
+    if text.isdigit():
+        return int(text)
+
+    total = 0
+    digit = 0
+    for char in text:
+        if char in CN_NUMERAL_VALUES:
+            digit = CN_NUMERAL_VALUES[char]
+        elif char in CN_UNIT_VALUES:
+            # "十二"省略了"一"
+            total += (digit or 1) * CN_UNIT_VALUES[char]
+            digit = 0
+        else:
+            raise ValueError(f"无法识别的中文数字: {text}")
+    return total + digit
+
+
+def int_to_cn(n: int) -> str:
+    """
+    把1-999的整数转换为中文数字，写法与法规编号一致，如12→"十二"、
+    103→"一百零三"、110→"一百一十"；超出范围时返回阿拉伯数字
+    """
+    digits = '零一二三四五六七八九'
+    if n < 10:
+        return digits[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return ('' if tens == 1 else digits[tens]) + '十' + (digits[ones] if ones else '')
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        if rest == 0:
+            return digits[hundreds] + '百'
+        if rest < 10:
+            return digits[hundreds] + '百零' + digits[rest]
+        # 百位之后的"十"不省略"一"
+        return digits[hundreds] + '百' + ('一' if rest < 20 else '') + int_to_cn(rest)
+    return str(n)
+
+
+def _ends_sentence(text: Optional[str]) -> bool:
+    """文本是否以句末标点结束"""
+    return bool(text) and text[-1] in SENTENCE_END
+
+
+class HierarchyBuilder:
+    """
+    增量层级结构提取器
+
+    用feed()逐段输入文本（段与段之间可以在任意位置断开），全部输入后调用
+    close()取出节点列表。节点按在文档中的先后顺序排列，parent是父节点在
+    列表中的下标。
+    """
+
+    def __init__(self):
+        """初始化提取器"""
+        self._pending = ''
+        self.nodes: List[Dict] = []
+        # 当前打开的编、章、节（层级 -> 节点下标）
+        self._headings: Dict[str, int] = {}
+        # 当前的条、款、项（节点下标）
+        self._article: Optional[int] = None
+        self._paragraph: Optional[int] = None
+        self._item: Optional[int] = None
+        self._paragraph_count = 0
+
+    def feed(self, text: str):
+        """输入一段文本"""
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._consume(line)
+
+    def close(self) -> List[Dict]:
+        """
+        结束输入
+
+        Returns:
+            节点列表，已删除目录中没有条的编、章、节标题
+        """
+        if self._pending:
+            self._consume(self._pending)
+            self._pending = ''
+        return _prune_empty_headings(self.nodes)
+
+    def _add(self, level: str, ordinal: int, label: str, parent: Optional[int],
+             title: Optional[str] = None, content: Optional[str] = None) -> int:
+        """添加节点，返回其下标"""
+        self.nodes.append({
+            'level': level,
+            'ordinal': ordinal,
+            'label': label,
+            'title': title,
+            'content': content,
+            'parent': parent
+        })
+        return len(self.nodes) - 1
+
+    def _open_heading(self, levels: Tuple[str, ...]) -> Optional[int]:
+        """levels中最低一级的已打开标题"""
+        for level in reversed(levels):
+            if level in self._headings:
+                return self._headings[level]
+        return None
+
+    def _close_article(self):
+        """结束当前的条"""
+        self._article = self._paragraph = self._item = None
+
+    def _add_paragraph(self, text: str):
+        """在当前的条下开始新的一款"""
+        self._paragraph_count += 1
+        self._paragraph = self._add(
+            LEVEL_PARAGRAPH, self._paragraph_count, f'第{int_to_cn(self._paragraph_count)}款',
+            self._article, content=normalize_clause(text)
+        )
+        self._item = None
+
+    def _append(self, index: int, text: str):
+        """把折行文本并入节点内容"""
+        node = self.nodes[index]
+        node['content'] = (node['content'] or '') + normalize_clause(text)
+
+    def _consume(self, line: str):
+        """处理一个完整的行"""
+        text = line.strip(SPACES)
+        if not text:
+            return
+
+        match = HEADING_PATTERN.match(line)
+        if match:
+            level = HEADING_SUFFIXES[match.group(3)]
+            position = HEADING_LEVELS.index(level)
+            self._close_article()
+            index = self._add(
+                level, cn_to_int(match.group(2)), match.group(1),
+                self._open_heading(HEADING_LEVELS[:position]),
+                title=''.join(match.group(4).split()) or None
+            )
+            # 新的章结束上一章下的节，依此类推
+            for lower in HEADING_LEVELS[position + 1:]:
+                self._headings.pop(lower, None)
+            self._headings[level] = index
+            return
+
+        if text.startswith('#'):
+            # 其他markdown标题同样结束当前的条（与条款切分一致）
+            self._close_article()
+            return
+
+        match = ARTICLE_PATTERN.match(line)
+        if match:
+            self._close_article()
+            self._article = self._add(
+                LEVEL_ARTICLE, cn_to_int(match.group(2)), match.group(1),
+                self._open_heading(HEADING_LEVELS)
+            )
+            self._paragraph_count = 0
+            rest = match.group(3).strip(SPACES)
+            if rest:
+                self._add_paragraph(rest)
+            return
+
+        if self._article is None:
+            # 条之前的标题、题注、目录等
+            return
+
+        match = ITEM_PATTERN.match(line)
+        if match:
+            parent = self._paragraph if self._paragraph is not None else self._article
+            self._item = self._add(
+                LEVEL_ITEM, cn_to_int(match.group(2)), match.group(1), parent,
+                content=normalize_clause(text)
+            )
+            return
+
+        if self._item is not None:
+            if SUBITEM_PATTERN.match(line) or not _ends_sentence(self.nodes[self._item]['content']):
+                self._append(self._item, text)
+                return
+        elif self._paragraph is not None and not _ends_sentence(self.nodes[self._paragraph]['content']):
+            self._append(self._paragraph, text)
+            return
+
+        self._add_paragraph(text)
+
+
+def _prune_empty_headings(nodes: List[Dict]) -> List[Dict]:
+    """删除其下没有任何条的编、章、节（如目录），并重新计算父节点下标"""
+    keep = [node['level'] not in HEADING_LEVELS for node in nodes]
+    for node in nodes:
+        if node['level'] != LEVEL_ARTICLE:
+            continue
+        parent = node['parent']
+        while parent is not None and not keep[parent]:
+            keep[parent] = True
+            parent = nodes[parent]['parent']
+
+    new_index = {}
+    result = []
+    for index, node in enumerate(nodes):
+        if not keep[index]:
+            continue
+        new_index[index] = len(result)
+        if node['parent'] is not None:
+            node['parent'] = new_index[node['parent']]
+        result.append(node)
+    return result
+
+
+def extract_hierarchy(chunks: Iterable[str]) -> List[Dict]:
+    """
+    从逐段产生的文本中提取层级结构
+
+    Args:
+        chunks: 文本段的可迭代对象（整篇文本、文件对象或逐页提取的PDF文本）
+
+    Returns:
+        节点列表，按文档顺序排列
+    """
+    builder = HierarchyBuilder()
+    for chunk in chunks:
+        builder.feed(chunk)
+    return builder.close()
+
+
+def hierarchy_hash(nodes: List[Dict]) -> str:
+    """层级结构的哈希，结构和款、项内容不变时相同"""
+    rows = [
+        [node['level'], node['ordinal'], node['label'], node['title'], node['content'], node['parent']]
+        for node in nodes
+    ]
+    return hashlib.sha256(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+# ============ 写库 ============
+
+def store_hierarchy(session: Session, regulation_id: int, nodes: List[Dict]) -> int:
+    """
+    用nodes替换一部法规的结构节点（不提交事务）
+
+    条节点按编号和先后顺序关联到法规的条款，其下的款、项关联到同一条款。
+    父节点先于子节点写入，按层级分批insert并取回ID。
+
+    Args:
+        session: 数据库会话
+        regulation_id: 法规ID
+        nodes: extract_hierarchy返回的节点列表
+
+    Returns:
+        写入的节点数
+    """
+    session.execute(
+        delete(RegulationNode).where(RegulationNode.regulation_id == regulation_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    clause_ids = defaultdict(deque)
+    for row in session.execute(
+        select(Clause.id, Clause.clause_number)
+        .where(Clause.regulation_id == regulation_id)
+        .order_by(Clause.id)
+    ):
+        clause_ids[row.clause_number].append(row.id)
+
+    depths = []
+    node_clause_ids = []
+    for node in nodes:
+        parent = node['parent']
+        depths.append(0 if parent is None else depths[parent] + 1)
+        if node['level'] == LEVEL_ARTICLE:
+            candidates = clause_ids.get(node['label'])
+            node_clause_ids.append(candidates.popleft() if candidates else None)
+        elif node['level'] in (LEVEL_PARAGRAPH, LEVEL_ITEM):
+            node_clause_ids.append(node_clause_ids[parent])
+        else:
+            node_clause_ids.append(None)
+
+    node_ids = [None] * len(nodes)
+    for depth in range(max(depths, default=-1) + 1):
+        indexes = [index for index, value in enumerate(depths) if value == depth]
+        rows = [
+            {
+                'regulation_id': regulation_id,
+                'parent_id': node_ids[nodes[index]['parent']] if nodes[index]['parent'] is not None else None,
+                'level': nodes[index]['level'],
+                'ordinal': nodes[index]['ordinal'],
+                'position': index,
+                'label': nodes[index]['label'],
+                'title': nodes[index]['title'],
+                'content': nodes[index]['content'],
+                'clause_id': node_clause_ids[index]
+            }
+            for index in indexes
+        ]
+        inserted = session.execute(
+            insert(RegulationNode).returning(RegulationNode.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        for index, node_id in zip(indexes, inserted):
+            node_ids[index] = node_id
+
+    session.execute(
+        update(Regulation).where(Regulation.id == regulation_id)
+        .values(structure_hash=hierarchy_hash(nodes))
+        .execution_options(synchronize_session=False)
+    )
+    return len(nodes)
+
+
+def sync_hierarchies(
+    session: Session,
+    hierarchies: Iterable[Tuple[str, List[Dict]]],
+    batch_size: int = 200
+) -> Dict:
+    """
+    按结构哈希增量重建法规的结构节点（重新导入法规目录时使用）
+
+    应在sync_regulations之后调用，使条节点能关联到最新的条款。
+
+    Args:
+        session: 数据库会话
+        hierarchies: (法规标题, 节点列表) 的序列
+        batch_size: 每个事务处理的法规数
+
+    Returns:
+        重建、未变化的法规数和写入的节点数
+    """
+    stats = {'structures_rebuilt': 0, 'structures_unchanged': 0, 'nodes_written': 0}
+    existing = {
+        row.title: (row.id, row.structure_hash)
+        for row in session.execute(select(Regulation.id, Regulation.title, Regulation.structure_hash))
+    }
+
+    pending = 0
+    for title, nodes in hierarchies:
+        if title not in existing:
+            continue
+        regulation_id, old_hash = existing[title]
+        if old_hash == hierarchy_hash(nodes):
+            stats['structures_unchanged'] += 1
+            continue
+
+        stats['nodes_written'] += store_hierarchy(session, regulation_id, nodes)
+        stats['structures_rebuilt'] += 1
+        pending += 1
+        if pending >= batch_size:
+            session.commit()
+            pending = 0
+
+    session.commit()
+    return stats
+
+
+# ============ 查询 ============
+
+def _node_columns():
+    """节点查询的列，条节点的内容取自条款"""
+    return (
+        RegulationNode.id, RegulationNode.parent_id, RegulationNode.level,
+        RegulationNode.ordinal, RegulationNode.label, RegulationNode.title,
+        func.coalesce(RegulationNode.content, Clause.content).label('content'),
+        RegulationNode.clause_id
+    )
+
+
+def _node_dict(row) -> Dict:
+    """节点查询结果转换为字典"""
+    return {
+        'id': row.id,
+        'level': row.level,
+        'ordinal': row.ordinal,
+        'label': row.label,
+        'title': row.title,
+        'content': row.content,
+        'clause_id': row.clause_id
+    }
+
+
+def get_structure(session: Session, regulation_id: int, max_level: str = LEVEL_ARTICLE) -> List[Dict]:
+    """
+    查询法规的层级结构树
+
+    Args:
+        session: 数据库会话
+        regulation_id: 法规ID
+        max_level: 返回到哪一级为止（默认到条）
+
+    Returns:
+        顶层节点列表，每个节点的children为下级节点
+    """
+    levels = LEVELS[:LEVELS.index(max_level) + 1]
+    rows = session.execute(
+        select(*_node_columns())
+        .outerjoin(Clause, Clause.id == RegulationNode.clause_id)
+        .where(RegulationNode.regulation_id == regulation_id, RegulationNode.level.in_(levels))
+        .order_by(RegulationNode.position)
+    ).all()
+
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = _node_dict(row)
+        node['children'] = []
+        nodes[row.id] = node
+        parent = nodes.get(row.parent_id)
+        (parent['children'] if parent is not None else roots).append(node)
+    return roots
+
+
+def get_chapter_clauses(session: Session, regulation_id: int, chapter: int) -> Optional[Dict]:
+    """
+    查询某一章（含其下各节）的所有条款
+
+    Args:
+        session: 数据库会话
+        regulation_id: 法规ID
+        chapter: 章序号（第四章为4）
+
+    Returns:
+        章的编号、标题和条款列表，章不存在时返回None
+    """
+    chapters = session.execute(
+        select(RegulationNode.id, RegulationNode.label, RegulationNode.title)
+        .where(RegulationNode.regulation_id == regulation_id,
+               RegulationNode.level == LEVEL_CHAPTER,
+               RegulationNode.ordinal == chapter)
+        .order_by(RegulationNode.position)
+    ).all()
+    if not chapters:
+        return None
+
+    # 沿父节点索引向下找到章下的节和条
+    tree = (
+        select(RegulationNode.id)
+        .where(RegulationNode.id.in_([row.id for row in chapters]))
+        .cte('chapter_tree', recursive=True)
+    )
+    tree = tree.union_all(
+        select(RegulationNode.id)
+        .where(RegulationNode.parent_id == tree.c.id,
+               RegulationNode.level.in_((LEVEL_SECTION, LEVEL_ARTICLE)))
+    )
+    rows = session.execute(
+        select(RegulationNode.ordinal, RegulationNode.clause_id,
+               Clause.clause_number, Clause.content)
+        .join(tree, tree.c.id == RegulationNode.id)
+        .join(Clause, Clause.id == RegulationNode.clause_id)
+        .where(RegulationNode.level == LEVEL_ARTICLE)
+        .order_by(RegulationNode.position)
+    ).all()
+
+    return {
+        'regulation_id': regulation_id,
+        'chapter': chapter,
+        'label': chapters[0].label,
+        'title': chapters[0].title,
+        'clauses': [
+            {
+                'clause_id': row.clause_id,
+                'clause_number': row.clause_number,
+                'article': row.ordinal,
+                'content': row.content
+            }
+            for row in rows
+        ]
+    }
+
+
+def get_article(
+    session: Session,
+    regulation_id: int,
+    article: int,
+    paragraph: Optional[int] = None,
+    item: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    查询一条及其下的款、项
+
+    Args:
+        session: 数据库会话
+        regulation_id: 法规ID
+        article: 条序号（第三条为3）
+        paragraph: 只返回第几款
+        item: 只返回第几项（未指定款时在各款中查找）
+
+    Returns:
+        条的信息和nodes列表: 未指定项时为各款（children为其下的项），
+        指定项时为匹配的项；条或款、项不存在时返回None
+    """
+    article_row = session.execute(
+        select(*_node_columns())
+        .outerjoin(Clause, Clause.id == RegulationNode.clause_id)
+        .where(RegulationNode.regulation_id == regulation_id,
+               RegulationNode.level == LEVEL_ARTICLE,
+               RegulationNode.ordinal == article)
+        .order_by(RegulationNode.position)
+        .limit(1)
+    ).first()
+    if article_row is None:
+        return None
+
+    def children(parent_ids, ordinal=None):
+        statement = (
+            select(*_node_columns())
+            .outerjoin(Clause, Clause.id == RegulationNode.clause_id)
+            .where(RegulationNode.parent_id.in_(parent_ids))
+            .order_by(RegulationNode.position)
+        )
+        if ordinal is not None:
+            statement = statement.where(RegulationNode.ordinal == ordinal)
+        return session.execute(statement).all()
+
+    top = children([article_row.id], paragraph)
+    paragraphs = [row for row in top if row.level == LEVEL_PARAGRAPH]
+    if paragraph is not None and not paragraphs:
+        return None
+
+    # 项挂在款下；条标题后直接列项时挂在条下
+    item_parents = [row.id for row in paragraphs] + ([article_row.id] if paragraph is None else [])
+    items = children(item_parents, item)
+
+    if item is not None:
+        nodes = [_node_dict(row) for row in items if row.level == LEVEL_ITEM]
+        if not nodes:
+            return None
+    else:
+        items_by_parent = defaultdict(list)
+        for row in items:
+            items_by_parent[row.parent_id].append(_node_dict(row))
+        nodes = []
+        for row in top:
+            node = _node_dict(row)
+            node['children'] = items_by_parent.get(row.id, [])
+            nodes.append(node)
+
+    return {
+        'regulation_id': regulation_id,
+        'article': _node_dict(article_row),
+        'nodes': nodes
+    }
@@ -0,0 +1,308 @@
+"""
+法规批量导入
+
+init_data.py导入法规目录和 /api/regulations/upload 上传文档共用的写库逻辑:
+法规和条款通过Core风格的批量insert（executemany）写入，不再逐条创建ORM对象。
+
+法规和条款都保存内容哈希。重新导入法规目录时按哈希比对（sync_regulations）:
+内容未变的法规直接跳过；修订过的法规只写入新增、修改和删除的条款，
+未变和修改的条款保留原ID，关联的审核规则不受影响。
+"""
+
+import hashlib
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import Regulation, Clause, AuditRule
+
+# 每次executemany写入的条款数，限制参数列表占用的内存
+CLAUSE_BATCH_SIZE = 5000
+
+# 增量同步的统计项
+SYNC_STAT_KEYS = (
+    'regulations_added', 'regulations_updated', 'regulations_unchanged',
+    'clauses_added', 'clauses_updated', 'clauses_removed', 'clauses_unchanged',
+    'rules_removed'
+)
+
+
+class IngestError(Exception):
+    """导入失败，异常信息可直接展示给用户"""
+    pass
+
+
+def clause_hash(clause_number: Optional[str], content: str) -> str:
+    """条款编号和内容的SHA-256哈希"""
+    return hashlib.sha256(f"{clause_number or ''}\x1f{content}".encode('utf-8')).hexdigest()
+
+
+def regulation_hash(clauses: List[Dict]) -> str:
+    """法规全部条款的哈希（按条款顺序）"""
+    digest = hashlib.sha256()
+    for clause in clauses:
+        digest.update(clause_hash(clause['clause_number'], clause['content']).encode('ascii'))
+    return digest.hexdigest()
+
+
+def insert_regulations(
+    session: Session,
+    regulations: Iterable[Tuple[str, str, List[Dict]]]
+) -> List[int]:
+    """
+    批量写入法规及其条款
+
+    不提交事务，由调用方决定一批数据在一个事务中提交。
+
+    Args:
+        session: 数据库会话
+        regulations: (法规标题, 源文件, 条款列表) 的序列
+
+    Returns:
+        新建法规的ID列表，与输入顺序一致
+    """
+    regulations = list(regulations)
+    if not regulations:
+        return []
+
+    regulation_ids = session.scalars(
+        insert(Regulation).returning(Regulation.id, sort_by_parameter_order=True),
+        [
+            {'title': title, 'source_file': source_file, 'content_hash': regulation_hash(clauses)}
+            for title, source_file, clauses in regulations
+        ]
+    ).all()
+
+    rows = [
+        {
+            'regulation_id': regulation_id,
+            'clause_number': clause['clause_number'],
+            'content': clause['content'],
+            'content_hash': clause_hash(clause['clause_number'], clause['content'])
+        }
+        for regulation_id, (_, _, clauses) in zip(regulation_ids, regulations)
+        for clause in clauses
+    ]
+    for start in range(0, len(rows), CLAUSE_BATCH_SIZE):
+        session.execute(insert(Clause), rows[start:start + CLAUSE_BATCH_SIZE])
+
+    return list(regulation_ids)
+
+
+def find_duplicate_regulation(session: Session, clauses: List[Dict]) -> Optional[Dict]:
+    """
+    查找条款内容完全相同的已有法规（同一文件以不同文件名重复上传时）
+
+    Args:
+        session: 数据库会话
+        clauses: 条款列表
+
+    Returns:
+        已有法规的ID、标题和条款数，没有时返回None
+    """
+    if not clauses:
+        return None
+    row = session.execute(
+        select(Regulation.id, Regulation.title)
+        .where(Regulation.content_hash == regulation_hash(clauses))
+        .order_by(Regulation.id)
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    return {
+        'regulation_id': row.id,
+        'regulation_title': row.title,
+        'clause_count': len(clauses)
+    }
+
+
+def import_parsed_regulation(
+    session: Session,
+    title: str,
+    source_file: str,
+    clauses: List[Dict]
+) -> Dict:
+    """
+    导入一部已解析的法规（上传文档使用）
+    
+    不提交事务，导入任务在同一个事务中写入法规并更新文件状态，
+    避免写库成功但状态未更新时重复导入。
+
+    Args:
+        session: 数据库会话
+        title: 法规标题
+        source_file: 源文件名
+        clauses: 条款列表
+
+    Returns:
+        导入结果，包含法规ID、标题和条款数
+
+    Raises:
+        IngestError: 没有解析出条款，或同名法规已存在
+    """
+    if not clauses:
+        raise IngestError("未能从文档中提取到有效的法规条款")
+
+    existing = session.query(Regulation.id).filter(Regulation.title == title).first()
+    if existing:
+        raise IngestError(f"法规 '{title}' 已存在于系统中")
+
+    # 其他工作进程在上面的检查之后写入了同名法规时，由标题唯一索引拒绝
+    try:
+        regulation_id = insert_regulations(session, [(title, source_file, clauses)])[0]
+    except IntegrityError:
+        raise IngestError(f"法规 '{title}' 已存在于系统中")
+
+    return {
+        'regulation_id': regulation_id,
+        'regulation_title': title,
+        'clause_count': len(clauses)
+    }
+
+
+def sync_regulation_clauses(session: Session, regulation_id: int, clauses: List[Dict]) -> Dict:
+    """
+    按条款编号比对，把一部已有法规的条款更新为clauses
+
+    同一编号的条款按出现顺序一一对应: 哈希相同的不写库；内容变化的原地更新
+    （保留条款ID和关联的审核规则）；多出的新增；缺少的删除，并删除引用它们的审核规则。
+    不提交事务。
+
+    Args:
+        session: 数据库会话
+        regulation_id: 法规ID
+        clauses: 新的条款列表
+
+    Returns:
+        各类条款的数量统计
+    """
+    existing_by_number = defaultdict(deque)
+    for row in session.execute(
+        select(Clause.id, Clause.clause_number, Clause.content, Clause.content_hash)
+        .where(Clause.regulation_id == regulation_id)
+        .order_by(Clause.id)
+    ):
+        # 早期版本导入的条款没有哈希，按内容补算
+        row_hash = row.content_hash or clause_hash(row.clause_number, row.content)
+        existing_by_number[row.clause_number].append((row.id, row_hash, row.content_hash is None))
+
+    updates = []
+    inserts = []
+    unchanged = 0
+    for clause in clauses:
+        new_hash = clause_hash(clause['clause_number'], clause['content'])
+        candidates = existing_by_number.get(clause['clause_number'])
+        if not candidates:
+            inserts.append({
+                'regulation_id': regulation_id,
+                'clause_number': clause['clause_number'],
+                'content': clause['content'],
+                'content_hash': new_hash
+            })
+            continue
+
+        clause_id, old_hash, missing_hash = candidates.popleft()
+        if old_hash != new_hash:
+            updates.append({'id': clause_id, 'content': clause['content'], 'content_hash': new_hash})
+        else:
+            unchanged += 1
+            if missing_hash:
+                updates.append({'id': clause_id, 'content_hash': new_hash})
+
+    removed_ids = [clause_id for rows in existing_by_number.values() for clause_id, _, _ in rows]
+
+    rules_removed = 0
+    if removed_ids:
+        rules_removed = session.execute(
+            delete(AuditRule).where(AuditRule.clause_id.in_(removed_ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.execute(
+            delete(Clause).where(Clause.id.in_(removed_ids))
+            .execution_options(synchronize_session=False)
+        )
+    for start in range(0, len(updates), CLAUSE_BATCH_SIZE):
+        session.execute(update(Clause), updates[start:start + CLAUSE_BATCH_SIZE])
+    for start in range(0, len(inserts), CLAUSE_BATCH_SIZE):
+        session.execute(insert(Clause), inserts[start:start + CLAUSE_BATCH_SIZE])
+
+    return {
+        'clauses_added': len(inserts),
+        'clauses_updated': sum(1 for row in updates if 'content' in row),
+        'clauses_removed': len(removed_ids),
+        'clauses_unchanged': unchanged,
+        'rules_removed': rules_removed
+    }
+
+
+def sync_regulations(
+    session: Session,
+    regulations: Iterable[Tuple[str, str, List[Dict]]],
+    batch_size: int = 200
+) -> Dict:
+    """
+    按内容哈希增量同步法规（重新导入法规目录时使用）
+
+    - 标题不存在的法规批量新增；
+    - 标题存在且哈希相同的法规跳过，不读取条款；
+    - 标题存在但内容变化的法规只写入有变化的条款。
+    数据库中有、本次输入中没有的法规保持不变（可能是上传导入的）。
+    每batch_size部法规提交一次。
+
+    Args:
+        session: 数据库会话
+        regulations: (法规标题, 源文件, 条款列表) 的序列
+        batch_size: 每个事务处理的法规数
+
+    Returns:
+        法规和条款的变更统计
+    """
+    stats = dict.fromkeys(SYNC_STAT_KEYS, 0)
+    existing = {
+        row.title: (row.id, row.content_hash)
+        for row in session.execute(select(Regulation.id, Regulation.title, Regulation.content_hash))
+    }
+
+    new_regulations = []
+    pending = 0
+    for title, source_file, clauses in regulations:
+        if title not in existing:
+            existing[title] = (None, None)
+            new_regulations.append((title, source_file, clauses))
+            stats['regulations_added'] += 1
+            stats['clauses_added'] += len(clauses)
+            continue
+
+        regulation_id, old_hash = existing[title]
+        new_hash = regulation_hash(clauses)
+        if regulation_id is None or old_hash == new_hash:
+            stats['regulations_unchanged'] += 1
+            continue
+
+        clause_stats = sync_regulation_clauses(session, regulation_id, clauses)
+        session.execute(
+            update(Regulation).where(Regulation.id == regulation_id)
+            .values(content_hash=new_hash, source_file=source_file)
+            .execution_options(synchronize_session=False)
+        )
+        for key, value in clause_stats.items():
+            stats[key] += value
+        if clause_stats['clauses_added'] or clause_stats['clauses_updated'] or clause_stats['clauses_removed']:
+            stats['regulations_updated'] += 1
+        else:
+            stats['regulations_unchanged'] += 1
+
+        pending += 1
+        if pending >= batch_size:
+            session.commit()
+            pending = 0
+
+    for start in range(0, len(new_regulations), batch_size):
+        insert_regulations(session, new_regulations[start:start + batch_size])
+        session.commit()
+    session.commit()
+
+    return stats
@@ -5,6 +5,7 @@
 1. 创建数据库表
 2. 解析并导入法规文档
 3. 导入示例数据（从截图中提取的审核规则）
+4. 构建语义检索索引
 """
 
 import os
@@ -14,6 +15,22 @@ from database import (
     Regulation, Clause, AuditorRole, DocumentType, AuditRule
 )
 from parser import RegulationParser
+from ingest import sync_regulations
+from hierarchy import extract_hierarchy, sync_hierarchies
+from rule_linker import link_rules
+from semantic import build_semantic_index, SEMANTIC_INDEX_DIR
+
+# 每个事务写入的法规数
+REGULATION_BATCH_SIZE = 200
+
+# 解析法规目录的进程数
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(os.cpu_count() or 1)))
+
+
+def read_hierarchy(file_path):
+    """逐行读取法规文档并提取层级结构"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return extract_hierarchy(f)
 
 
 def import_regulations(db_session, regulations_dir='../regulations'):
@@ -27,37 +44,30 @@ def import_regulations(db_session, regulations_dir='../regulations'):
     print("\n=== 导入法规文档 ===")
     
     parser = RegulationParser()
-    parsed_data = parser.parse_directory(regulations_dir)
-    
-    for title, source_file, clauses in parsed_data:
-        # 检查法规是否已存在
-        existing = db_session.query(Regulation).filter(
-            Regulation.title == title
-        ).first()
-        
-        if existing:
-            print(f"跳过已存在的法规: {title}")
-            continue
-        
-        # 创建法规记录
-        regulation = Regulation(
-            title=title,
-            source_file=source_file
-        )
-        db_session.add(regulation)
-        db_session.flush()  # 获取regulation.id
-        
-        # 创建条款记录
-        for clause_data in clauses:
-            clause = Clause(
-                regulation_id=regulation.id,
-                clause_number=clause_data['clause_number'],
-                content=clause_data['content']
-            )
-            db_session.add(clause)
-        
-        db_session.commit()
-        print(f"✓ 已导入: {title} ({len(clauses)} 条)")
+    parsed_data = parser.parse_directory(regulations_dir, workers=PARSE_WORKERS)
+    
+    stats = parser.last_parse_stats
+    print(f"解析 {stats['file_count']} 个文件耗时 {stats['elapsed_seconds']:.2f} 秒"
+          f"（{stats['workers']} 个进程，{stats['files_per_second']:.1f} 文件/秒）")
+    
+    # 按内容哈希增量同步: 新法规批量写入，未变的跳过，修订的只写有变化的条款
+    stats = sync_regulations(db_session, parsed_data, batch_size=REGULATION_BATCH_SIZE)
+    
+    print(f"新增法规 {stats['regulations_added']} 个，更新 {stats['regulations_updated']} 个，"
+          f"未变化 {stats['regulations_unchanged']} 个")
+    print(f"条款: 新增 {stats['clauses_added']}，修改 {stats['clauses_updated']}，"
+          f"删除 {stats['clauses_removed']}，未变化 {stats['clauses_unchanged']}")
+    if stats['rules_removed']:
+        print(f"已删除 {stats['rules_removed']} 条引用已删除条款的审核规则")
+    
+    # 按结构哈希重建有变化的法规的编/章/节/条/款/项结构
+    stats = sync_hierarchies(
+        db_session,
+        ((title, read_hierarchy(file_path)) for title, file_path, _ in parsed_data),
+        batch_size=REGULATION_BATCH_SIZE
+    )
+    print(f"层级结构: 重建 {stats['structures_rebuilt']} 个法规（{stats['nodes_written']} 个节点），"
+          f"未变化 {stats['structures_unchanged']} 个")
     
     print(f"\n法规文档导入完成! 共 {len(parsed_data)} 个法规")
 
@@ -159,42 +169,20 @@ def import_example_data(db_session):
         }
     ]
     
-    rule_count = 0
-    for rule_mapping in rules_mapping:
-        role = roles[rule_mapping['role']]
-        doc_type = doc_types[rule_mapping['document_type']]
-        
-        print(f"\n  处理: {rule_mapping['role']} + {rule_mapping['document_type']}")
-        
-        for keyword in rule_mapping['clause_keywords']:
-            # 搜索包含关键词的条款
-            clauses = db_session.query(Clause).filter(
-                Clause.content.like(f'%{keyword[:20]}%')  # 使用关键词前20个字符搜索
-            ).all()
-            
-            for clause in clauses:
-                # 检查规则是否已存在
-                existing_rule = db_session.query(AuditRule).filter(
-                    AuditRule.role_id == role.id,
-                    AuditRule.document_type_id == doc_type.id,
-                    AuditRule.clause_id == clause.id
-                ).first()
-                
-                if not existing_rule:
-                    audit_rule = AuditRule(
-                        role_id=role.id,
-                        document_type_id=doc_type.id,
-                        clause_id=clause.id,
-                        source='example',
-                        priority=10  # 示例数据优先级设为10
-                    )
-                    db_session.add(audit_rule)
-                    rule_count += 1
-                    print(f"    ✓ 关联条款: {clause.clause_number} ({clause.regulation.title})")
-                    break  # 只关联第一个匹配的条款
-    
+    # 所有关键词编译成一个自动机，只扫描条款表一遍；已存在的规则由唯一索引跳过
+    mappings = [
+        (roles[rule_mapping['role']].id, doc_types[rule_mapping['document_type']].id, keyword)
+        for rule_mapping in rules_mapping
+        for keyword in rule_mapping['clause_keywords']
+    ]
+    stats = link_rules(db_session, mappings, source='example', priority=10)  # 示例数据优先级设为10
     db_session.commit()
-    print(f"\n审核规则创建完成! 共 {rule_count} 条规则")
+    
+    for keyword in stats['unmatched']:
+        print(f"    - 未找到条款: {keyword}")
+    print(f"\n审核规则创建完成! 新增 {stats['rules_inserted']} 条规则，"
+          f"已存在 {stats['rules_existing']} 条，"
+          f"关键词关联到同一条款而合并 {stats['rules_duplicate']} 条，扫描条款 {stats['clauses_scanned']} 条")
 
 
 def main():
@@ -223,11 +211,17 @@ def main():
         # 4. 导入示例数据
         import_example_data(db)
         
+        # 5. 构建语义检索索引
+        print("\n=== 构建语义索引 ===")
+        stats = build_semantic_index(db)
+        print(f"语义索引: {stats['clauses']} 个条款，{stats['bytes'] / 1024 / 1024:.1f} MB，"
+              f"耗时 {stats['seconds']:.2f} 秒（{SEMANTIC_INDEX_DIR}）")
+        
         print("\n" + "=" * 60)
         print("数据初始化完成!")
         print("=" * 60)
         
-        # 5. 显示统计信息
+        # 6. 显示统计信息
         print("\n数据库统计:")
         print(f"  - 法规文档: {db.query(Regulation).count()} 个")
         print(f"  - 法规条款: {db.query(Clause).count()} 条")
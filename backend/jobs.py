@@ -0,0 +1,719 @@
+"""
+文档导入任务队列
+
+上传接口只负责把文件分块写入磁盘并在SQLite中登记任务（ingest_jobs /
+ingest_job_files两张表），随即返回任务ID，不占用HTTP连接等待解析。
+工作进程从表中领取待处理文件，在进程池中并行解析，再批量写库；
+客户端通过 /api/jobs/{job_id} 查询每个文件的进度、吞吐量和错误信息。
+
+工作进程可以内嵌在API服务中（默认，INGEST_WORKER=embedded），
+也可以单独运行（INGEST_WORKER=off 后执行 python jobs.py），多个工作进程
+通过原子的UPDATE领取文件，互不重复。任务状态保存在数据库中，服务重启后
+排队中的文件继续处理；处理中断的文件在租约过期后被重新领取。
+
+解析结果按文件内容的SHA-256缓存在磁盘上（PARSE_CACHE_DIR），同一文件
+换个文件名再次上传时不必重新解析；如果系统中已有条款完全相同的法规，
+上传时直接标记为duplicate（不排队、不写法规表），接口立即返回。
+
+运行独立工作进程:
+    python jobs.py
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, update, insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from cache import ParseCache, file_digest
+from database import SessionLocal, IngestJob, IngestJobFile
+from document_parser import DocumentParser, PARSER_VERSION
+from hierarchy import store_hierarchy
+from ingest import import_parsed_regulation, find_duplicate_regulation, IngestError
+from semantic import SEMANTIC_INDEX_DIR, update_semantic_index
+
+# 支持的上传文件格式
+ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx']
+
+# 上传文件的临时目录
+UPLOAD_DIR = Path("./data/uploads")
+
+# 分块写盘的块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 每个工作进程的解析进程数
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(min(2, os.cpu_count() or 1))))
+
+# 每个PDF文件的文本提取进程数（大于1时按页段并行提取）
+PDF_PAGE_WORKERS = int(os.getenv('PDF_PAGE_WORKERS', '1'))
+
+# 解析结果缓存目录和总大小上限（字节），上限为0时禁用缓存
+PARSE_CACHE_DIR = os.getenv('PARSE_CACHE_DIR', './data/parse_cache')
+PARSE_CACHE_MAX_BYTES = int(os.getenv('PARSE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# 工作进程运行方式: embedded（随API服务启动）/ off（单独运行 python jobs.py）
+INGEST_WORKER = os.getenv('INGEST_WORKER', 'embedded')
+
+# 处理中文件的租约时长（秒），工作进程异常退出后超过该时间文件会被重新领取
+LEASE_SECONDS = float(os.getenv('INGEST_LEASE_SECONDS', '60'))
+
+# 续租间隔（秒）
+HEARTBEAT_INTERVAL = max(1.0, LEASE_SECONDS / 4)
+
+# 空闲时轮询新任务的间隔（秒）
+POLL_INTERVAL = float(os.getenv('INGEST_POLL_INTERVAL', '1'))
+
+# 解析进程的启动方式。内嵌工作进程运行在API服务的线程中，fork会把其他线程
+# 持有的锁（数据库连接、日志等）原样复制到子进程，因此用spawn启动全新的解释器
+PARSE_START_METHOD = os.getenv('PARSE_START_METHOD', 'spawn')
+
+# 单个文件最多领取次数，超过后标记失败（防止导致进程崩溃的文件反复重试）
+MAX_ATTEMPTS = 3
+
+# 文件状态
+STATUS_QUEUED = 'queued'
+STATUS_PARSING = 'parsing'
+STATUS_IMPORTING = 'importing'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+STATUS_DUPLICATE = 'duplicate'
+ACTIVE_STATUSES = (STATUS_PARSING, STATUS_IMPORTING)
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_DUPLICATE)
+
+# 任务状态（由文件状态汇总）: 除上述状态外，部分文件失败时为partial
+STATUS_RUNNING = 'running'
+STATUS_PARTIAL = 'partial'
+
+
+# 解析结果缓存（解析子进程和上传接口共用同一目录）
+parse_cache = ParseCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES, version=PARSER_VERSION)
+
+# 解析进程内共用的解析器（每个解析进程同一时间只解析一个文件）
+_document_parser = DocumentParser(page_workers=PDF_PAGE_WORKERS)
+
+
+def parse_document(
+    file_path: str,
+    file_hash: Optional[str] = None
+) -> Tuple[str, List[Dict], Optional[Dict], List[Dict], bool]:
+    """
+    在子进程中解析文档，优先使用解析缓存
+
+    标题总是从当前文件名提取，缓存只保存与文件名无关的条款和逐页耗时。
+
+    Args:
+        file_path: 文件路径
+        file_hash: 文件内容的SHA-256，未知时现场计算
+
+    Returns:
+        (法规标题, 条款列表, PDF逐页耗时汇总, 层级结构节点, 是否命中缓存)，
+        非PDF文件的耗时汇总为None
+    """
+    parser = _document_parser
+    file_hash = file_hash or file_digest(file_path)
+    title = parser.parse_title(file_path)
+
+    cached = parse_cache.get(file_hash)
+    if cached is not None:
+        return title, cached['clauses'], cached['page_stats'], cached['nodes'], True
+
+    title, clauses = parser.parse_file(file_path)
+    page_stats = parser.page_stats_summary() if parser.last_page_stats else None
+    parse_cache.put(file_hash, clauses, page_stats, parser.last_hierarchy)
+    return title, clauses, page_stats, parser.last_hierarchy, False
+
+
+# ============ 上传文件 ============
+
+def new_job_id() -> str:
+    """生成任务ID"""
+    return uuid.uuid4().hex
+
+
+def job_upload_dir(job_id: str) -> Path:
+    """任务上传文件的保存目录"""
+    return UPLOAD_DIR / job_id
+
+
+def job_file_path(job_id: str, index: int, filename: str) -> Path:
+    """
+    任务中第index个上传文件的保存路径
+
+    每个文件使用独立目录，避免同一批次中的同名文件互相覆盖；
+    保留原文件名，解析器据此提取法规标题。
+    """
+    return job_upload_dir(job_id) / str(index) / os.path.basename(filename)
+
+
+async def save_upload(upload_file, destination: Path) -> str:
+    """
+    把上传文件分块写入磁盘，不一次性读入内存
+
+    Returns:
+        文件内容的SHA-256（写盘时顺带计算，不再重新读取文件）
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+
+    def write_chunk(buffer, chunk):
+        buffer.write(chunk)
+        digest.update(chunk)
+
+    with open(destination, "wb") as buffer:
+        while True:
+            chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await run_in_threadpool(write_chunk, buffer, chunk)
+    return digest.hexdigest()
+
+
+def remove_job_file(file_path: str):
+    """删除已处理的上传文件及其空目录"""
+    path = Path(file_path)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    for directory in (path.parent, path.parent.parent):
+        try:
+            directory.rmdir()
+        except OSError:
+            break
+
+
+# ============ 任务登记和查询 ============
+
+def find_cached_duplicate(session: Session, file_hash: Optional[str]) -> Optional[Dict]:
+    """
+    根据解析缓存判断上传文件是否与已有法规重复
+
+    Args:
+        session: 数据库会话
+        file_hash: 文件内容的SHA-256
+
+    Returns:
+        已有法规的ID、标题和条款数；文件不在缓存中或没有重复时返回None
+    """
+    if not file_hash:
+        return None
+    cached = parse_cache.get(file_hash)
+    if cached is None:
+        return None
+    return find_duplicate_regulation(session, cached['clauses'])
+
+
+def create_job(session: Session, job_id: str, files: List[Tuple[str, str, Optional[str]]]) -> Dict:
+    """
+    登记导入任务
+
+    与已有法规重复的文件直接登记为duplicate并删除，不进入队列。
+
+    Args:
+        session: 数据库会话
+        job_id: 任务ID
+        files: (原始文件名, 已保存路径, 文件内容的SHA-256) 列表
+
+    Returns:
+        任务状态
+    """
+    now = time.time()
+    rows = []
+    duplicate_paths = []
+    for filename, file_path, file_hash in files:
+        row = {
+            'job_id': job_id,
+            'filename': filename,
+            'file_path': file_path,
+            'file_hash': file_hash,
+            'status': STATUS_QUEUED,
+            'attempts': 0
+        }
+        duplicate = find_cached_duplicate(session, file_hash)
+        if duplicate is not None:
+            row.update(duplicate, status=STATUS_DUPLICATE, parse_cached=True,
+                       started_at=now, finished_at=now)
+            duplicate_paths.append(file_path)
+        rows.append(row)
+
+    job = IngestJob(id=job_id, created_at=now)
+    session.add(job)
+    session.flush()
+    session.execute(insert(IngestJobFile), rows)
+    session.commit()
+
+    for file_path in duplicate_paths:
+        remove_job_file(file_path)
+    return get_job(session, job_id)
+
+
+def submit_job(job_id: str, files: List[Tuple[str, str, Optional[str]]]) -> Dict:
+    """使用独立会话登记任务并唤醒内嵌工作进程（在线程池中执行）"""
+    db = SessionLocal()
+    try:
+        job = create_job(db, job_id, files)
+    finally:
+        db.close()
+    notify_worker()
+    return job
+
+
+def _file_status(file: IngestJobFile) -> Dict:
+    """单个文件的处理状态"""
+    return {
+        'file_id': file.id,
+        'filename': file.filename,
+        'status': file.status,
+        'attempts': file.attempts,
+        'started_at': file.started_at,
+        'finished_at': file.finished_at,
+        'parse_seconds': file.parse_seconds,
+        'parse_cached': file.parse_cached,
+        'import_seconds': file.import_seconds,
+        'page_stats': json.loads(file.page_stats) if file.page_stats else None,
+        'regulation_id': file.regulation_id,
+        'regulation_title': file.regulation_title,
+        'clause_count': file.clause_count,
+        'error': file.error
+    }
+
+
+def summarize_job(job: IngestJob, files: List[IngestJobFile]) -> Dict:
+    """
+    汇总任务进度和吞吐量
+
+    Args:
+        job: 任务
+        files: 任务中的文件
+
+    Returns:
+        任务状态，包含总体进度、吞吐量、每个文件的状态和错误列表
+    """
+    counts = {status: 0 for status in (STATUS_QUEUED,) + FINISHED_STATUSES}
+    for file in files:
+        if file.status in counts:
+            counts[file.status] += 1
+    total = len(files)
+    finished = counts[STATUS_SUCCEEDED] + counts[STATUS_FAILED] + counts[STATUS_DUPLICATE]
+
+    # 重复上传的文件视为成功（法规已在系统中）
+    if finished == total:
+        if counts[STATUS_FAILED] == 0:
+            status = STATUS_SUCCEEDED
+        elif counts[STATUS_FAILED] == total:
+            status = STATUS_FAILED
+        else:
+            status = STATUS_PARTIAL
+    elif counts[STATUS_QUEUED] == total:
+        status = STATUS_QUEUED
+    else:
+        status = STATUS_RUNNING
+
+    started = [f.started_at for f in files if f.started_at is not None]
+    started_at = min(started) if started else None
+    finished_at = None
+    if finished == total and total:
+        finished_at = max(f.finished_at or 0 for f in files) or None
+
+    clauses_imported = sum(f.clause_count or 0 for f in files if f.status == STATUS_SUCCEEDED)
+    elapsed = None
+    if started_at is not None:
+        elapsed = (finished_at or time.time()) - started_at
+
+    def per_second(count):
+        return round(count / elapsed, 2) if elapsed else None
+
+    return {
+        'job_id': job.id,
+        'status': status,
+        'created_at': job.created_at,
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'progress': {
+            'total_files': total,
+            'finished_files': finished,
+            'succeeded_files': counts[STATUS_SUCCEEDED],
+            'failed_files': counts[STATUS_FAILED],
+            'duplicate_files': counts[STATUS_DUPLICATE],
+            'percent': round(finished * 100 / total, 1) if total else 100.0
+        },
+        'throughput': {
+            'elapsed_seconds': round(elapsed, 3) if elapsed is not None else None,
+            'clauses_imported': clauses_imported,
+            'files_per_second': per_second(finished),
+            'clauses_per_second': per_second(clauses_imported)
+        },
+        'files': [_file_status(f) for f in files],
+        'errors': [
+            {'file_id': f.id, 'filename': f.filename, 'error': f.error}
+            for f in files if f.status == STATUS_FAILED
+        ]
+    }
+
+
+def get_job(session: Session, job_id: str) -> Optional[Dict]:
+    """
+    查询任务状态
+
+    Returns:
+        任务状态，不存在时返回None
+    """
+    job = session.get(IngestJob, job_id)
+    if job is None:
+        return None
+    files = session.scalars(
+        select(IngestJobFile)
+        .where(IngestJobFile.job_id == job_id)
+        .order_by(IngestJobFile.id)
+    ).all()
+    return summarize_job(job, files)
+
+
+def list_jobs(session: Session, limit: int = 20) -> List[Dict]:
+    """查询最近创建的任务"""
+    jobs = session.scalars(
+        select(IngestJob).order_by(IngestJob.created_at.desc()).limit(limit)
+    ).all()
+    if not jobs:
+        return []
+
+    files_by_job = {job.id: [] for job in jobs}
+    for file in session.scalars(
+        select(IngestJobFile)
+        .where(IngestJobFile.job_id.in_(list(files_by_job)))
+        .order_by(IngestJobFile.id)
+    ):
+        files_by_job[file.job_id].append(file)
+    return [summarize_job(job, files_by_job[job.id]) for job in jobs]
+
+
+# ============ 工作进程 ============
+
+
+class IngestWorker:
+    """
+    导入任务工作进程
+
+    领取待处理文件提交给解析进程池，最多同时解析parse_workers个文件；
+    解析完成后在同一个事务中写入法规和更新文件状态。
+    """
+
+    def __init__(self, session_factory=SessionLocal, parse_workers: int = PARSE_WORKERS,
+                 worker_id: Optional[str] = None, semantic_index_dir: str = SEMANTIC_INDEX_DIR):
+        """
+        初始化工作进程
+
+        Args:
+            session_factory: 数据库会话工厂
+            parse_workers: 解析进程数
+            worker_id: 工作进程标识，默认由主机名和进程号生成
+            semantic_index_dir: 语义索引目录，队列处理完后增量更新（索引不存在时跳过）
+        """
+        self.session_factory = session_factory
+        self.parse_workers = max(1, parse_workers)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.semantic_index_dir = semantic_index_dir
+        self._imported = False
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self):
+        """有新任务时唤醒工作进程，不必等到下一次轮询"""
+        self._wakeup.set()
+
+    def start(self):
+        """在后台线程中运行"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='ingest-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止后台线程，未处理完的文件退回队列"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def claim_next(self) -> Optional[Tuple[int, str, str, Optional[str]]]:
+        """
+        领取下一个待处理文件
+
+        单条UPDATE语句同时完成选取和加锁，多个工作进程并发领取时
+        不会拿到同一个文件。租约已过期的处理中文件也会被领取。
+
+        Returns:
+            (文件ID, 文件路径, 原始文件名, 文件哈希)，没有待处理文件时返回None
+        """
+        now = time.time()
+        expired = and_(
+            IngestJobFile.status.in_(ACTIVE_STATUSES),
+            IngestJobFile.lease_expires_at < now
+        )
+
+        with self.session_factory() as session:
+            # 重试次数用尽的中断文件不再领取（租约过期的，以及解析进程崩溃后退回队列的）
+            session.execute(
+                update(IngestJobFile)
+                .where(or_(IngestJobFile.status == STATUS_QUEUED, expired),
+                       IngestJobFile.attempts >= MAX_ATTEMPTS)
+                .values(status=STATUS_FAILED, finished_at=now, lease_expires_at=None,
+                        error=f"处理中断次数过多（{MAX_ATTEMPTS}次），已放弃")
+                .execution_options(synchronize_session=False)
+            )
+
+            candidate = (
+                select(IngestJobFile.id)
+                .where(or_(IngestJobFile.status == STATUS_QUEUED, expired))
+                .order_by(IngestJobFile.id)
+                .limit(1)
+                .scalar_subquery()
+            )
+            row = session.execute(
+                update(IngestJobFile)
+                .where(IngestJobFile.id == candidate)
+                .values(status=STATUS_PARSING, worker_id=self.worker_id,
+                        attempts=IngestJobFile.attempts + 1,
+                        lease_expires_at=now + LEASE_SECONDS, started_at=now,
+                        error=None)
+                .returning(IngestJobFile.id, IngestJobFile.file_path, IngestJobFile.filename,
+                           IngestJobFile.file_hash)
+                .execution_options(synchronize_session=False)
+            ).first()
+            session.commit()
+
+        return tuple(row) if row else None
+
+    def renew_leases(self, file_ids: List[int]):
+        """为处理中的文件续租"""
+        if not file_ids:
+            return
+        with self.session_factory() as session:
+            session.execute(
+                update(IngestJobFile)
+                .where(IngestJobFile.id.in_(file_ids),
+                       IngestJobFile.worker_id == self.worker_id,
+                       IngestJobFile.status.in_(ACTIVE_STATUSES))
+                .values(lease_expires_at=time.time() + LEASE_SECONDS)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+    def release(self, file_ids: List[int], count_attempt: bool = True):
+        """
+        把未处理完的文件退回队列（工作进程停止或解析进程池崩溃时）
+
+        Args:
+            file_ids: 文件ID列表
+            count_attempt: 是否计入领取次数；工作进程正常停止时不计入，
+                解析进程池崩溃时计入，导致崩溃的文件领取MAX_ATTEMPTS次后被标记失败
+        """
+        if not file_ids:
+            return
+        attempts = IngestJobFile.attempts if count_attempt else IngestJobFile.attempts - 1
+        with self.session_factory() as session:
+            session.execute(
+                update(IngestJobFile)
+                .where(IngestJobFile.id.in_(file_ids),
+                       IngestJobFile.worker_id == self.worker_id,
+                       IngestJobFile.status.in_(ACTIVE_STATUSES))
+                .values(status=STATUS_QUEUED, worker_id=None, lease_expires_at=None, attempts=attempts)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+    def finish(self, file_id: int, file_path: str, filename: str,
+               parse_result: Tuple[str, List[Dict], Optional[Dict], List[Dict], bool],
+               parse_seconds: float):
+        """
+        写入解析结果并更新文件状态
+
+        法规、条款、层级结构和文件状态在同一个事务中提交；如果文件已被其他工作进程
+        接管（本进程租约过期），回滚写入，避免重复导入。条款与已有法规
+        完全相同时不写法规表，文件标记为duplicate。
+
+        Args:
+            file_id: 文件ID
+            file_path: 上传文件路径
+            filename: 原始文件名
+            parse_result: 解析结果 (法规标题, 条款列表, 逐页耗时汇总, 层级结构节点, 是否命中缓存)，
+                解析失败时为异常对象
+            parse_seconds: 解析耗时
+        """
+        owned = and_(IngestJobFile.id == file_id, IngestJobFile.worker_id == self.worker_id)
+        values = {'parse_seconds': round(parse_seconds, 3)}
+
+        with self.session_factory() as session:
+            try:
+                if isinstance(parse_result, BaseException):
+                    raise parse_result
+                title, clauses, page_stats, nodes, cached = parse_result
+                values['parse_cached'] = cached
+                if page_stats is not None:
+                    values['page_stats'] = json.dumps(page_stats, ensure_ascii=False)
+
+                duplicate = find_duplicate_regulation(session, clauses)
+                if duplicate is not None:
+                    values.update(duplicate, status=STATUS_DUPLICATE)
+                else:
+                    session.execute(
+                        update(IngestJobFile).where(owned)
+                        .values(status=STATUS_IMPORTING)
+                        .execution_options(synchronize_session=False)
+                    )
+                    session.commit()
+
+                    start = time.perf_counter()
+                    result = import_parsed_regulation(session, title, filename, clauses)
+                    store_hierarchy(session, result['regulation_id'], nodes)
+                    values.update(
+                        status=STATUS_SUCCEEDED,
+                        import_seconds=round(time.perf_counter() - start, 3),
+                        **result
+                    )
+            except IngestError as e:
+                session.rollback()
+                values.update(status=STATUS_FAILED, error=str(e))
+            except Exception as e:
+                session.rollback()
+                values.update(status=STATUS_FAILED, error=f"文档处理失败: {str(e)}")
+
+            updated = session.execute(
+                update(IngestJobFile).where(owned)
+                .values(finished_at=time.time(), lease_expires_at=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+            if updated.rowcount == 0:
+                session.rollback()
+                return
+            session.commit()
+
+        self._imported = self._imported or values.get('status') == STATUS_SUCCEEDED
+        remove_job_file(file_path)
+
+    def refresh_semantic_index(self):
+        """
+        有新导入的法规时增量更新语义索引
+
+        队列处理完后调用一次，一批上传只更新一次。更新失败不影响导入结果，
+        下一次更新或重建时会补上。
+        """
+        if not self._imported:
+            return
+        self._imported = False
+        try:
+            with self.session_factory() as session:
+                update_semantic_index(session, self.semantic_index_dir)
+        except Exception as e:
+            print(f"语义索引更新失败: {e}")
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        """创建解析进程池"""
+        return ProcessPoolExecutor(max_workers=self.parse_workers,
+                                   mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+
+    def run(self, until_idle: bool = False):
+        """
+        工作循环
+
+        Args:
+            until_idle: 为True时队列为空即返回（用于测试和批量导入脚本）
+        """
+        executor = self._new_executor()
+        inflight = {}
+        last_heartbeat = time.monotonic()
+
+        try:
+            while not self._stop.is_set():
+                while len(inflight) < self.parse_workers:
+                    claimed = self.claim_next()
+                    if claimed is None:
+                        break
+                    file_id, file_path, filename, file_hash = claimed
+                    future = executor.submit(parse_document, file_path, file_hash)
+                    inflight[future] = (file_id, file_path, filename, time.perf_counter())
+
+                if not inflight:
+                    self.refresh_semantic_index()
+                    if until_idle:
+                        break
+                    self._wakeup.wait(POLL_INTERVAL)
+                    self._wakeup.clear()
+                    continue
+
+                done, _ = wait(inflight, timeout=HEARTBEAT_INTERVAL, return_when=FIRST_COMPLETED)
+                broken = []
+                for future in done:
+                    file_id, file_path, filename, submitted = inflight.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        broken.append(file_id)
+                        continue
+                    self.finish(file_id, file_path, filename,
+                                error or future.result(), time.perf_counter() - submitted)
+
+                if broken:
+                    # 解析进程崩溃时进程池不可再用: 退回文件并重建进程池，
+                    # 导致崩溃的文件在重试MAX_ATTEMPTS次后被标记失败
+                    broken.extend(file_id for file_id, _, _, _ in inflight.values())
+                    inflight.clear()
+                    self.release(broken)
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = self._new_executor()
+
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.renew_leases([file_id for file_id, _, _, _ in inflight.values()])
+                    last_heartbeat = time.monotonic()
+        finally:
+            self.release([file_id for file_id, _, _, _ in inflight.values()], count_attempt=False)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_embedded_worker: Optional[IngestWorker] = None
+
+
+def start_embedded_worker():
+    """随API服务启动内嵌工作进程（INGEST_WORKER=embedded时）"""
+    global _embedded_worker
+    if INGEST_WORKER != 'embedded' or _embedded_worker is not None:
+        return
+    _embedded_worker = IngestWorker()
+    _embedded_worker.start()
+
+
+def stop_embedded_worker():
+    """停止内嵌工作进程"""
+    global _embedded_worker
+    if _embedded_worker is not None:
+        _embedded_worker.stop(timeout=10)
+        _embedded_worker = None
+
+
+def notify_worker():
+    """唤醒内嵌工作进程（独立运行的工作进程靠轮询发现新任务）"""
+    if _embedded_worker is not None:
+        _embedded_worker.notify()
+
+
+if __name__ == "__main__":
+    from database import migrate_database
+
+    migrate_database()
+    worker = IngestWorker()
+    print(f"导入任务工作进程已启动: {worker.worker_id}（解析进程数 {worker.parse_workers}）")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        print("\n工作进程已停止")
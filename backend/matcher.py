@@ -4,9 +4,71 @@
 实现基于审核规则的条款匹配逻辑
 """
 
+import os
+from itertools import chain
 from typing import List, Dict, Optional
+from sqlalchemy import event, func, text
 from sqlalchemy.orm import Session
 from database import AuditRule, AuditorRole, DocumentType, Clause, Regulation
+from search_index import FTS_TABLE, find_highlights
+from search_query import parse_query
+from cache import TTLCache
+
+
+# ============ 匹配结果缓存 ============
+
+# /api/match的结果只在规则、条款或法规变更时才会变化，按(角色, 单据类型)缓存
+match_cache = TTLCache(
+    maxsize=int(os.getenv('MATCH_CACHE_SIZE', '256')),
+    ttl=float(os.getenv('MATCH_CACHE_TTL', '300'))  # 兜底其他进程（如init_data.py）写库的情况
+)
+
+# 写入这些表会影响匹配结果（角色/单据类型改名或删除同样会改变结果）
+_MATCH_TABLES = {'audit_rules', 'clauses', 'regulations', 'auditor_roles', 'document_types'}
+_MATCH_MODELS = (AuditRule, Clause, Regulation, AuditorRole, DocumentType)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_match_cache_stale(session, flush_context):
+    """ORM写入相关表时标记缓存失效，等事务提交后再清空"""
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _MATCH_MODELS):
+            session.info['match_cache_stale'] = True
+            break
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_match_cache_stale_bulk(orm_execute_state):
+    """批量insert/update/delete语句同样需要标记缓存失效"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name in _MATCH_TABLES:
+        orm_execute_state.session.info['match_cache_stale'] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_match_cache(session):
+    """事务提交后清空匹配结果缓存"""
+    if session.info.pop('match_cache_stale', False):
+        match_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_match_cache_mark(session):
+    """事务回滚时数据未变化，丢弃失效标记"""
+    session.info.pop('match_cache_stale', None)
+
+
+def _like_pattern(value: str) -> str:
+    """
+    包含value的LIKE模式，转义其中的 \\、% 和 _（SQL中需配合 ESCAPE '\\' 使用）
+
+    检索词和法规标题中的 % 和 _ 按字面匹配，例如“10%”不再匹配任意以10开头的文字。
+    """
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
 
 
 class SimpleMatcher:
@@ -36,41 +98,58 @@ class SimpleMatcher:
         Returns:
             匹配的条款列表
         """
-        # 查询匹配的审核规则
-        rules = (
-            self.session.query(AuditRule)
+        # 一次联表查询取出所需的全部列，避免逐行懒加载条款和法规
+        rows = (
+            self.session.query(
+                Clause.id,
+                Regulation.id,
+                Regulation.title,
+                Clause.clause_number,
+                Clause.content,
+                AuditRule.source,
+                AuditRule.priority
+            )
+            .select_from(AuditRule)
             .join(AuditorRole, AuditRule.role_id == AuditorRole.id)
             .join(DocumentType, AuditRule.document_type_id == DocumentType.id)
             .join(Clause, AuditRule.clause_id == Clause.id)
+            .join(Regulation, Clause.regulation_id == Regulation.id)
             .filter(
                 AuditorRole.role_name == role_name,
                 DocumentType.type_name == document_type
             )
-            .order_by(AuditRule.priority.desc())  # 按优先级排序
+            .order_by(AuditRule.priority.desc(), AuditRule.id)  # 按优先级排序
             .all()
         )
         
-        if not rules:
-            return []
-        
         # 格式化返回结果
         results = []
-        for rule in rules:
-            clause = rule.clause
-            regulation = clause.regulation
-            
+        for (clause_id, regulation_id, regulation_title, clause_number,
+             content, source, priority) in rows:
             results.append({
-                'clause_id': clause.id,
-                'regulation_id': regulation.id,
-                'regulation_title': regulation.title,
-                'clause_number': clause.clause_number,
-                'content': clause.content,
-                'source': rule.source,
-                'priority': rule.priority
+                'clause_id': clause_id,
+                'regulation_id': regulation_id,
+                'regulation_title': regulation_title,
+                'clause_number': clause_number,
+                'content': content,
+                'source': source,
+                'priority': priority
             })
         
         return results
     
+    def role_exists(self, role_name: str) -> bool:
+        """检查审核角色是否存在"""
+        return self.session.query(
+            self.session.query(AuditorRole).filter(AuditorRole.role_name == role_name).exists()
+        ).scalar()
+    
+    def document_type_exists(self, type_name: str) -> bool:
+        """检查单据类型是否存在"""
+        return self.session.query(
+            self.session.query(DocumentType).filter(DocumentType.type_name == type_name).exists()
+        ).scalar()
+    
     def get_all_roles(self) -> List[Dict]:
         """
         获取所有审核角色
@@ -105,6 +184,67 @@ class SimpleMatcher:
             for dt in doc_types
         ]
     
+    def get_all_audit_rules(self) -> List[Dict]:
+        """
+        获取所有审核规则
+        
+        Returns:
+            审核规则列表，包含角色、单据类型、条款及所属法规信息
+        """
+        # 一次联表查询取出所需的全部列，避免逐行懒加载角色、单据类型、条款和法规
+        rows = (
+            self.session.query(
+                AuditRule.id,
+                AuditorRole.id,
+                AuditorRole.role_name,
+                DocumentType.id,
+                DocumentType.type_name,
+                Clause.id,
+                Clause.clause_number,
+                Clause.content,
+                Regulation.id,
+                Regulation.title,
+                AuditRule.source,
+                AuditRule.priority
+            )
+            .select_from(AuditRule)
+            .join(AuditorRole, AuditRule.role_id == AuditorRole.id)
+            .join(DocumentType, AuditRule.document_type_id == DocumentType.id)
+            .join(Clause, AuditRule.clause_id == Clause.id)
+            .join(Regulation, Clause.regulation_id == Regulation.id)
+            .order_by(AuditRule.id)
+            .all()
+        )
+        
+        results = []
+        for (rule_id, role_id, role_name, doc_type_id, type_name, clause_id,
+             clause_number, content, regulation_id, regulation_title,
+             source, priority) in rows:
+            results.append({
+                'id': rule_id,
+                'role': {
+                    'id': role_id,
+                    'role_name': role_name
+                },
+                'document_type': {
+                    'id': doc_type_id,
+                    'type_name': type_name
+                },
+                'clause': {
+                    'id': clause_id,
+                    'clause_number': clause_number,
+                    'content': content,
+                    'regulation': {
+                        'id': regulation_id,
+                        'title': regulation_title
+                    }
+                },
+                'source': source,
+                'priority': priority
+            })
+        
+        return results
+    
     def get_regulations_summary(self) -> List[Dict]:
         """
         获取所有法规的摘要信息
@@ -112,18 +252,26 @@ class SimpleMatcher:
         Returns:
             法规摘要列表
         """
-        regulations = self.session.query(Regulation).all()
+        # 一次分组聚合得到每部法规的条款数（外连接保留没有条款的法规）
+        rows = (
+            self.session.query(
+                Regulation.id,
+                Regulation.title,
+                Regulation.source_file,
+                func.count(Clause.id)
+            )
+            .outerjoin(Clause, Clause.regulation_id == Regulation.id)
+            .group_by(Regulation.id)
+            .order_by(Regulation.id)
+            .all()
+        )
         
         results = []
-        for reg in regulations:
-            clause_count = self.session.query(Clause).filter(
-                Clause.regulation_id == reg.id
-            ).count()
-            
+        for regulation_id, title, source_file, clause_count in rows:
             results.append({
-                'id': reg.id,
-                'title': reg.title,
-                'source_file': reg.source_file,
+                'id': regulation_id,
+                'title': title,
+                'source_file': source_file,
                 'clause_count': clause_count
             })
         
@@ -131,35 +279,142 @@ class SimpleMatcher:
     
     def search_clauses_by_keyword(self, keyword: str, limit: int = 20) -> List[Dict]:
         """
-        根据关键词搜索条款
+        根据关键词或检索式搜索条款
+        
+        支持AND/OR/NOT、引号短语和法规过滤（语法见search_query模块）。
+        整个检索式编译为一个FTS5查询，在全文索引上一次求值，
+        并按BM25相关度排序。BM25所需的词频、文档长度等统计量由FTS5
+        在建索引时维护，查询时无需重新计算。
         
         Args:
-            keyword: 搜索关键词
+            keyword: 搜索关键词或检索式
             limit: 返回结果数量限制
             
         Returns:
-            匹配的条款列表
+            匹配的条款列表，包含相关度得分score和命中位置highlights
+            
+        Raises:
+            QuerySyntaxError: 检索式语法错误
         """
-        clauses = (
-            self.session.query(Clause)
-            .join(Regulation)
-            .filter(Clause.content.like(f'%{keyword}%'))
-            .limit(limit)
-            .all()
-        )
+        parsed = parse_query(keyword)
+        params = {'limit': limit}
+        conditions = []
+        highlight_terms = parsed.highlight_terms
+        
+        if parsed.match_expression is not None:
+            # FTS5的bm25()越小越相关，取负值作为得分
+            sql = f"""
+                SELECT c.id, r.title, c.clause_number, c.content,
+                       -bm25({FTS_TABLE}) AS score
+                FROM {FTS_TABLE} f
+                JOIN clauses c ON c.id = f.rowid
+                JOIN regulations r ON r.id = c.regulation_id
+            """
+            conditions.append(f"{FTS_TABLE} MATCH :match_query")
+            params['match_query'] = parsed.match_expression
+            
+            # 含有标点或空白的检索词，索引只能保证各段文字都出现，需再核对原文
+            # （只核对顶层的必选词，OR或NOT中的检索词不核对，见ParsedQuery.verify_terms）
+            for i, term in enumerate(parsed.verify_terms):
+                conditions.append(f"c.content LIKE :verify_{i} ESCAPE '\\'")
+                params[f'verify_{i}'] = _like_pattern(term)
+        else:
+            sql = """
+                SELECT c.id, r.title, c.clause_number, c.content, 0.0 AS score
+                FROM clauses c
+                JOIN regulations r ON r.id = c.regulation_id
+            """
+            if not parsed.regulation_filters:
+                # 关键词只有标点符号，无法使用索引，退回原文匹配
+                conditions.append("c.content LIKE :pattern ESCAPE '\\'")
+                params['pattern'] = _like_pattern(keyword.strip())
+                highlight_terms = [keyword.strip()]
+        
+        if parsed.regulation_filters:
+            title_conditions = []
+            for i, title in enumerate(parsed.regulation_filters):
+                title_conditions.append(f"r.title LIKE :regulation_{i} ESCAPE '\\'")
+                params[f'regulation_{i}'] = _like_pattern(title)
+            conditions.append('(' + ' OR '.join(title_conditions) + ')')
+        
+        for i, title in enumerate(parsed.excluded_regulations):
+            conditions.append(f"r.title NOT LIKE :excluded_{i} ESCAPE '\\'")
+            params[f'excluded_{i}'] = _like_pattern(title)
+        
+        sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY score DESC, c.id LIMIT :limit"
+        rows = self.session.execute(text(sql), params).all()
         
         results = []
-        for clause in clauses:
+        for clause_id, regulation_title, clause_number, content, score in rows:
             results.append({
-                'clause_id': clause.id,
-                'regulation_title': clause.regulation.title,
-                'clause_number': clause.clause_number,
-                'content': clause.content
+                'clause_id': clause_id,
+                'regulation_title': regulation_title,
+                'clause_number': clause_number,
+                'content': content,
+                'score': round(score, 4),
+                'highlights': find_highlights(content, highlight_terms)
             })
         
         return results
 
 
+class AsyncSimpleMatcher:
+    """
+    SimpleMatcher的异步版本
+    
+    基于AsyncSession，通过run_sync在异步会话上执行与SimpleMatcher相同的查询，
+    数据库IO以协程方式等待，不占用线程池。
+    """
+    
+    def __init__(self, db_session):
+        """
+        初始化匹配器
+        
+        Args:
+            db_session: 异步数据库会话(AsyncSession)
+        """
+        self.session = db_session
+    
+    async def _run(self, method_name: str, *args):
+        """在异步会话上调用SimpleMatcher的同名方法"""
+        return await self.session.run_sync(
+            lambda session: getattr(SimpleMatcher(session), method_name)(*args)
+        )
+    
+    async def match_clauses(self, role_name: str, document_type: str) -> List[Dict]:
+        """根据审核角色和单据类型匹配相关条款"""
+        return await self._run('match_clauses', role_name, document_type)
+    
+    async def role_exists(self, role_name: str) -> bool:
+        """检查审核角色是否存在"""
+        return await self._run('role_exists', role_name)
+    
+    async def document_type_exists(self, type_name: str) -> bool:
+        """检查单据类型是否存在"""
+        return await self._run('document_type_exists', type_name)
+    
+    async def get_all_roles(self) -> List[Dict]:
+        """获取所有审核角色"""
+        return await self._run('get_all_roles')
+    
+    async def get_all_document_types(self) -> List[Dict]:
+        """获取所有单据类型"""
+        return await self._run('get_all_document_types')
+    
+    async def get_all_audit_rules(self) -> List[Dict]:
+        """获取所有审核规则"""
+        return await self._run('get_all_audit_rules')
+    
+    async def get_regulations_summary(self) -> List[Dict]:
+        """获取所有法规的摘要信息"""
+        return await self._run('get_regulations_summary')
+    
+    async def search_clauses_by_keyword(self, keyword: str, limit: int = 20) -> List[Dict]:
+        """根据关键词或检索式搜索条款"""
+        return await self._run('search_clauses_by_keyword', keyword, limit)
+
+
 def test_matcher():
     """测试匹配器功能"""
     from database import SessionLocal
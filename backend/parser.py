@@ -6,7 +6,14 @@
 
 import re
 import os
-from typing import List, Dict, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional
+
+from segmenter import segment_clauses
+
+# 文件名中的日期后缀和扩展名，如 "_20240101.md"
+TITLE_SUFFIX_PATTERN = re.compile(r'_\d{8}\.md$')
 
 
 class RegulationParser:
@@ -14,15 +21,8 @@ class RegulationParser:
     
     def __init__(self):
         """初始化解析器"""
-        # 条款编号的正则模式
-        # 匹配：第X条、第X章、第X节等
-        self.clause_pattern = re.compile(
-            r'第[零一二三四五六七八九十百千]+条[\s\S]*?(?=第[零一二三四五六七八九十百千]+条|$)',
-            re.MULTILINE
-        )
-        
-        # 用于提取条款编号
-        self.number_pattern = re.compile(r'第[零一二三四五六七八九十百千]+条')
+        # 最近一次parse_directory的进程数、总耗时和每个文件的解析耗时，尚未解析时为空
+        self.last_parse_stats: Dict = {}
     
     def parse_file(self, file_path: str) -> Tuple[str, List[Dict]]:
         """
@@ -39,7 +39,7 @@ class RegulationParser:
         
         # 提取文件名作为法规标题（去掉日期和.md后缀）
         filename = os.path.basename(file_path)
-        title = re.sub(r'_\d{8}\.md$', '', filename)
+        title = TITLE_SUFFIX_PATTERN.sub('', filename)
         
         # 提取所有条款
         clauses = self._extract_clauses(content)
@@ -56,55 +56,75 @@ class RegulationParser:
         Returns:
             条款列表，每个条款包含编号和内容
         """
-        clauses = []
-        
-        # 使用正则表达式查找所有"第X条"
-        matches = self.clause_pattern.finditer(content)
-        
-        for match in matches:
-            clause_text = match.group(0).strip()
-            
-            # 提取条款编号
-            number_match = self.number_pattern.search(clause_text)
-            if number_match:
-                clause_number = number_match.group(0)
-                
-                # 清理条款内容（去除多余空白）
-                clause_content = clause_text.strip()
-                clause_content = re.sub(r'\s+', ' ', clause_content)
-                
-                # 跳过太短的条款（可能是误匹配）
-                if len(clause_content) > 10:
-                    clauses.append({
-                        'clause_number': clause_number,
-                        'content': clause_content
-                    })
-        
-        return clauses
+        return segment_clauses(content)
     
-    def parse_directory(self, directory_path: str) -> List[Tuple[str, str, List[Dict]]]:
+    def parse_directory(
+        self,
+        directory_path: str,
+        workers: int = 1,
+        verbose: bool = True
+    ) -> List[Tuple[str, str, List[Dict]]]:
         """
         解析整个目录中的所有法规文档
         
+        workers大于1时使用多进程并行解析。无论是否并行，结果都按文件名排序，
+        输出顺序确定；每个文件的解析耗时记录在 self.last_parse_stats 中。
+        
         Args:
             directory_path: 目录路径
+            workers: 解析进程数，1表示在当前进程中逐个解析
+            verbose: 是否逐个打印解析结果
             
         Returns:
             列表，每个元素为 (法规标题, 源文件路径, 条款列表)
         """
-        results = []
-        
         # 遍历目录中的所有.md文件
-        for filename in os.listdir(directory_path):
-            if filename.endswith('.md'):
-                file_path = os.path.join(directory_path, filename)
-                
-                try:
-                    title, clauses = self.parse_file(file_path)
-                    results.append((title, file_path, clauses))
-                    print(f"✓ 已解析: {title} ({len(clauses)} 条)")
-                except Exception as e:
-                    print(f"✗ 解析失败: {filename} - {str(e)}")
+        file_paths = [
+            os.path.join(directory_path, filename)
+            for filename in sorted(os.listdir(directory_path))
+            if filename.endswith('.md')
+        ]
+        
+        workers = max(1, min(workers, len(file_paths)))
+        start = time.perf_counter()
+        
+        if workers == 1:
+            outcomes = [_parse_file_timed(file_path) for file_path in file_paths]
+        else:
+            # 小文件很多时按块分发，减少进程间通信次数
+            chunksize = max(1, len(file_paths) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(_parse_file_timed, file_paths, chunksize=chunksize))
+        
+        elapsed = time.perf_counter() - start
+        
+        results = []
+        file_stats = []
+        for file_path, (title, clauses, seconds, error) in zip(file_paths, outcomes):
+            filename = os.path.basename(file_path)
+            if error is None:
+                results.append((title, file_path, clauses))
+                if verbose:
+                    print(f"✓ 已解析: {title} ({len(clauses)} 条, {seconds * 1000:.1f} ms)")
+            else:
+                print(f"✗ 解析失败: {filename} - {error}")
+            file_stats.append({
+                'file': filename,
+                'title': title,
+                'clause_count': len(clauses),
+                'seconds': seconds,
+                'error': error
+            })
+        
+        self.last_parse_stats = {
+            'workers': workers,
+            'file_count': len(file_paths),
+            'failed_count': sum(1 for stat in file_stats if stat['error'] is not None),
+            'clause_count': sum(stat['clause_count'] for stat in file_stats),
+            'elapsed_seconds': elapsed,
+            'files_per_second': len(file_paths) / elapsed if elapsed else 0.0,
+            'files': file_stats
+        }
         
         return results
     
@@ -138,6 +158,30 @@ class RegulationParser:
         return results
 
 
+_process_parser: Optional[RegulationParser] = None
+
+
+def _parse_file_timed(file_path: str) -> Tuple[Optional[str], List[Dict], float, Optional[str]]:
+    """
+    解析单个文件并计时（可在子进程中执行）
+    
+    异常在这里捕获并作为结果返回，单个文件失败不影响其余文件。
+    
+    Returns:
+        (法规标题, 条款列表, 耗时秒数, 错误信息)
+    """
+    global _process_parser
+    if _process_parser is None:
+        _process_parser = RegulationParser()
+    
+    start = time.perf_counter()
+    try:
+        title, clauses = _process_parser.parse_file(file_path)
+        return title, clauses, time.perf_counter() - start, None
+    except Exception as e:
+        return None, [], time.perf_counter() - start, str(e)
+
+
 def test_parser():
     """测试解析器功能"""
     parser = RegulationParser()
@@ -146,9 +190,11 @@ def test_parser():
     regulations_dir = '../regulations'
     if os.path.exists(regulations_dir):
         print("开始解析法规文档...")
-        results = parser.parse_directory(regulations_dir)
+        results = parser.parse_directory(regulations_dir, workers=os.cpu_count() or 1)
         
-        print(f"\n总共解析 {len(results)} 个法规文档")
+        stats = parser.last_parse_stats
+        print(f"\n总共解析 {len(results)} 个法规文档"
+              f"（{stats['workers']} 个进程，耗时 {stats['elapsed_seconds']:.3f} 秒）")
         
         # 显示每个法规的条款数量
         for title, _, clauses in results:
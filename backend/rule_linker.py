@@ -0,0 +1,213 @@
+"""
+审核规则关联
+
+按关键词把审核规则关联到条款。旧实现对每个关键词做一次
+Clause.content LIKE '%关键词%' 全表扫描，再对每个候选条款查询一次规则是否
+已存在，关键词一多就是"关键词数 × 条款数"的扫描量。
+
+这里把所有关键词编译成一个Aho–Corasick自动机，按ID顺序流式读取条款表
+一遍，每个条款只扫描一次就找出其中出现的全部关键词；每个关键词关联到
+第一个包含它的条款（与旧实现相同）。与SQLite的LIKE一致，ASCII字母不区分
+大小写（关键词和条款都转为小写后匹配）。规则在本批内先去重再批量insert，
+与已有规则的重复由 (role_id, document_type_id, clause_id) 唯一索引跳过，
+不再逐条查询是否存在。
+"""
+
+import string
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import Clause, AuditRule
+
+# 只用关键词的前若干个字符匹配（与旧实现的LIKE条件一致）
+KEYWORD_PREFIX_LENGTH = 20
+
+# 流式读取条款时每批的行数
+CLAUSE_FETCH_SIZE = 5000
+
+# 每次executemany写入的规则数
+RULE_BATCH_SIZE = 5000
+
+# 只把ASCII字母转为小写（SQLite的LIKE只对ASCII字母不区分大小写）
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _fold_case(text: str) -> str:
+    """把ASCII大写字母转为小写，其余字符不变"""
+    return text.translate(_ASCII_LOWER)
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick多模式匹配自动机
+
+    一次扫描文本即可找出所有出现的模式串，耗时与文本长度和命中数有关，
+    与模式串数量无关。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 模式串，find()返回的是它们在此序列中的下标
+        """
+        self.patterns: List[str] = list(patterns)
+
+        # 状态0是根；goto[s]为状态s的转移，output[s]为在状态s结束的模式串下标
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        own_outputs = [[]]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    own_outputs.append([])
+                state = next_state
+            own_outputs[state].append(index)
+
+        # 按广度优先计算失败指针，并把失败指针上的输出合并进来
+        self._output = [tuple(outputs) for outputs in own_outputs]
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[int]:
+        """
+        查找文本中出现的模式串
+
+        Returns:
+            出现的模式串下标集合
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+def insert_rules(session: Session, rows: List[Dict]) -> int:
+    """
+    批量写入审核规则（不提交事务），已存在的规则由唯一索引跳过
+
+    Args:
+        session: 数据库会话
+        rows: 规则字典列表（role_id, document_type_id, clause_id, source, priority）
+
+    Returns:
+        实际插入的规则数
+    """
+    # rowcount只统计实际插入的行（对表执行Core语句才能拿到rowcount，
+    # 仍经由session执行，匹配缓存照常失效）
+    statement = sqlite_insert(AuditRule.__table__).on_conflict_do_nothing(
+        index_elements=['role_id', 'document_type_id', 'clause_id']
+    )
+    inserted = 0
+    for start in range(0, len(rows), RULE_BATCH_SIZE):
+        inserted += session.execute(statement, rows[start:start + RULE_BATCH_SIZE]).rowcount
+    return inserted
+
+
+def link_rules(
+    session: Session,
+    mappings: Iterable[Tuple[int, int, str]],
+    source: str = 'example',
+    priority: int = 10
+) -> Dict:
+    """
+    按关键词批量关联审核规则（不提交事务）
+
+    Args:
+        session: 数据库会话
+        mappings: (角色ID, 单据类型ID, 关键词) 序列，每个关键词关联到
+            第一个（ID最小的）包含其前KEYWORD_PREFIX_LENGTH个字符的条款
+            （ASCII字母不区分大小写）
+        source: 规则来源
+        priority: 规则优先级
+
+    Returns:
+        统计信息和未匹配到条款的关键词。rules_inserted为新增的规则数，
+        rules_existing为数据库中已有的规则数，rules_duplicate为本批中
+        关联到同一条款、与前面的关键词重复的规则数
+    """
+    mappings = list(mappings)
+
+    def phrase_of(keyword):
+        return _fold_case(keyword[:KEYWORD_PREFIX_LENGTH])
+
+    phrases = list(dict.fromkeys(phrase_of(keyword) for _, _, keyword in mappings))
+    automaton = KeywordAutomaton(phrases)
+
+    # 按ID顺序流式扫描条款，所有关键词都找到条款后提前结束
+    first_clause: Dict[int, int] = {}
+    clauses_scanned = 0
+    result = session.execute(
+        select(Clause.id, Clause.content).order_by(Clause.id)
+        .execution_options(yield_per=CLAUSE_FETCH_SIZE)
+    )
+    for clause_id, content in result:
+        clauses_scanned += 1
+        for index in automaton.find(_fold_case(content)):
+            first_clause.setdefault(index, clause_id)
+        if len(first_clause) == len(phrases):
+            break
+    result.close()
+
+    phrase_index = {phrase: index for index, phrase in enumerate(phrases)}
+    rows = {}
+    matched = 0
+    unmatched = []
+    for role_id, document_type_id, keyword in mappings:
+        clause_id = first_clause.get(phrase_index[phrase_of(keyword)])
+        if clause_id is None:
+            unmatched.append(keyword)
+            continue
+        matched += 1
+        rows.setdefault((role_id, document_type_id, clause_id), {
+            'role_id': role_id,
+            'document_type_id': document_type_id,
+            'clause_id': clause_id,
+            'source': source,
+            'priority': priority
+        })
+
+    rules_inserted = insert_rules(session, list(rows.values()))
+
+    return {
+        'keywords': len(mappings),
+        'phrases': len(phrases),
+        'clauses_scanned': clauses_scanned,
+        'rules_inserted': rules_inserted,
+        'rules_existing': len(rows) - rules_inserted,
+        'rules_duplicate': matched - len(rows),
+        'unmatched': unmatched
+    }
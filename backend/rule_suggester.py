@@ -0,0 +1,185 @@
+"""
+审核规则自动推荐
+
+为每个 (审核角色, 单据类型) 组合推荐相关条款，写入source='auto'的审核规则。
+
+角色文本（角色名称 + 职责描述）和单据文本（类型名称 + 单据描述）各自与
+全部条款计算一次相似度，得分为两部分的加权和:
+- 向量相似度: 字符n-gram TF-IDF向量的余弦相似度（语义索引，见semantic.py）；
+- 词面相似度: 文本的n-gram按IDF加权在条款中出现的比例。
+
+组合的得分取角色得分与单据得分的几何平均，条款要同时与角色职责和单据
+内容相关才会排在前面。R个角色、D个单据类型只需要对 R + D 个文本取一次
+倒排表，再按块对所有组合做逐元素乘法并取前k个，不逐个组合检索。
+
+优先级由得分换算为 1 ~ AUTO_PRIORITY_MAX，低于示例规则（10），匹配结果中
+人工确认的规则排在前面。每次运行先删除上一次的自动规则再写入，
+example/manual规则已关联的条款不会被覆盖。
+
+运行:
+    python rule_suggester.py
+"""
+
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from database import AuditorRole, AuditRule, DocumentType
+from rule_linker import insert_rules
+from semantic import SEMANTIC_INDEX_DIR, SemanticIndex, build_semantic_index, update_semantic_index
+
+# 每个组合推荐的条款数
+SUGGEST_TOP_K = int(os.getenv('RULE_SUGGEST_TOP_K', '10'))
+
+# 得分低于该值的条款不推荐
+SUGGEST_MIN_SCORE = float(os.getenv('RULE_SUGGEST_MIN_SCORE', '0.1'))
+
+# 词面相似度的权重（向量相似度的权重为 1 - 该值）
+LEXICAL_WEIGHT = float(os.getenv('RULE_SUGGEST_LEXICAL_WEIGHT', '0.5'))
+
+# 自动规则的最高优先级（示例规则为10）
+AUTO_PRIORITY_MAX = 9
+
+# 每块组合得分矩阵的元素数上限（组合数 × 条款数）
+PAIR_BLOCK_ELEMENTS = 1 << 24
+
+
+def score_to_priority(scores: np.ndarray) -> np.ndarray:
+    """把0~1的得分换算为 1 ~ AUTO_PRIORITY_MAX 的整数优先级"""
+    return np.clip(np.ceil(scores * AUTO_PRIORITY_MAX), 1, AUTO_PRIORITY_MAX).astype(np.int64)
+
+
+def top_pairs(role_scores: np.ndarray, document_scores: np.ndarray, k: int,
+              min_score: float = 0.0) -> List[np.ndarray]:
+    """
+    计算所有 (角色, 单据类型) 组合得分最高的k个条款
+
+    组合按块处理，每块内 role_scores 与 document_scores 的对应行逐元素相乘后
+    沿条款方向取前k个（几何平均与乘积的排序相同，只对选中的元素开方）。
+
+    Args:
+        role_scores: (角色数, 条款数) 得分矩阵
+        document_scores: (单据类型数, 条款数) 得分矩阵
+        k: 每个组合取的条款数
+        min_score: 得分下限
+
+    Returns:
+        [角色下标, 单据类型下标, 条款列号, 得分] 四个等长数组，
+        同一组合内按得分从高到低排序
+    """
+    role_count, clause_count = role_scores.shape
+    document_count = document_scores.shape[0]
+    pair_roles = np.repeat(np.arange(role_count), document_count)
+    pair_documents = np.tile(np.arange(document_count), role_count)
+    k = min(k, clause_count)
+    empty = [np.zeros(0, dtype=np.int64)] * 3 + [np.zeros(0, dtype=np.float32)]
+    if k <= 0 or not len(pair_roles):
+        return empty
+
+    block = max(1, PAIR_BLOCK_ELEMENTS // clause_count)
+    parts = []
+    for start in range(0, len(pair_roles), block):
+        roles = pair_roles[start:start + block]
+        documents = pair_documents[start:start + block]
+        products = role_scores[roles] * document_scores[documents]
+        columns = np.argpartition(-products, k - 1, axis=1)[:, :k]
+        scores = np.sqrt(np.take_along_axis(products, columns, axis=1))
+
+        order = np.argsort(-scores, axis=1, kind='stable')
+        columns = np.take_along_axis(columns, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        keep = (scores > 0) & (scores >= min_score)
+        parts.append((np.repeat(roles, k).reshape(-1, k)[keep], np.repeat(documents, k).reshape(-1, k)[keep],
+                      columns[keep], scores[keep]))
+
+    return [np.concatenate([part[i] for part in parts]) for i in range(4)]
+
+
+def suggest_rules(
+    session: Session,
+    k: int = SUGGEST_TOP_K,
+    min_score: float = SUGGEST_MIN_SCORE,
+    directory: str = SEMANTIC_INDEX_DIR
+) -> Dict:
+    """
+    为所有 (角色, 单据类型) 组合推荐条款并写入自动规则（不提交事务）
+
+    先增量更新语义索引（不存在时构建），保证新导入的条款参与推荐。
+
+    Args:
+        session: 数据库会话
+        k: 每个组合推荐的条款数
+        min_score: 得分下限
+        directory: 语义索引目录
+
+    Returns:
+        组合数、候选数、写入和删除的规则数，以及计算和写库耗时
+    """
+    start = time.perf_counter()
+    if update_semantic_index(session, directory)['mode'] == 'missing':
+        build_semantic_index(session, directory)
+    index = SemanticIndex(directory)
+
+    roles = session.execute(
+        select(AuditorRole.id, AuditorRole.role_name, AuditorRole.responsibilities).order_by(AuditorRole.id)
+    ).all()
+    document_types = session.execute(
+        select(DocumentType.id, DocumentType.type_name, DocumentType.description).order_by(DocumentType.id)
+    ).all()
+    texts = [f"{name}，{text or ''}" for _, name, text in roles + document_types]
+
+    score_start = time.perf_counter()
+    clause_ids, cosine, coverage = index.score_all(texts)
+    scores = (1.0 - LEXICAL_WEIGHT) * cosine + LEXICAL_WEIGHT * coverage
+    del cosine, coverage
+    role_rows, document_rows, columns, pair_scores = top_pairs(
+        scores[:len(roles)], scores[len(roles):], k, min_score
+    )
+    score_seconds = time.perf_counter() - score_start
+
+    role_ids = np.array([role_id for role_id, _, _ in roles], dtype=np.int64)
+    document_type_ids = np.array([type_id for type_id, _, _ in document_types], dtype=np.int64)
+    rows = [
+        {'role_id': role_id, 'document_type_id': type_id, 'clause_id': clause_id,
+         'source': 'auto', 'priority': priority}
+        for role_id, type_id, clause_id, priority in zip(
+            role_ids[role_rows].tolist(), document_type_ids[document_rows].tolist(),
+            clause_ids[columns].tolist(), score_to_priority(pair_scores).tolist()
+        )
+    ]
+
+    rules_removed = session.execute(delete(AuditRule).where(AuditRule.source == 'auto')).rowcount
+    rules_inserted = insert_rules(session, rows)
+
+    return {
+        'pairs': len(roles) * len(document_types),
+        'clauses': len(clause_ids),
+        'candidates': len(rows),
+        'rules_inserted': rules_inserted,
+        'rules_existing': len(rows) - rules_inserted,
+        'rules_removed': rules_removed,
+        'score_seconds': round(score_seconds, 3),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print("推荐审核规则...")
+        stats = suggest_rules(session)
+        session.commit()
+        per_pair = stats['score_seconds'] * 1000 / max(stats['pairs'], 1)
+        print(f"完成: {stats['pairs']} 个角色×单据类型组合，{stats['clauses']} 个条款，"
+              f"计算得分 {stats['score_seconds']:.2f} 秒（每个组合 {per_pair:.2f} ms），"
+              f"总耗时 {stats['seconds']:.2f} 秒")
+        print(f"新增 {stats['rules_inserted']} 条自动规则（删除旧的 {stats['rules_removed']} 条），"
+              f"{stats['rules_existing']} 条已有人工或示例规则")
+    finally:
+        session.close()
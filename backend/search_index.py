@@ -0,0 +1,185 @@
+"""
+条款全文索引
+
+基于SQLite FTS5为clauses.content建立倒排索引:
+- 中文没有空格分词，这里把每段连续的文字切成二元组(bigram)，
+  再交给FTS5的unicode61分词器按空格建索引
+- 索引表是contentless的，只保存倒排表，不重复存储条款原文
+- 通过触发器在clauses表插入/更新/删除时自动同步
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# 索引表和分词函数名称
+FTS_TABLE = 'clauses_fts'
+TOKENIZE_FUNCTION = 'clause_tokens'
+
+# 连续的文字（汉字、字母、数字），标点和空白作为分隔
+_word_run_pattern = re.compile(r'[^\W_]+')
+
+
+def bigram_tokens(text: Optional[str]) -> str:
+    """
+    把文本切分为二元组，供FTS5建立索引
+
+    每段连续文字产生所有相邻二元组，最后追加末字单字，
+    这样单字查询也可以通过前缀匹配命中。
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        以空格分隔的token字符串
+    """
+    if not text:
+        return ''
+
+    tokens = []
+    for run in _word_run_pattern.findall(text.lower()):
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return ' '.join(tokens)
+
+
+def term_query(term: str) -> Optional[str]:
+    """
+    把一个检索词转换为FTS5查询表达式
+
+    每段连续文字转换为相邻二元组组成的短语（等价于子串匹配），
+    单字转换为前缀查询；多段之间为AND关系。
+
+    Args:
+        term: 检索词
+
+    Returns:
+        FTS5 MATCH表达式，检索词中没有可索引的文字时返回None
+    """
+    parts = []
+    for run in _word_run_pattern.findall(term.lower()):
+        if len(run) == 1:
+            parts.append(f'"{run}"*')
+        else:
+            bigrams = ' '.join(run[i:i + 2] for i in range(len(run) - 1))
+            parts.append(f'"{bigrams}"')
+
+    if not parts:
+        return None
+    return ' AND '.join(parts)
+
+
+def is_single_run(term: str) -> bool:
+    """检索词是否只包含一段连续文字（此时索引匹配与子串匹配完全等价）"""
+    runs = _word_run_pattern.findall(term)
+    return len(runs) == 1 and runs[0] == term
+
+
+def find_highlights(content: str, terms: List[str]) -> List[Tuple[int, int]]:
+    """
+    计算检索词在条款原文中的命中位置
+
+    Args:
+        content: 条款原文
+        terms: 检索词列表
+
+    Returns:
+        按起始位置排序、合并重叠后的 (起始, 结束) 偏移列表
+    """
+    spans = []
+    for term in terms:
+        # 纯标点的检索词按原样匹配
+        pieces = _word_run_pattern.findall(term) or ([term] if term else [])
+        for run in pieces:
+            for match in re.finditer(re.escape(run), content, re.IGNORECASE):
+                spans.append((match.start(), match.end()))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def register_functions(dbapi_connection):
+    """
+    在SQLite连接上注册分词函数
+
+    触发器依赖该函数，必须在每个新连接上注册。
+    """
+    dbapi_connection.create_function(
+        TOKENIZE_FUNCTION, 1, bigram_tokens, deterministic=True
+    )
+
+
+# 建表和触发器语句
+_schema_statements: List[str] = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        tokens, content='', tokenize='unicode61 remove_diacritics 0'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clauses BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, tokens)
+        VALUES (new.id, {TOKENIZE_FUNCTION}(new.content));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clauses BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, tokens)
+        VALUES ('delete', old.id, {TOKENIZE_FUNCTION}(old.content));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON clauses BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, tokens)
+        VALUES ('delete', old.id, {TOKENIZE_FUNCTION}(old.content));
+        INSERT INTO {FTS_TABLE}(rowid, tokens)
+        VALUES (new.id, {TOKENIZE_FUNCTION}(new.content));
+    END
+    """,
+]
+
+
+def rebuild_search_index(connection):
+    """
+    清空并重建全文索引
+
+    Args:
+        connection: SQLAlchemy连接
+    """
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+    )
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}(rowid, tokens) "
+        f"SELECT id, {TOKENIZE_FUNCTION}(content) FROM clauses"
+    )
+
+
+def ensure_search_index(engine):
+    """
+    确保全文索引表和同步触发器存在
+
+    对已有的数据库（索引建立之前导入的数据）会自动补建索引；
+    索引条目数与条款数不一致时重建。
+
+    Args:
+        engine: SQLAlchemy引擎
+    """
+    with engine.begin() as connection:
+        for statement in _schema_statements:
+            connection.exec_driver_sql(statement)
+
+        clause_count = connection.exec_driver_sql(
+            "SELECT COUNT(*) FROM clauses"
+        ).scalar()
+        indexed_count = connection.exec_driver_sql(
+            f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize"
+        ).scalar()
+
+        if clause_count != indexed_count:
+            rebuild_search_index(connection)
+            print(f"全文索引已重建: {clause_count} 条条款")
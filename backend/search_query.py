@@ -0,0 +1,307 @@
+"""
+检索式解析器
+
+把用户输入的检索式解析为FTS5查询表达式，支持:
+- 空格或AND: 同时包含，如 公开招标 AND 国有资金
+- OR: 包含任意一个，如 废标 OR 流标
+- NOT 或 -前缀: 排除，如 招标 NOT 邀请招标、招标 -邀请招标
+- 引号短语: "公开招标方式"（中英文引号均可）
+- 括号分组: (废标 OR 流标) 供应商
+- 法规过滤: regulation:政府采购法 或 法规:政府采购法，多个过滤条件之间为OR；
+  NOT 法规:政府采购法 排除该法规。过滤条件只能作为顶层的AND条件，
+  放在OR或括号内的NOT中时报语法错误（不能在FTS5表达式中表达）
+
+整个检索式编译成一个MATCH表达式，由FTS5在倒排表上一次完成
+求交/求并，而不是每个关键词各扫描一遍。
+"""
+
+from typing import List, Optional, Tuple
+from search_index import term_query, is_single_run
+
+OPERATORS = ('AND', 'OR', 'NOT')
+FILTER_PREFIXES = ('regulation:', 'regulation：', '法规:', '法规：')
+QUOTE_PAIRS = {'"': '"', '“': '”'}
+LEFT_PARENS = ('(', '（')
+RIGHT_PARENS = (')', '）')
+
+
+class QuerySyntaxError(ValueError):
+    """检索式语法错误"""
+    pass
+
+
+class ParsedQuery:
+    """解析后的检索式"""
+
+    def __init__(self):
+        # FTS5 MATCH表达式，没有可检索的词时为None
+        self.match_expression: Optional[str] = None
+        # 用于计算命中位置的正向检索词
+        self.highlight_terms: List[str] = []
+        # 必须在原文中逐字出现的检索词（含标点，索引只能近似匹配的部分）。
+        # 只包括顶层的必选词：OR分支或NOT中含标点的检索词只按索引近似匹配，
+        # 例如 "10%" OR 废标 可能命中只含“10”的条款
+        self.verify_terms: List[str] = []
+        # 法规标题过滤条件
+        self.regulation_filters: List[str] = []
+        # 排除的法规标题
+        self.excluded_regulations: List[str] = []
+
+
+def _tokenize(query: str) -> List[Tuple[str, str]]:
+    """
+    把检索式切分为token
+
+    Returns:
+        (类型, 值) 列表，类型为 LP/RP/AND/OR/NOT/TERM/FILTER
+    """
+    tokens = []
+    i = 0
+    length = len(query)
+
+    def read_value(start: int) -> Tuple[str, int]:
+        """读取一个词或引号短语，返回 (文本, 结束位置)"""
+        if start < length and query[start] in QUOTE_PAIRS:
+            closing = QUOTE_PAIRS[query[start]]
+            end = query.find(closing, start + 1)
+            if end == -1:
+                raise QuerySyntaxError("引号未闭合")
+            return query[start + 1:end], end + 1
+        end = start
+        while (end < length and not query[end].isspace()
+               and query[end] not in LEFT_PARENS + RIGHT_PARENS):
+            end += 1
+        return query[start:end], end
+
+    while i < length:
+        char = query[i]
+        if char.isspace():
+            i += 1
+        elif char in LEFT_PARENS:
+            tokens.append(('LP', char))
+            i += 1
+        elif char in RIGHT_PARENS:
+            tokens.append(('RP', char))
+            i += 1
+        elif char == '-' and i + 1 < length and not query[i + 1].isspace():
+            tokens.append(('NOT', '-'))
+            i += 1
+        else:
+            prefix = next((p for p in FILTER_PREFIXES if query.startswith(p, i)), None)
+            if prefix:
+                value, i = read_value(i + len(prefix))
+                if not value.strip():
+                    raise QuerySyntaxError("法规过滤条件不能为空")
+                tokens.append(('FILTER', value.strip()))
+                continue
+
+            quoted = char in QUOTE_PAIRS
+            value, i = read_value(i)
+            if not quoted and value in OPERATORS:
+                tokens.append((value, value))
+            elif value.strip():
+                tokens.append(('TERM', value.strip()))
+
+    return tokens
+
+
+class _Parser:
+    """递归下降解析器，运算优先级: NOT > AND > OR"""
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def advance(self) -> Tuple[str, str]:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"多余的符号: {self.tokens[self.position][1]}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.advance()
+            children.append(self.parse_and())
+        if len(children) == 1:
+            return children[0]
+        return ('or', children)
+
+    def parse_and(self):
+        children = [self.parse_unary()]
+        while self.peek() not in ('OR', 'RP', None):
+            if self.peek() == 'AND':
+                self.advance()
+            children.append(self.parse_unary())
+        if len(children) == 1:
+            return children[0]
+        return ('and', children)
+
+    def parse_unary(self):
+        kind = self.peek()
+        if kind is None:
+            raise QuerySyntaxError("检索式不完整")
+
+        kind, value = self.advance()
+        if kind == 'NOT':
+            return ('not', self.parse_unary())
+        if kind == 'LP':
+            node = self.parse_or()
+            if self.peek() != 'RP':
+                raise QuerySyntaxError("括号未闭合")
+            self.advance()
+            return node
+        if kind == 'TERM':
+            return ('term', value)
+        if kind == 'FILTER':
+            return ('filter', value)
+        raise QuerySyntaxError(f"无法解析的符号: {value}")
+
+
+def _contains_filter(node) -> bool:
+    """语法树节点中是否有法规过滤条件"""
+    if node[0] == 'filter':
+        return True
+    if node[0] == 'not':
+        return _contains_filter(node[1])
+    if node[0] in ('and', 'or'):
+        return any(_contains_filter(child) for child in node[1])
+    return False
+
+
+def _conjuncts(node) -> List:
+    """把顶层（含嵌套）的AND展开为条件列表"""
+    if node[0] == 'and':
+        return [conjunct for child in node[1] for conjunct in _conjuncts(child)]
+    return [node]
+
+
+def _extract_filters(root, parsed: ParsedQuery):
+    """
+    取出顶层AND条件中的法规过滤和排除条件
+
+    Returns:
+        去掉过滤条件后的语法树，没有检索词时为None
+
+    Raises:
+        QuerySyntaxError: 过滤条件出现在OR或嵌套的NOT中
+    """
+    remaining = []
+    for conjunct in _conjuncts(root):
+        if conjunct[0] == 'filter':
+            parsed.regulation_filters.append(conjunct[1])
+        elif conjunct[0] == 'not' and conjunct[1][0] == 'filter':
+            parsed.excluded_regulations.append(conjunct[1][1])
+        elif _contains_filter(conjunct):
+            raise QuerySyntaxError("法规过滤条件只能作为顶层条件（可用NOT排除），不能放在OR或括号内的NOT中")
+        else:
+            remaining.append(conjunct)
+
+    if not remaining:
+        return None
+    return remaining[0] if len(remaining) == 1 else ('and', remaining)
+
+
+def _terms(node) -> List[str]:
+    """语法树中的全部检索词"""
+    if node[0] == 'term':
+        return [node[1]]
+    if node[0] == 'not':
+        return _terms(node[1])
+    return [term for child in node[1] for term in _terms(child)]
+
+
+def _compile(node, positive: bool, parsed: ParsedQuery) -> Optional[str]:
+    """把语法树节点编译为FTS5表达式"""
+    kind = node[0]
+
+    if kind == 'term':
+        if positive:
+            parsed.highlight_terms.append(node[1])
+        return term_query(node[1])
+
+    if kind == 'not':
+        raise QuerySyntaxError("NOT 必须与其他检索条件组合使用")
+
+    if kind == 'or':
+        parts = [_compile(child, positive, parsed) for child in node[1]]
+        parts = [p for p in parts if p is not None]
+        return ' OR '.join(f'({p})' for p in parts) if parts else None
+
+    # and: 正向条件求交，再逐个排除NOT条件
+    positives = []
+    negatives = []
+    for child in node[1]:
+        if child[0] == 'not':
+            negatives.append(_compile(child[1], not positive, parsed))
+        else:
+            positives.append(_compile(child, positive, parsed))
+    positives = [p for p in positives if p is not None]
+    negatives = [n for n in negatives if n is not None]
+
+    if not positives:
+        if negatives:
+            raise QuerySyntaxError("NOT 必须与其他检索条件组合使用")
+        return None
+
+    expression = ' AND '.join(f'({p})' for p in positives)
+    for negative in negatives:
+        expression = f'({expression}) NOT ({negative})'
+    return expression
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """
+    解析检索式
+
+    Args:
+        query: 用户输入的检索式
+
+    Returns:
+        ParsedQuery
+
+    Raises:
+        QuerySyntaxError: 检索式语法错误
+    """
+    tokens = _tokenize(query)
+    if not tokens:
+        raise QuerySyntaxError("检索式为空")
+    parsed = ParsedQuery()
+    root = _extract_filters(_Parser(tokens).parse(), parsed)
+    if root is None:
+        if not parsed.regulation_filters:
+            raise QuerySyntaxError("NOT 必须与其他检索条件组合使用")
+        return parsed
+
+    # 只有标点的检索词无法使用索引；整个检索式只有这一个词时由调用方退回原文匹配，
+    # 与其他条件组合时报错，而不是悄悄忽略
+    if root[0] == 'term' and term_query(root[1]) is None:
+        if parsed.regulation_filters or parsed.excluded_regulations:
+            raise QuerySyntaxError(f"检索词中没有可检索的文字: {root[1]}")
+        return parsed
+    for term in _terms(root):
+        if term_query(term) is None:
+            raise QuerySyntaxError(f"检索词中没有可检索的文字: {term}")
+
+    parsed.match_expression = _compile(root, True, parsed)
+
+    # 顶层的必选词如果含标点，需在原文中核对；OR或NOT中的词无法用独立的AND条件核对，
+    # 仍按索引近似匹配（见ParsedQuery.verify_terms）
+    required = [root] if root[0] == 'term' else (
+        [child for child in root[1] if child[0] == 'term'] if root[0] == 'and' else []
+    )
+    parsed.verify_terms = [
+        term for _, term in required
+        if term_query(term) is not None and not is_single_run(term)
+    ]
+    return parsed
@@ -0,0 +1,241 @@
+"""
+法规条款切分
+
+parser.py（markdown法规库）和document_parser.py（上传的PDF/Word）共用的切分逻辑。
+
+旧实现使用 第X条[\\s\\S]*?(?=第X条|$) 惰性匹配，每前进一个字符都要重新尝试
+前瞻，并且会在正文中的引用处（如"依照本法第十条"）错误地切开条款。这里只把
+出现在行首的"第X条"作为条款开头，一次扫描找出所有边界后再逐段切片:
+- 条款在下一个条款开头处结束；
+- 也在章、节、编标题行和markdown标题行处结束，标题不再并入上一条的内容。
+
+StreamingSegmenter按行增量切分，逐页输入文本、条款一结束就输出，
+内存占用只与当前条款和当前页有关，与文档大小无关。
+
+所有正则在模块加载时编译一次，两个解析器和每个解析进程共用；条款用
+带__slots__的ClauseRecord表示，支持 clause['content'] 等字典式访问，
+比两个键的dict省内存，大批量导入时分配更少。
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 中文数字
+CN_DIGITS = '零一二三四五六七八九十百千'
+
+# 行首的结构边界: 条款开头（捕获条款编号）、章节标题或markdown标题
+BOUNDARY_PATTERN = re.compile(
+    rf'^[ \t　]*(?:(第[{CN_DIGITS}]+条)|第[{CN_DIGITS}]+[编章节]|#)',
+    re.MULTILINE
+)
+
+# 清理空白后短于该长度的条款视为误匹配
+MIN_CLAUSE_LENGTH = 10
+
+# 旧版切分正则，仅保留用于基准测试和回归对比
+LEGACY_CLAUSE_PATTERN = re.compile(
+    rf'第[{CN_DIGITS}]+条[\s\S]*?(?=第[{CN_DIGITS}]+条|$)',
+    re.MULTILINE
+)
+LEGACY_NUMBER_PATTERN = re.compile(rf'第[{CN_DIGITS}]+条')
+
+
+def iter_clause_spans(content: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    找出所有条款在原文中的位置
+
+    Args:
+        content: 文档内容
+
+    Returns:
+        (条款编号, 起始位置, 结束位置) 的迭代器，按出现顺序
+    """
+    current_number = None
+    current_start = 0
+
+    for match in BOUNDARY_PATTERN.finditer(content):
+        if current_number is not None:
+            yield current_number, current_start, match.start()
+        current_number = match.group(1)
+        current_start = match.start(1)
+
+    if current_number is not None:
+        yield current_number, current_start, len(content)
+
+
+class ClauseRecord(Mapping):
+    """
+    条款记录
+
+    只有clause_number和content两个属性，可以像字典一样按键读取，
+    与相同内容的字典比较相等，dict(record)可转换为普通字典。
+    """
+
+    __slots__ = ('clause_number', 'content')
+
+    def __init__(self, clause_number: str, content: str):
+        self.clause_number = clause_number
+        self.content = content
+
+    def __getitem__(self, key: str) -> str:
+        if key == 'clause_number':
+            return self.clause_number
+        if key == 'content':
+            return self.content
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return 2
+
+    def __reduce__(self):
+        # 在解析进程和主进程之间传递时只序列化两个字符串
+        return ClauseRecord, (self.clause_number, self.content)
+
+    def __repr__(self):
+        return f"ClauseRecord({self.clause_number!r}, {self.content[:20]!r})"
+
+
+def normalize_clause(text: str) -> str:
+    """
+    把条款中的换行、全角空格等连续空白合并为一个空格
+
+    str.split()按Unicode空白切分，与 re.sub(r'\\s+', ' ', ...) 结果相同但更快
+    """
+    return ' '.join(text.split())
+
+
+def make_clause(clause_number: str, text: str) -> Optional[ClauseRecord]:
+    """
+    清理条款文本并构造条款
+
+    Returns:
+        包含编号和内容的条款，太短的条款（可能是误匹配）返回None
+    """
+    clause_content = normalize_clause(text)
+    if len(clause_content) <= MIN_CLAUSE_LENGTH:
+        return None
+    return ClauseRecord(clause_number, clause_content)
+
+
+def segment_clauses(content: str) -> List[ClauseRecord]:
+    """
+    从文档内容中提取所有条款
+
+    Args:
+        content: 文档内容
+
+    Returns:
+        条款列表，每个条款包含编号和内容
+    """
+    clauses = []
+    append = clauses.append
+    for clause_number, start, end in iter_clause_spans(content):
+        clause = make_clause(clause_number, content[start:end])
+        if clause is not None:
+            append(clause)
+    return clauses
+
+
+class StreamingSegmenter:
+    """
+    增量条款切分器
+
+    用feed()逐段输入文本（段与段之间可以在任意位置断开），返回已经结束的条款；
+    全部输入后调用close()取出最后一个条款。结果与segment_clauses对完整文本的
+    切分相同。
+    """
+
+    def __init__(self):
+        """初始化切分器"""
+        # 尚未遇到换行的行尾部分
+        self._pending = ''
+        # 当前条款的编号和各行文本
+        self._number: Optional[str] = None
+        self._lines: List[str] = []
+
+    def feed(self, text: str) -> Iterator[ClauseRecord]:
+        """
+        输入一段文本
+
+        Returns:
+            本段文本中结束的条款
+        """
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            yield from self._consume(line)
+
+    def close(self) -> Iterator[ClauseRecord]:
+        """
+        结束输入
+
+        Returns:
+            剩余的最后一个条款
+        """
+        if self._pending:
+            yield from self._consume(self._pending)
+            self._pending = ''
+        clause = self._flush()
+        if clause is not None:
+            yield clause
+
+    def _consume(self, line: str) -> Iterator[ClauseRecord]:
+        """处理一个完整的行"""
+        match = BOUNDARY_PATTERN.match(line)
+        if match is None:
+            if self._number is not None:
+                self._lines.append(line)
+            return
+
+        # 行首边界结束当前条款；条款标题同时开始新条款
+        clause = self._flush()
+        if clause is not None:
+            yield clause
+        if match.group(1):
+            self._number = match.group(1)
+            self._lines = [line[match.start(1):]]
+
+    def _flush(self) -> Optional[ClauseRecord]:
+        """结束当前条款"""
+        if self._number is None:
+            return None
+        clause = make_clause(self._number, '\n'.join(self._lines))
+        self._number = None
+        self._lines = []
+        return clause
+
+
+def stream_clauses(chunks: Iterable[str]) -> Iterator[ClauseRecord]:
+    """
+    从逐段产生的文本中增量切分条款
+
+    Args:
+        chunks: 文本段的可迭代对象（如逐页提取的PDF文本）
+
+    Returns:
+        条款的迭代器，每个条款在结束时立即产出
+    """
+    segmenter = StreamingSegmenter()
+    for chunk in chunks:
+        yield from segmenter.feed(chunk)
+    yield from segmenter.close()
+
+
+def legacy_segment_clauses(content: str) -> List[Dict]:
+    """旧版惰性正则切分（仅用于基准测试和回归对比）"""
+    clauses = []
+    for match in LEGACY_CLAUSE_PATTERN.finditer(content):
+        clause_text = match.group(0).strip()
+        number_match = LEGACY_NUMBER_PATTERN.search(clause_text)
+        if number_match:
+            clause_content = re.sub(r'\s+', ' ', clause_text)
+            if len(clause_content) > MIN_CLAUSE_LENGTH:
+                clauses.append({
+                    'clause_number': number_match.group(0),
+                    'content': clause_content
+                })
+    return clauses
@@ -0,0 +1,615 @@
+"""
+语义检索
+
+不依赖外部服务的离线相似度检索：每个条款表示为字符n-gram（二元、三元）
+TF-IDF向量，查询文本按同样方式向量化后取余弦相似度最高的条款，
+不要求查询中的词原样出现在条款中，近义表述、语序不同的句子也能召回。
+
+n-gram按64位哈希映射到 2^20 维特征空间，不需要保存词表，新文本直接
+向量化。条款向量构成的稀疏矩阵按特征列存储（倒排表）在数据库旁的
+.npy文件中，查询时以内存映射方式读取，只访问查询中出现的特征的列
+（精确检索或IVF近似检索，见vector_index.py）。
+
+上传法规后只把新增和修改的条款写入增量段，主索引中被替换的条款标记
+为无效，增量段过大时再整体重建。
+
+构建索引:
+    python semantic.py
+增量更新:
+    python semantic.py update
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import Clause, Regulation, db_path
+from vector_index import SEARCHERS, ExactSearcher, gather_postings
+
+# 索引目录，默认放在数据库文件旁边
+SEMANTIC_INDEX_DIR = os.getenv(
+    'SEMANTIC_INDEX_DIR', os.path.join(os.path.dirname(db_path) or '.', 'semantic_index')
+)
+
+# 索引格式版本，特征提取方式变化时递增
+INDEX_VERSION = '2'
+
+# 特征空间维数（2的幂）
+FEATURE_BITS = 20
+FEATURE_SPACE = 1 << FEATURE_BITS
+
+# 使用的字符n-gram长度
+NGRAM_SIZES = (2, 3)
+
+# 标点和空白把文本切成若干段，n-gram不跨段
+SEPARATORS = ' \t\r\n　，。；：、！？（）《》〈〉“”‘’「」【】…—,.;:!?()[]<>"\''
+SEPARATOR_CODES = np.array(sorted(ord(char) for char in SEPARATORS), dtype=np.uint64)
+
+# 构建索引时每批读取的条款数
+BUILD_BATCH_SIZE = 5000
+
+# 检索方式（见vector_index.SEARCHERS）: exact、ivf，或auto（条款数达到
+# SEMANTIC_IVF_MIN_CLAUSES时用ivf，否则用exact）
+SEMANTIC_ANN = os.getenv('SEMANTIC_ANN', 'auto')
+IVF_MIN_CLAUSES = int(os.getenv('SEMANTIC_IVF_MIN_CLAUSES', '20000'))
+
+# 增量段的条款数超过主索引的这一比例时整体重建（重新计算IDF和聚类）
+DELTA_MAX_RATIO = float(os.getenv('SEMANTIC_DELTA_MAX_RATIO', '0.1'))
+
+# 增量段所在的子目录
+DELTA_DIR = 'delta'
+
+# 增量更新时按ID读取条款，每次查询的ID数
+FETCH_CHUNK_SIZE = 500
+
+# splitmix64的常数
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+class SemanticIndexUnavailable(RuntimeError):
+    """语义索引尚未构建或无法读取"""
+    pass
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64终结函数，打散64位整数（uint64乘法按2^64取模）"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * _MIX1
+    values = values ^ (values >> np.uint64(27))
+    values = values * _MIX2
+    return values ^ (values >> np.uint64(31))
+
+
+def extract_features(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    提取一批文本的n-gram特征
+
+    所有文本拼接成一个码点数组一次性计算哈希，不逐个字符循环。
+
+    Args:
+        texts: 文本序列
+
+    Returns:
+        (文本下标, 特征编号, 词频) 三个等长数组，按文本下标、特征编号排序
+    """
+    parts = []
+    lengths = []
+    for text in texts:
+        codes = np.frombuffer(text.lower().encode('utf-32-le'), dtype='<u4')
+        parts.append(codes)
+        # 文本之间补一个0作为分隔
+        parts.append(np.zeros(1, dtype='<u4'))
+        lengths.append(len(codes) + 1)
+    empty = np.zeros(0, dtype=np.int64)
+    if not parts:
+        return empty, empty, empty
+
+    codes = np.concatenate(parts).astype(np.uint64)
+    codes[np.isin(codes, SEPARATOR_CODES)] = 0
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    features = []
+    documents = []
+    for size in NGRAM_SIZES:
+        count = len(codes) - size + 1
+        if count <= 0:
+            continue
+        hashes = np.full(count, np.uint64(size))
+        valid = np.ones(count, dtype=bool)
+        for offset in range(size):
+            window = codes[offset:offset + count]
+            valid &= window != 0
+            hashes = _mix(hashes * _GOLDEN + window)
+        features.append((hashes[valid] & np.uint64(FEATURE_SPACE - 1)).astype(np.int64))
+        documents.append(owners[:count][valid])
+
+    # 所有文本都短于最短的n-gram（如空文本、单字查询）时没有任何特征
+    if not documents:
+        return empty, empty, empty
+
+    keys, counts = np.unique(
+        np.concatenate(documents) * FEATURE_SPACE + np.concatenate(features), return_counts=True
+    )
+    return keys // FEATURE_SPACE, keys % FEATURE_SPACE, counts
+
+
+def tfidf_weights(documents: np.ndarray, features: np.ndarray, counts: np.ndarray,
+                  idf: np.ndarray, document_count: int) -> np.ndarray:
+    """
+    计算L2归一化的TF-IDF权重（次线性词频 1 + log tf）
+
+    Args:
+        documents: 文本下标
+        features: 特征编号
+        counts: 词频
+        idf: 各特征的逆文档频率
+        document_count: 文本数
+
+    Returns:
+        与features等长的float32权重数组，每个文本的权重平方和为1
+    """
+    weights = (1.0 + np.log(counts)) * idf[features]
+    norms = np.sqrt(np.bincount(documents, weights=weights * weights, minlength=document_count))
+    norms[norms == 0] = 1.0
+    return (weights / norms[documents]).astype(np.float32)
+
+
+def _fingerprints(hashes: Iterable[Optional[str]]) -> np.ndarray:
+    """条款content_hash的前64位，用于判断条款在索引构建后是否修改过"""
+    return np.array([int(value[:16], 16) if value else 0 for value in hashes], dtype=np.uint64)
+
+
+def _read_clauses(session: Session, clause_ids: Optional[np.ndarray] = None):
+    """
+    读取条款并提取特征
+
+    Args:
+        session: 数据库会话
+        clause_ids: 只读取这些条款，为None时按ID顺序流式读取全部条款
+
+    Returns:
+        (条款ID, 指纹, 行号, 特征编号, 词频)，后三个数组按行号排序
+    """
+    columns = select(Clause.id, Clause.content, Clause.content_hash).order_by(Clause.id)
+    if clause_ids is None:
+        result = session.execute(columns.execution_options(yield_per=BUILD_BATCH_SIZE))
+        batches = result.partitions()
+    else:
+        batches = (
+            session.execute(columns.where(Clause.id.in_(clause_ids[start:start + FETCH_CHUNK_SIZE].tolist()))).all()
+            for start in range(0, len(clause_ids), FETCH_CHUNK_SIZE)
+        )
+
+    ids = []
+    hashes = []
+    documents = []
+    features = []
+    counts = []
+    for rows in batches:
+        batch_documents, batch_features, batch_counts = extract_features([content for _, content, _ in rows])
+        documents.append((batch_documents + len(ids)).astype(np.int32))
+        features.append(batch_features.astype(np.int32))
+        counts.append(batch_counts.astype(np.int32))
+        ids.extend(clause_id for clause_id, _, _ in rows)
+        hashes.extend(content_hash for _, _, content_hash in rows)
+
+    def join(parts, dtype):
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+    return (np.array(ids, dtype=np.int64), _fingerprints(hashes),
+            join(documents, np.int32), join(features, np.int32), join(counts, np.int32))
+
+
+def _read_meta(directory: Path) -> Optional[Dict]:
+    """读取meta.json，不存在或损坏时返回None"""
+    try:
+        return json.loads((directory / 'meta.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _staging_dir(target: Path) -> Path:
+    """在目标目录旁创建临时目录"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.parent / f".{target.name}.tmp-{uuid.uuid4().hex}"
+    staging.mkdir()
+    return staging
+
+
+def _publish(staging: Path, target: Path):
+    """用写好的临时目录整体替换目标目录（两次rename之间查询会短暂看不到该目录）"""
+    retired = None
+    if target.exists():
+        retired = target.parent / f".{target.name}.old-{uuid.uuid4().hex}"
+        os.replace(target, retired)
+    os.replace(staging, target)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def _directory_bytes(directory: Path) -> int:
+    """目录下所有文件的总大小"""
+    return sum(path.stat().st_size for path in directory.rglob('*') if path.is_file())
+
+
+def build_semantic_index(session: Session, directory: str = SEMANTIC_INDEX_DIR,
+                         ann: str = SEMANTIC_ANN) -> Dict:
+    """
+    为所有条款构建语义索引并写入目录
+
+    新索引先写入临时目录，完成后整体替换旧目录（包括增量段），正在使用
+    旧索引的进程不受影响，下次查询时自动加载新索引。
+
+    Args:
+        session: 数据库会话
+        directory: 索引目录
+        ann: 检索方式，exact、ivf或auto
+
+    Returns:
+        检索方式、条款数、非零元素数、耗时和占用空间
+    """
+    start = time.perf_counter()
+    clause_ids, fingerprints, documents, features, counts = _read_clauses(session)
+    document_count = len(clause_ids)
+
+    document_frequency = np.bincount(features, minlength=FEATURE_SPACE)
+    idf = (np.log((document_count + 1) / (document_frequency + 1)) + 1.0).astype(np.float32)
+    weights = tfidf_weights(documents, features, counts, idf, document_count)
+    del counts
+
+    if ann == 'auto':
+        ann = 'ivf' if document_count >= IVF_MIN_CLAUSES else 'exact'
+    if ann not in SEARCHERS:
+        raise ValueError(f"未知的检索方式: {ann}，可选: {', '.join(SEARCHERS)}")
+    if document_count == 0:
+        ann = 'exact'
+
+    target = Path(directory)
+    staging = _staging_dir(target)
+    order, searcher_meta = SEARCHERS[ann].build(
+        staging, documents, features, weights, document_count, FEATURE_SPACE, np.random.default_rng(0)
+    )
+    np.save(staging / 'clause_ids.npy', clause_ids[order])
+    np.save(staging / 'fingerprints.npy', fingerprints[order])
+    np.save(staging / 'idf.npy', idf)
+    meta = {
+        'version': INDEX_VERSION,
+        'build_id': uuid.uuid4().hex,
+        'searcher': ann,
+        'rows': document_count,
+        'nnz': int(len(weights)),
+        'ngram_sizes': list(NGRAM_SIZES),
+        'feature_bits': FEATURE_BITS,
+        'built_at': time.time(),
+        **searcher_meta
+    }
+    (staging / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+    _publish(staging, target)
+
+    return {
+        'mode': 'rebuild',
+        'searcher': ann,
+        'clauses': document_count,
+        'nnz': meta['nnz'],
+        'bytes': _directory_bytes(target),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def update_semantic_index(session: Session, directory: str = SEMANTIC_INDEX_DIR) -> Dict:
+    """
+    增量更新语义索引（上传法规后调用）
+
+    与主索引构建时的条款ID和内容指纹对比：新增和修改的条款写入增量段
+    （沿用主索引的IDF，精确检索），删除和修改前的条款在主索引中标记为无效。
+    增量段每次按数据库当前状态整体重写，超过主索引条款数的DELTA_MAX_RATIO时
+    改为整体重建。多个进程同时更新时以后写入的为准，漏掉的条款在下一次
+    更新时补上。
+
+    Args:
+        session: 数据库会话
+        directory: 索引目录
+
+    Returns:
+        mode为missing（索引不存在，不做任何事）、unchanged、delta或rebuild，以及相应的统计
+    """
+    start = time.perf_counter()
+    target = Path(directory)
+    meta = _read_meta(target)
+    if meta is None:
+        return {'mode': 'missing'}
+    if meta.get('version') != INDEX_VERSION:
+        return build_semantic_index(session, directory)
+
+    main_ids = np.load(target / 'clause_ids.npy')
+    main_fingerprints = np.load(target / 'fingerprints.npy')
+    rows = session.execute(select(Clause.id, Clause.content_hash).order_by(Clause.id)).all()
+    current_ids = np.array([clause_id for clause_id, _ in rows], dtype=np.int64)
+    current_fingerprints = _fingerprints(content_hash for _, content_hash in rows)
+
+    order = np.argsort(main_ids)
+    positions = np.minimum(np.searchsorted(main_ids[order], current_ids), max(len(main_ids) - 1, 0))
+    matched = order[positions] if len(main_ids) else np.zeros(len(current_ids), dtype=np.int64)
+    unchanged = np.zeros(len(current_ids), dtype=bool)
+    if len(main_ids):
+        unchanged = (main_ids[matched] == current_ids) & (main_fingerprints[matched] == current_fingerprints)
+    changed_ids = current_ids[~unchanged]
+    removed_ids = np.setdiff1d(main_ids, current_ids[unchanged])
+
+    if len(changed_ids) > DELTA_MAX_RATIO * max(meta['rows'], 1):
+        return build_semantic_index(session, directory, meta['searcher'])
+
+    delta_path = target / DELTA_DIR
+    delta_meta = _read_meta(delta_path)
+    if delta_meta is not None and delta_meta.get('main_build_id') == meta['build_id']:
+        if (np.array_equal(np.sort(np.load(delta_path / 'clause_ids.npy')), changed_ids)
+                and np.array_equal(np.load(delta_path / 'removed_ids.npy'), removed_ids)
+                and delta_meta.get('fingerprint_sum') == int(current_fingerprints[~unchanged].sum())):
+            return {'mode': 'unchanged', 'delta_clauses': len(changed_ids), 'removed': len(removed_ids)}
+    elif not len(changed_ids) and not len(removed_ids):
+        return {'mode': 'unchanged', 'delta_clauses': 0, 'removed': 0}
+
+    clause_ids, fingerprints, documents, features, counts = _read_clauses(session, changed_ids)
+    idf = np.load(target / 'idf.npy')
+    weights = tfidf_weights(documents, features, counts, idf, len(clause_ids))
+
+    staging = _staging_dir(delta_path)
+    ExactSearcher.build(staging, documents, features, weights, len(clause_ids), FEATURE_SPACE,
+                        np.random.default_rng(0))
+    np.save(staging / 'clause_ids.npy', clause_ids)
+    np.save(staging / 'removed_ids.npy', removed_ids)
+    delta_meta = {
+        'version': INDEX_VERSION,
+        'main_build_id': meta['build_id'],
+        'rows': len(clause_ids),
+        'nnz': int(len(weights)),
+        'fingerprint_sum': int(fingerprints.sum()),
+        'built_at': time.time()
+    }
+    (staging / 'meta.json').write_text(json.dumps(delta_meta), encoding='utf-8')
+    _publish(staging, delta_path)
+
+    return {
+        'mode': 'delta',
+        'delta_clauses': len(clause_ids),
+        'removed': len(removed_ids),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+class SemanticIndex:
+    """
+    内存映射方式打开的语义索引
+
+    由主索引（按构建时选定的检索方式）和增量段（精确检索）组成，
+    两部分的结果按相似度合并。
+    """
+
+    def __init__(self, directory: str):
+        """
+        打开索引
+
+        Args:
+            directory: 索引目录
+
+        Raises:
+            SemanticIndexUnavailable: 索引不存在或版本不匹配
+        """
+        path = Path(directory)
+        self.meta = _read_meta(path)
+        if self.meta is None:
+            raise SemanticIndexUnavailable(f"语义索引不存在: {directory}，请先运行 python semantic.py")
+        if self.meta.get('version') != INDEX_VERSION:
+            raise SemanticIndexUnavailable("语义索引版本不匹配，请重新运行 python semantic.py")
+
+        self.directory = directory
+        self.clause_ids = np.load(path / 'clause_ids.npy')
+        self.idf = np.load(path / 'idf.npy')
+        self.searcher = SEARCHERS[self.meta['searcher']](path, self.meta)
+
+        # 增量段只在对应当前主索引时使用
+        self.alive: Optional[np.ndarray] = None
+        self.delta: Optional[ExactSearcher] = None
+        self.delta_ids = np.zeros(0, dtype=np.int64)
+        delta_meta = _read_meta(path / DELTA_DIR)
+        if delta_meta is not None and delta_meta.get('main_build_id') == self.meta['build_id']:
+            self.delta = ExactSearcher(path / DELTA_DIR, delta_meta)
+            self.delta_ids = np.load(path / DELTA_DIR / 'clause_ids.npy')
+            removed_ids = np.load(path / DELTA_DIR / 'removed_ids.npy')
+            if len(removed_ids):
+                self.alive = ~np.isin(self.clause_ids, removed_ids)
+
+    def __len__(self) -> int:
+        main_count = len(self.clause_ids) if self.alive is None else int(self.alive.sum())
+        return main_count + len(self.delta_ids)
+
+    def vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        把查询文本转换为稀疏TF-IDF向量
+
+        Returns:
+            (查询下标, 特征编号, 权重) 三个等长数组
+        """
+        queries, features, counts = extract_features(texts)
+        return queries, features, tfidf_weights(queries, features, counts, self.idf, len(texts))
+
+    def search(self, texts: Sequence[str], k: int = 20, **options) -> List[List[Tuple[int, float]]]:
+        """
+        批量检索，返回每个查询余弦相似度最高的k个条款
+
+        所有查询一次向量化，再逐个查询取出倒排表累加得分（各查询的倒排表
+        互不重叠，合并成一次累加并不更快）。
+
+        Args:
+            texts: 查询文本
+            k: 每个查询返回的条款数
+            options: 传给检索方式的参数，如IVF的nprobe
+
+        Returns:
+            与texts一一对应的 [(条款ID, 相似度)] 列表，按相似度从高到低、
+            相同时按条款ID排序，不包含与查询没有共同n-gram的条款
+        """
+        queries, features, weights = self.vectorize(texts)
+        boundaries = np.searchsorted(queries, np.arange(len(texts) + 1))
+
+        results = []
+        for index in range(len(texts)):
+            selected = slice(boundaries[index], boundaries[index + 1])
+            rows, scores = self.searcher.search(features[selected], weights[selected], k, self.alive, **options)
+            hits = list(zip(self.clause_ids[rows].tolist(), scores.tolist()))
+            if self.delta is not None:
+                rows, scores = self.delta.search(features[selected], weights[selected], k)
+                hits.extend(zip(self.delta_ids[rows].tolist(), scores.tolist()))
+            hits.sort(key=lambda hit: (-hit[1], hit[0]))
+            results.append(hits[:k])
+        return results
+
+    def score_all(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        计算每个文本与全部条款的相似度（不取前k个），供批量任务使用
+
+        所有文本的倒排表一次取出，同一批元素上累加两种得分:
+        - 余弦相似度: TF-IDF向量的点积；
+        - 覆盖率: 文本的n-gram按IDF加权，出现在条款中的比例（0~1），
+          不按条款长度归一化，长条款包含文本中的词语越多得分越高。
+
+        Args:
+            texts: 文本序列
+
+        Returns:
+            (条款ID, 余弦相似度, 覆盖率)，后两者为 (文本数, 条款数) 的float32矩阵，
+            列与条款ID一一对应；已失效的条款得分为0
+        """
+        queries, features, counts = extract_features(texts)
+        weights = tfidf_weights(queries, features, counts, self.idf, len(texts))
+        idf = self.idf[features].astype(np.float64)
+        coverage_weights = idf / np.bincount(queries, weights=idf, minlength=len(texts))[queries]
+
+        segments = [(self.searcher, self.alive)]
+        if self.delta is not None:
+            segments.append((self.delta, None))
+        cosine_parts = []
+        coverage_parts = []
+        for searcher, alive in segments:
+            positions, lengths = gather_postings(searcher.indptr, features)
+            cells = np.repeat(queries, lengths) * searcher.row_count + searcher.rows[positions]
+            size = len(texts) * searcher.row_count
+            cosine = np.bincount(cells, weights=searcher.weights[positions] * np.repeat(weights, lengths),
+                                 minlength=size).reshape(len(texts), searcher.row_count)
+            coverage = np.bincount(cells, weights=np.repeat(coverage_weights, lengths),
+                                   minlength=size).reshape(len(texts), searcher.row_count)
+            if alive is not None:
+                cosine[:, ~alive] = 0
+                coverage[:, ~alive] = 0
+            cosine_parts.append(cosine.astype(np.float32))
+            coverage_parts.append(coverage.astype(np.float32))
+
+        clause_ids = np.concatenate([self.clause_ids, self.delta_ids])
+        return clause_ids, np.hstack(cosine_parts), np.hstack(coverage_parts)
+
+
+_index_lock = threading.Lock()
+_loaded_index: Optional[SemanticIndex] = None
+_loaded_stamp = None
+
+
+def _stat_stamp(path: str):
+    """文件的 (inode, 修改时间)，不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def get_semantic_index(directory: str = SEMANTIC_INDEX_DIR) -> SemanticIndex:
+    """
+    获取当前进程加载的语义索引，主索引重建或增量段更新后自动重新加载
+
+    Raises:
+        SemanticIndexUnavailable: 索引不存在
+    """
+    global _loaded_index, _loaded_stamp
+    main_stamp = _stat_stamp(os.path.join(directory, 'meta.json'))
+    if main_stamp is None:
+        raise SemanticIndexUnavailable(f"语义索引不存在: {directory}，请先运行 python semantic.py")
+    stamp = (directory, main_stamp, _stat_stamp(os.path.join(directory, DELTA_DIR, 'meta.json')))
+
+    with _index_lock:
+        if _loaded_index is None or _loaded_stamp != stamp:
+            _loaded_index = SemanticIndex(directory)
+            _loaded_stamp = stamp
+        return _loaded_index
+
+
+def semantic_search(session: Session, query: str, limit: int = 20,
+                    directory: str = SEMANTIC_INDEX_DIR) -> List[Dict]:
+    """
+    语义检索条款
+
+    Args:
+        session: 数据库会话
+        query: 查询文本
+        limit: 返回结果数量限制
+        directory: 索引目录
+
+    Returns:
+        条款列表，包含相似度得分score；索引构建后被删除的条款不返回
+
+    Raises:
+        SemanticIndexUnavailable: 索引不存在
+    """
+    hits = get_semantic_index(directory).search([query], limit)[0]
+    if not hits:
+        return []
+
+    rows = session.execute(
+        select(Clause.id, Regulation.title, Clause.clause_number, Clause.content)
+        .join(Regulation, Regulation.id == Clause.regulation_id)
+        .where(Clause.id.in_([clause_id for clause_id, _ in hits]))
+    ).all()
+    by_id = {row[0]: row for row in rows}
+
+    results = []
+    for clause_id, score in hits:
+        if clause_id not in by_id:
+            continue
+        _, regulation_title, clause_number, content = by_id[clause_id]
+        results.append({
+            'clause_id': clause_id,
+            'regulation_title': regulation_title,
+            'clause_number': clause_number,
+            'content': content,
+            'score': round(score, 4)
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        if sys.argv[1:] == ['update']:
+            print(f"增量更新语义索引: {SEMANTIC_INDEX_DIR}")
+            stats = update_semantic_index(session)
+            print(f"完成: {stats}")
+        else:
+            print(f"构建语义索引: {SEMANTIC_INDEX_DIR}")
+            stats = build_semantic_index(session)
+            print(f"完成: {stats['clauses']} 个条款（{stats['searcher']}），{stats['nnz']} 个非零元素，"
+                  f"{stats['bytes'] / 1024 / 1024:.1f} MB，耗时 {stats['seconds']:.1f} 秒")
+    finally:
+        session.close()
@@ -0,0 +1,147 @@
+"""
+异步数据库路由测试
+
+在USE_ASYNC_DB开启时重新执行app.py，得到注册了async路由的应用，经aiosqlite
+读取与同步路由相同的数据库文件，确认 /api/match 和 /api/search 的结果与同步
+路由一致，角色或单据类型不存在时返回404。
+"""
+
+import asyncio
+import importlib.util
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app as app_module
+import database
+from database import Base, AuditorRole, AuditRule, Clause, DocumentType
+from matcher import match_cache
+from search_index import register_functions, ensure_search_index
+
+ROLE = '商务管理员'
+DOC_TYPE = '采购招标'
+CONTENTS = [
+    '第一条 招标分为公开招标和邀请招标。',
+    '第二条 招标人采用公开招标方式的，应当发布招标公告。',
+    '第三条 投标人不得相互串通投标报价。',
+    '第四条 邀请招标的，应当向三个以上的法人发出邀请招标的投标邀请书，邀请招标的对象应当具备相应的能力。',
+]
+# 不含检索词的条款，使检索词的逆文档频率为正，BM25得分不为0
+FILLER = [f'第{number}条 采购文件的保存期限为从采购结束之日起至少十五年。' for number in '一二三四五六']
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    """数据库文件路径（aiosqlite的每个连接都是独立的，不能共用内存数据库）"""
+    return tmp_path / 'compliance.db'
+
+
+@pytest.fixture
+def engine(database_path):
+    """覆盖公共夹具: 同步路由和种子数据使用文件数据库"""
+    engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda connection, _: register_functions(connection))
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(session, add_regulation):
+    """导入两部法规，第一部的四个条款各关联一条不同优先级的审核规则"""
+    add_regulation('测试招标投标法', CONTENTS)
+    add_regulation('测试采购文件管理办法', FILLER)
+    role = AuditorRole(role_name=ROLE)
+    doc_type = DocumentType(type_name=DOC_TYPE)
+    session.add_all([role, doc_type])
+    session.flush()
+    for priority, clause in enumerate(session.query(Clause).order_by(Clause.id).limit(len(CONTENTS))):
+        session.add(AuditRule(role_id=role.id, document_type_id=doc_type.id,
+                              clause_id=clause.id, priority=priority))
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def async_client(database_path, session, monkeypatch):
+    """
+    USE_ASYNC_DB开启时的API客户端
+
+    以新的模块名执行app.py，已导入的app模块不受影响；get_async_db替换为
+    连接测试数据库文件的异步会话。
+    """
+    monkeypatch.setattr(database, 'USE_ASYNC_DB', True)
+    spec = importlib.util.spec_from_file_location('app_async_db', app_module.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.undo()
+
+    # 每个请求在TestClient自己的事件循环中执行，不使用连接池，避免连接跨事件循环复用
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    event.listen(async_engine.sync_engine, "connect", lambda connection, _: register_functions(connection))
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_async_db():
+        async with sessions() as db:
+            yield db
+
+    module.app.dependency_overrides[database.get_async_db] = get_test_async_db
+    match_cache.clear()
+    yield TestClient(module.app)
+    match_cache.clear()
+    asyncio.run(async_engine.dispose())
+
+
+def route_endpoint(application, path):
+    """路径对应的路由函数"""
+    return next(route.endpoint for route in application.routes if getattr(route, 'path', None) == path)
+
+
+def test_async_routes_are_registered(async_client):
+    """USE_ASYNC_DB开启时 /api/match 和 /api/search 注册为async路由"""
+    assert route_endpoint(async_client.app, '/api/match').__name__ == 'match_clauses_async'
+    assert route_endpoint(async_client.app, '/api/search').__name__ == 'search_clauses_async'
+    assert route_endpoint(app_module.app, '/api/match').__name__ == 'match_clauses'
+
+
+def test_match_same_as_sync(client, async_client):
+    """异步路由的匹配结果与同步路由相同"""
+    params = {'role': ROLE, 'document_type': DOC_TYPE}
+    expected = client.get('/api/match', params=params)
+    assert expected.status_code == 200
+    assert [clause['priority'] for clause in expected.json()['matched_clauses']] == [3, 2, 1, 0]
+
+    # 清空同步请求写入的缓存，让异步路由实际查询数据库
+    match_cache.clear()
+    response = async_client.get('/api/match', params=params)
+    assert response.status_code == 200
+    assert response.json() == expected.json()
+
+
+def test_match_unknown_role_or_document_type(async_client):
+    """角色或单据类型不存在时返回404"""
+    response = async_client.get('/api/match', params={'role': '不存在的角色', 'document_type': DOC_TYPE})
+    assert response.status_code == 404
+    assert response.json()['detail'] == '未找到审核角色: 不存在的角色'
+
+    response = async_client.get('/api/match', params={'role': ROLE, 'document_type': '不存在的单据'})
+    assert response.status_code == 404
+    assert response.json()['detail'] == '未找到单据类型: 不存在的单据'
+
+
+def test_search_ranked_hits(client, async_client):
+    """异步路由按BM25得分排序返回命中条款，与同步路由相同；检索式错误返回400"""
+    response = async_client.get('/api/search', params={'keyword': '邀请招标', 'limit': 10})
+    assert response.status_code == 200
+    body = response.json()
+    # 第四条出现三次，排在只出现一次的第一条之前（与条款ID顺序相反）
+    assert [result['clause_number'] for result in body['results']] == ['第四条', '第一条']
+    scores = [result['score'] for result in body['results']]
+    assert scores == sorted(scores, reverse=True) and scores[-1] > 0
+    assert body == client.get('/api/search', params={'keyword': '邀请招标', 'limit': 10}).json()
+
+    assert async_client.get('/api/search', params={'keyword': '"招标'}).status_code == 400
@@ -0,0 +1,124 @@
+"""
+匹配结果缓存测试
+
+验证TTLCache的LRU淘汰、过期和按generation丢弃过时结果，以及ORM写入、
+批量insert/delete语句提交后匹配结果缓存被清空。
+"""
+
+import time
+
+import pytest
+from sqlalchemy import delete
+
+import cache
+from cache import TTLCache
+from database import AuditorRole, AuditRule, Clause, DocumentType, IngestJob, Regulation
+from matcher import match_cache
+from rule_linker import insert_rules
+
+
+@pytest.fixture
+def session(session):
+    """写入一个角色、一个单据类型和一条条款"""
+    session.add_all([
+        AuditorRole(role_name='商务管理员'),
+        DocumentType(type_name='采购合同'),
+        Regulation(title='测试法', clauses=[Clause(clause_number='第一条', content='第一条 测试条款。')]),
+    ])
+    session.commit()
+    return session
+
+
+def fill_match_cache():
+    """写入一个缓存条目并返回当前generation"""
+    match_cache.set(('商务管理员', '采购合同'), ['cached'])
+    assert match_cache.get(('商务管理员', '采购合同')) == ['cached']
+    return match_cache.generation
+
+
+def test_lru_eviction():
+    """超出容量时淘汰最久未使用的条目，读取会刷新使用顺序"""
+    lru = TTLCache(maxsize=2, ttl=0)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+    assert lru.get('b') is None
+    assert lru.get('a') == 1 and lru.get('c') == 3
+    assert lru.stats()['evictions'] == 1 and lru.stats()['size'] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    """条目在有效期后视为未命中并被删除"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    ttl = TTLCache(maxsize=10, ttl=5)
+    ttl.set('a', 1)
+    now[0] += 4.9
+    assert ttl.get('a') == 1
+    now[0] += 0.2
+    assert ttl.get('a') is None
+    stats = ttl.stats()
+    assert stats['expirations'] == 1 and stats['size'] == 0
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+
+def test_set_discards_result_computed_before_clear():
+    """计算期间缓存被清空过，带旧generation的写入被丢弃"""
+    guarded = TTLCache(maxsize=10, ttl=60)
+    generation = guarded.generation
+    guarded.clear()
+    guarded.set('a', 'stale', generation)
+    assert guarded.get('a') is None
+    guarded.set('a', 'fresh', guarded.generation)
+    assert guarded.get('a') == 'fresh'
+
+    disabled = TTLCache(maxsize=0)
+    disabled.set('a', 1)
+    assert disabled.get('a') is None
+
+
+def test_orm_write_clears_match_cache_on_commit(session):
+    """ORM修改条款在提交后清空缓存，回滚时不清空"""
+    generation = fill_match_cache()
+    clause = session.query(Clause).one()
+
+    clause.content = '第一条 修改后的测试条款。'
+    session.flush()
+    assert match_cache.get(('商务管理员', '采购合同')) == ['cached']  # 提交前不清空
+    session.rollback()
+    assert match_cache.generation == generation
+
+    clause.content = '第一条 修改后的测试条款。'
+    session.commit()
+    assert match_cache.generation == generation + 1
+    assert match_cache.get(('商务管理员', '采购合同')) is None
+
+
+def test_core_insert_and_delete_clear_match_cache(session):
+    """经由会话执行的批量insert（如insert_rules）和delete语句提交后清空缓存"""
+    role_id = session.query(AuditorRole.id).scalar()
+    document_type_id = session.query(DocumentType.id).scalar()
+    clause_id = session.query(Clause.id).scalar()
+
+    generation = fill_match_cache()
+    inserted = insert_rules(session, [{'role_id': role_id, 'document_type_id': document_type_id,
+                                       'clause_id': clause_id, 'source': 'example', 'priority': 10}])
+    session.commit()
+    assert inserted == 1
+    assert match_cache.generation == generation + 1
+
+    generation = fill_match_cache()
+    session.execute(delete(AuditRule).where(AuditRule.source == 'example'))
+    session.commit()
+    assert match_cache.generation == generation + 1
+
+
+def test_unrelated_write_keeps_match_cache(session):
+    """写入与匹配结果无关的表不清空缓存"""
+    generation = fill_match_cache()
+    session.add(IngestJob(id='job', created_at=time.time()))
+    session.commit()
+    assert match_cache.generation == generation
+    assert match_cache.get(('商务管理员', '采购合同')) == ['cached']
+
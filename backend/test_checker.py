@@ -0,0 +1,215 @@
+"""
+单据合规检查测试
+
+验证段落切分、批量打分与逐对计算的结果一致，流式检查事件，以及 /api/check
+以NDJSON逐行返回的事件顺序和匹配结果缓存的复用。
+"""
+
+import json
+from functools import partial
+
+import numpy as np
+import pytest
+from docx import Document
+
+import app as app_module
+import checker
+from checker import ClauseScorer, check_document, split_passages
+from database import AuditorRole, AuditRule, Clause, DocumentType
+from matcher import match_cache
+from semantic import extract_features, tfidf_weights, FEATURE_SPACE
+
+CLAUSES = [
+    {'clause_id': 11, 'clause_number': '第二十条',
+     'content': '第二十条 投标人不得相互串通投标报价，不得排挤其他投标人的公平竞争。'},
+    {'clause_id': 12, 'clause_number': '第三十一条',
+     'content': '第三十一条 政府采购合同的双方当事人不得擅自变更、中止或者终止合同。'},
+    {'clause_id': 13, 'clause_number': '第九条',
+     'content': '第九条 单位应当建立健全财务报销制度，报销凭证应当真实、合法、完整。'},
+]
+
+
+def test_split_passages_respects_pages_and_length():
+    """句子合并成不超过上限的段落，段落不跨页，超长句子被截断"""
+    units = [
+        (1, '第一句话。第二句话；第三句。'),
+        (2, '第四句' + '长' * 25 + '。'),
+    ]
+    passages = list(split_passages(units, max_chars=12))
+    assert [passage['text'] for passage in passages] == [
+        '第一句话。第二句话；', '第三句。', '第四句' + '长' * 9, '长' * 12, '长' * 4 + '。'
+    ]
+    assert [passage['page'] for passage in passages] == [1, 1, 2, 2, 2]
+    assert [passage['index'] for passage in passages] == list(range(5))
+    assert all(len(passage['text']) <= 12 for passage in passages)
+
+
+def test_scorer_matches_pairwise_computation():
+    """批量得分等于逐个 (段落, 条款) 计算的余弦相似度与覆盖率的加权和"""
+    rng = np.random.default_rng(0)
+    idf = rng.uniform(1.0, 3.0, FEATURE_SPACE).astype(np.float32)
+    clause_texts = [clause['content'] for clause in CLAUSES]
+    passages = ['投标人之间串通投标报价', '合同双方不得擅自变更合同', '无关的内容', '报销凭证应当真实']
+    scorer = ClauseScorer(clause_texts, idf, lexical_weight=0.3)
+    scores = scorer.score(passages)
+    assert scores.shape == (len(passages), len(CLAUSES))
+
+    def vectors(texts):
+        documents, features, counts = extract_features(texts)
+        weights = tfidf_weights(documents, features, counts, idf, len(texts))
+        result = [{} for _ in texts]
+        for document, feature, weight in zip(documents, features, weights):
+            result[document][int(feature)] = float(weight)
+        return result
+
+    clause_vectors = vectors(clause_texts)
+    for row, passage_vector in enumerate(vectors(passages)):
+        for column, clause_vector in enumerate(clause_vectors):
+            cosine = sum(weight * clause_vector.get(feature, 0.0) for feature, weight in passage_vector.items())
+            total = sum(idf[feature] for feature in clause_vector)
+            coverage = sum(idf[feature] for feature in clause_vector if feature in passage_vector) / total
+            assert scores[row, column] == pytest.approx(0.7 * cosine + 0.3 * coverage, rel=1e-4, abs=1e-6)
+
+PARAGRAPHS = [
+    '一、项目概况', '本项目为办公设备采购，预算金额五十万元。',
+    '二、投标人承诺', '投标人承诺不与其他投标人相互串通投标报价。',
+    '三、合同条款', '合同签订后，双方当事人不得擅自变更、中止或者终止合同。',
+    '四、其他', '交货地点为采购人指定地点。',
+]
+
+
+def save_document(path):
+    """把单据段落写成Word文档"""
+    document = Document()
+    for text in PARAGRAPHS:
+        document.add_paragraph(text)
+    document.save(path)
+    return path
+
+
+def test_check_document_streams_related_passages(tmp_path):
+    """逐批产出相关段落，最终结果中每个条款得分最高的段落正确"""
+    path = save_document(tmp_path / '投标文件.docx')
+
+    events = list(check_document(str(path), CLAUSES, top=1, min_score=0.2, chunk_passages=2))
+    assert [event['event'] for event in events].count('done') == 1
+    assert events[-1]['event'] == 'done'
+    assert events[-2]['event'] == 'progress' and events[-2]['passages'] == events[-1]['passages']
+
+    matches = [event for event in events if event['event'] == 'match']
+    assert {event['clause_id'] for event in matches} == {11, 12}
+    assert all(len(event['passages']) == 1 for event in matches)
+
+    results = {result['clause_id']: result for result in events[-1]['results']}
+    assert '串通投标报价' in results[11]['passages'][0]['text']
+    assert '擅自变更' in results[12]['passages'][0]['text']
+    assert results[13]['passages'] == []
+    assert results[11]['clause_number'] == '第二十条'
+
+
+
+@pytest.fixture
+def check_env(tmp_path, session, add_regulation, monkeypatch):
+    """
+    导入CLAUSES中的条款并为一个角色和单据类型配置审核规则
+
+    上传目录指向临时目录，不使用语义索引；缩短段落并逐段打分，
+    使测试单据分成多批处理。
+    """
+    add_regulation('测试招标投标法', [clause['content'] for clause in CLAUSES])
+    role = AuditorRole(role_name='商务管理员')
+    doc_type = DocumentType(type_name='采购招标')
+    session.add_all([role, doc_type])
+    session.flush()
+    for priority, clause in enumerate(session.query(Clause).order_by(Clause.id)):
+        session.add(AuditRule(role_id=role.id, document_type_id=doc_type.id,
+                              clause_id=clause.id, priority=priority))
+    session.commit()
+    monkeypatch.setattr(app_module, 'UPLOAD_DIR', tmp_path / 'uploads')
+    monkeypatch.setattr(app_module, 'semantic_idf', lambda: None)
+    monkeypatch.setattr(checker, 'split_passages', partial(split_passages, max_chars=40))
+    monkeypatch.setattr(app_module, 'check_document', partial(check_document, chunk_passages=1))
+    return tmp_path
+
+
+def post_check(client, path, **form):
+    """上传单据检查，返回响应和逐行解析的事件"""
+    data = {'role': '商务管理员', 'document_type': '采购招标', 'top': '1', 'min_score': '0.2', **form}
+    with open(path, 'rb') as stream:
+        response = client.post('/api/check', data=data, files={'file': (path.name, stream)})
+    lines = response.text.splitlines()
+    return response, [json.loads(line) for line in lines]
+
+
+def test_check_api_streams_ndjson_events(client, check_env):
+    """每行一个事件，依次为start、match/progress交替、done；done中为每个条款得分最高的段落"""
+    path = save_document(check_env / '投标文件.docx')
+    response, events = post_check(client, path)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+
+    kinds = [event['event'] for event in events]
+    assert kinds[0] == 'start' and kinds[-1] == 'done'
+    assert kinds.count('start') == 1 and kinds.count('done') == 1
+    assert set(kinds[1:-1]) == {'match', 'progress'}
+    # 每批先产出该批的match事件，再产出progress：第二段和第三段各命中一个条款
+    assert kinds[1:-1] == ['progress', 'match', 'progress', 'match', 'progress', 'progress']
+
+    start, done = events[0], events[-1]
+    assert start['role'] == '商务管理员' and start['document_type'] == '采购招标'
+    numbers = [clause['clause_number'] for clause in start['clauses']]
+    assert sorted(numbers) == sorted(clause['clause_number'] for clause in CLAUSES)
+    assert all(clause['regulation_title'] == '测试招标投标法' for clause in start['clauses'])
+
+    progress = [event for event in events if event['event'] == 'progress']
+    assert [event['passages'] for event in progress] == [1, 2, 3, 4]
+    assert done['passages'] == 4
+    assert {'parse_seconds', 'score_seconds', 'seconds'} <= set(done)
+
+    results = {result['clause_number']: result for result in done['results']}
+    assert [result['clause_id'] for result in done['results']] == [clause['clause_id'] for clause in start['clauses']]
+    assert '串通投标报价' in results['第二十条']['passages'][0]['text']
+    assert '擅自变更' in results['第三十一条']['passages'][0]['text']
+    assert results['第九条']['passages'] == []
+    matched = {event['clause_id'] for event in events if event['event'] == 'match'}
+    assert matched == {results['第二十条']['clause_id'], results['第三十一条']['clause_id']}
+
+    # 检查结束后删除上传的单据
+    assert not any(p.is_file() for p in (check_env / 'uploads').rglob('*'))
+
+
+def test_check_api_shares_match_cache(client, check_env, monkeypatch):
+    """条款经匹配结果缓存读取，与 /api/match 共用，检查不会修改缓存中的条款"""
+    matched = client.get('/api/match', params={'role': '商务管理员', 'document_type': '采购招标'}).json()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('缓存命中时不应查询数据库')
+
+    monkeypatch.setattr(app_module.SimpleMatcher, 'match_clauses', fail)
+    path = save_document(check_env / '投标文件.docx')
+    response, events = post_check(client, path)
+    assert response.status_code == 200 and events[-1]['event'] == 'done'
+    assert [clause['clause_id'] for clause in events[0]['clauses']] == \
+        [clause['clause_id'] for clause in matched['matched_clauses']]
+    assert match_cache.get(('商务管理员', '采购招标')) == matched['matched_clauses']
+
+
+def test_check_api_errors(client, check_env):
+    """不支持的格式返回400，角色或单据类型不存在返回404，单据解析失败时以error事件结束"""
+    path = check_env / '说明.txt'
+    path.write_text('说明')
+    response, _ = post_check(client, path)
+    assert response.status_code == 400
+
+    path = save_document(check_env / '投标文件.docx')
+    response = client.post('/api/check', data={'role': '不存在的角色', 'document_type': '采购招标'},
+                           files={'file': (path.name, path.read_bytes())})
+    assert response.status_code == 404
+    assert response.json()['detail'] == '未找到审核角色: 不存在的角色'
+
+    path = check_env / '损坏的单据.pdf'
+    path.write_bytes(b'not a pdf')
+    response, events = post_check(client, path)
+    assert response.status_code == 200
+    assert [event['event'] for event in events] == ['start', 'error']
+    assert events[-1]['detail'].startswith('文档处理失败')
@@ -0,0 +1,179 @@
+"""
+数据库连接和迁移测试
+
+验证新建连接时设置的SQLite PRAGMA（及环境变量覆盖），以及在按早期版本建表的
+数据库（没有哈希列和索引，含重复的审核规则和同名法规）上执行migrate_database后
+补建列和索引、处理重复数据并重建全文索引。
+"""
+
+import importlib.util
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import database
+from database import migrate_database
+from matcher import SimpleMatcher
+from search_index import FTS_TABLE, register_functions
+
+PRAGMA_NAMES = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+
+# 早期版本的建表语句（只有主键和外键，没有索引）
+OLD_SCHEMA = [
+    """
+    CREATE TABLE regulations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(500) NOT NULL,
+        source_file VARCHAR(255)
+    )
+    """,
+    """
+    CREATE TABLE clauses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        regulation_id INTEGER NOT NULL REFERENCES regulations (id),
+        clause_number VARCHAR(50),
+        content TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE auditor_roles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_name VARCHAR(100) NOT NULL UNIQUE,
+        responsibilities TEXT
+    )
+    """,
+    """
+    CREATE TABLE document_types (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type_name VARCHAR(200) NOT NULL UNIQUE,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE audit_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_id INTEGER NOT NULL REFERENCES auditor_roles (id),
+        document_type_id INTEGER NOT NULL REFERENCES document_types (id),
+        clause_id INTEGER NOT NULL REFERENCES clauses (id),
+        source VARCHAR(50),
+        priority INTEGER
+    )
+    """,
+]
+
+OLD_DATA = [
+    "INSERT INTO regulations (id, title, source_file) VALUES "
+    "(1, '测试招标投标法', 'a.md'), (2, '测试招标投标法', 'b.md'), (3, '测试政府采购法', 'c.md')",
+    "INSERT INTO clauses (id, regulation_id, clause_number, content) VALUES "
+    "(1, 1, '第一条', '第一条 招标分为公开招标和邀请招标。'), "
+    "(2, 2, '第一条', '第一条 招标分为公开招标和邀请招标。'), "
+    "(3, 3, '第一条', '第一条 采购人可以委托采购代理机构办理采购事宜。')",
+    "INSERT INTO auditor_roles (id, role_name) VALUES (1, '商务管理员')",
+    "INSERT INTO document_types (id, type_name) VALUES (1, '采购招标')",
+    "INSERT INTO audit_rules (id, role_id, document_type_id, clause_id, source, priority) VALUES "
+    "(1, 1, 1, 1, 'example', 10), (2, 1, 1, 1, 'example', 10), (3, 1, 1, 3, 'example', 5), "
+    "(4, 1, 1, 1, 'manual', 1)",
+]
+
+
+@pytest.fixture
+def old_engine(tmp_path, monkeypatch):
+    """按早期版本建表并写入数据的数据库文件，替换database模块的引擎"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'compliance.db'}")
+    event.listen(engine, "connect", lambda connection, _: register_functions(connection))
+    with engine.begin() as connection:
+        for statement in OLD_SCHEMA + OLD_DATA:
+            connection.exec_driver_sql(statement)
+    monkeypatch.setattr(database, 'engine', engine)
+    yield engine
+    engine.dispose()
+
+
+def load_database_module(tmp_path, monkeypatch, **env):
+    """在给定的环境变量下以新的模块名执行database.py，数据库文件位于tmp_path"""
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'compliance.db'))
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    spec = importlib.util.spec_from_file_location('database_pragmas', database.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_pragmas(connection):
+    """读取连接上的PRAGMA参数"""
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in PRAGMA_NAMES}
+
+
+def test_connections_use_configured_pragmas(tmp_path, monkeypatch):
+    """连接池中的每个新连接都设置WAL、synchronous=NORMAL、busy_timeout等参数"""
+    module = load_database_module(tmp_path, monkeypatch)
+    try:
+        with module.engine.connect() as first, module.engine.connect() as second:
+            expected = {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000,
+                        'cache_size': -65536, 'mmap_size': 256 * 1024 * 1024}
+            assert read_pragmas(first) == expected
+            assert read_pragmas(second) == expected
+    finally:
+        module.engine.dispose()
+
+
+def test_pragmas_follow_environment(tmp_path, monkeypatch):
+    """SQLITE_*环境变量覆盖默认参数"""
+    module = load_database_module(tmp_path, monkeypatch, SQLITE_JOURNAL_MODE='DELETE', SQLITE_SYNCHRONOUS='FULL',
+                                  SQLITE_BUSY_TIMEOUT='1234', SQLITE_CACHE_SIZE='-2048', SQLITE_MMAP_SIZE='0')
+    try:
+        assert module.SQLITE_PRAGMAS['busy_timeout'] == 1234
+        with module.engine.connect() as connection:
+            assert read_pragmas(connection) == {'journal_mode': 'delete', 'synchronous': 2, 'busy_timeout': 1234,
+                                                'cache_size': -2048, 'mmap_size': 0}
+    finally:
+        module.engine.dispose()
+
+
+def index_names(engine, table):
+    """表上的索引名"""
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def test_migrate_old_database(old_engine):
+    """补建列和索引，合并重复规则、给同名法规改名，并重建全文索引"""
+    migrate_database()
+
+    inspector = inspect(old_engine)
+    assert {'content_hash', 'structure_hash'} <= {c['name'] for c in inspector.get_columns('regulations')}
+    assert 'content_hash' in {c['name'] for c in inspector.get_columns('clauses')}
+    assert {'regulation_nodes', 'ingest_jobs', 'ingest_job_files'} <= set(inspector.get_table_names())
+
+    assert {'uq_audit_rules_role_doctype_clause', 'ix_audit_rules_role_doctype_priority'} <= \
+        index_names(old_engine, 'audit_rules')
+    assert {'uq_regulations_title', 'ix_regulations_content_hash'} <= index_names(old_engine, 'regulations')
+    assert 'ix_clauses_regulation_id' in index_names(old_engine, 'clauses')
+
+    with old_engine.connect() as connection:
+        # 同一角色、单据类型和条款保留最早的一条规则
+        rules = connection.execute(text("SELECT id FROM audit_rules ORDER BY id")).scalars().all()
+        assert rules == [1, 3]
+        # 同名法规保留最早的一部，其余在标题后加上法规ID，条款不删除
+        titles = connection.execute(text("SELECT title FROM regulations ORDER BY id")).scalars().all()
+        assert titles == ['测试招标投标法', '测试招标投标法（2）', '测试政府采购法']
+        assert connection.execute(text("SELECT COUNT(*) FROM clauses")).scalar() == 3
+        assert connection.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize")).scalar() == 3
+
+    with sessionmaker(bind=old_engine)() as session:
+        results = SimpleMatcher(session).search_clauses_by_keyword('采购代理机构')
+        assert [result['clause_id'] for result in results] == [3]
+
+
+def test_migrate_is_idempotent(old_engine):
+    """重复执行不再修改数据"""
+    migrate_database()
+    with old_engine.connect() as connection:
+        before = connection.execute(text("SELECT id, title FROM regulations ORDER BY id")).all()
+
+    migrate_database()
+    with old_engine.connect() as connection:
+        assert connection.execute(text("SELECT id, title FROM regulations ORDER BY id")).all() == before
+        assert connection.execute(text("SELECT COUNT(*) FROM audit_rules")).scalar() == 2
+        assert connection.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize")).scalar() == 3
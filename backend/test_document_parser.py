@@ -0,0 +1,143 @@
+"""
+文档解析器测试
+
+验证流式解析与整篇解析的条款和层级结构一致，以及逐页提取PDF文本时
+只从缓存中移除内容流、保留页面间共用的字体，以文件句柄按需读取PDF，
+以及按页段并行提取与逐页提取的结果相同。
+"""
+
+import io
+import tempfile
+from pathlib import Path
+
+from docx import Document
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+import document_parser
+from document_parser import DocumentParser, _content_stream_keys, _extract_pages
+
+PARAGRAPHS = [
+    '第一章 总则',
+    '第一条 为了规范政府采购行为，提高政府采购资金的使用效益，制定本法。',
+    '第二条 在中华人民共和国境内进行的政府采购适用本法。',
+    '第二章 采购方式',
+    '第三条 政府采购采用以下方式：',
+    '（一）公开招标；',
+    '（二）邀请招标。',
+]
+
+
+def write_pdf(path, texts):
+    """生成每页一行文本的PDF，各页共用同一个字体对象"""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for text in texts:
+        page = PageObject.create_blank_page(width=300, height=200)
+        stream = DecodedStreamObject()
+        stream.set_data(f'BT /F1 12 Tf 20 100 Td ({text}) Tj ET'.encode('ascii'))
+        page[NameObject('/Contents')] = writer._add_object(stream)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+        })
+        writer.add_page(page)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def test_extract_pages_evicts_only_content_streams():
+    """提取完的页面内容流不留在缓存中，共用的字体只解析一次"""
+    path = Path(tempfile.mkdtemp()) / 'pages.pdf'
+    texts = [f'Page {i}' for i in range(6)]
+    write_pdf(path, texts)
+
+    reader = PdfReader(str(path))
+    extracted = [text for text, _ in _extract_pages(reader, 0, len(texts))]
+    assert [text.strip() for text in extracted] == texts
+
+    cache = reader.resolved_objects
+    contents = [page.raw_get('/Contents') for page in reader.pages]
+    assert not any((ref.generation, ref.idnum) in cache for ref in contents)
+    assert [_content_stream_keys(page) for page in reader.pages] == [
+        [(ref.generation, ref.idnum)] for ref in contents
+    ]
+    font = reader.pages[0]['/Resources']['/Font'].raw_get('/F1')
+    assert (font.generation, font.idnum) in cache
+
+
+def test_iter_clauses_tracks_hierarchy():
+    """流式解析与parse_file得到相同的条款和层级结构"""
+    path = Path(tempfile.mkdtemp()) / '测试采购法.docx'
+    document = Document()
+    for text in PARAGRAPHS:
+        document.add_paragraph(text)
+    document.save(path)
+
+    parser = DocumentParser()
+    title, clauses = parser.parse_file(str(path))
+    hierarchy = parser.last_hierarchy
+    assert title == '测试采购法'
+    assert [clause['clause_number'] for clause in clauses] == ['第一条', '第二条', '第三条']
+    assert [node['level'] for node in hierarchy].count('chapter') == 2
+
+    streaming = DocumentParser()
+    assert [dict(clause) for clause in streaming.iter_clauses(str(path))] == [dict(clause) for clause in clauses]
+    assert streaming.last_hierarchy == hierarchy
+
+
+
+def test_pdf_is_read_through_a_file_handle(monkeypatch):
+    """PdfReader收到的是文件句柄（按需读取）而不是路径（整个文件读入内存），迭代结束后关闭"""
+    path = Path(tempfile.mkdtemp()) / 'pages.pdf'
+    texts = [f'Page {i}' for i in range(3)]
+    write_pdf(path, texts)
+
+    streams = []
+
+    class RecordingReader(PdfReader):
+        def __init__(self, stream, *args, **kwargs):
+            streams.append(stream)
+            super().__init__(stream, *args, **kwargs)
+
+    monkeypatch.setattr(document_parser, 'PdfReader', RecordingReader)
+    pages = DocumentParser().iter_pdf_pages(str(path))
+    assert next(pages).strip() == texts[0]
+    stream, = streams
+    assert isinstance(stream, io.BufferedReader) and not stream.closed
+    assert [page.strip() for page in pages] == texts[1:]
+    assert stream.closed
+
+
+def test_parallel_page_ranges_match_serial():
+    """多进程按页段提取的文本、页码顺序和逐页统计与单进程逐页提取相同"""
+    path = Path(tempfile.mkdtemp()) / 'pages.pdf'
+    texts = [f'Page {i}' + '.' * (i % 7) for i in range(40)]
+    write_pdf(path, texts)
+
+    serial = DocumentParser()
+    parallel = DocumentParser(page_workers=3, pages_per_task=4)
+    serial_pages = list(serial.iter_pdf_pages(str(path)))
+    parallel_pages = list(parallel.iter_pdf_pages(str(path)))
+    assert [page.strip() for page in serial_pages] == texts
+    assert parallel_pages == serial_pages
+
+    def page_chars(parser):
+        return [(stat['page'], stat['chars']) for stat in parser.last_page_stats]
+
+    assert page_chars(parallel) == page_chars(serial) == [(i + 1, len(page) - 1) for i, page in enumerate(serial_pages)]
+
+    # 耗时每次不同，比较汇总中与耗时无关的部分
+    serial_summary = serial.page_stats_summary()
+    parallel_summary = parallel.page_stats_summary()
+    assert parallel_summary.keys() == serial_summary.keys()
+    assert parallel_summary['page_count'] == serial_summary['page_count'] == 40
+    assert len(parallel_summary['slowest_pages']) == len(serial_summary['slowest_pages']) == 5
+    chars = dict(page_chars(serial))
+    for summary in (serial_summary, parallel_summary):
+        seconds = [page['seconds'] for page in summary['slowest_pages']]
+        assert seconds == sorted(seconds, reverse=True)
+        assert all(page['chars'] == chars[page['page']] for page in summary['slowest_pages'])
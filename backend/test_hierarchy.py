@@ -0,0 +1,126 @@
+"""
+法规层级结构测试
+
+验证编/章/节/条/款/项的提取、中文序号转换，以及写库后按序号查询。
+"""
+
+import glob
+import os
+
+from hierarchy import (
+    cn_to_int, int_to_cn, extract_hierarchy, store_hierarchy, get_structure, get_chapter_clauses, get_article
+)
+from ingest import insert_regulations
+from segmenter import segment_clauses
+
+REGULATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'regulations')
+
+SAMPLE = (
+    "测试条例\n\n"
+    "目　　录\n"
+    "第一章　总　　则\n"
+    "第二章　招标\n\n"
+    "第一章　总　　则\n\n"
+    "第一条　为了规范招标投标活动，制定本条例。\n\n"
+    "## 第二章　招标\n\n"
+    "第一节　一般规定\n\n"
+    "第二条　下列项目必须进行招标：\n"
+    "（一）大型基础设施项目；\n"
+    "（二）使用国有资金投资的项目，包括：\n"
+    "1．使用预算资金的项目；\n"
+    "2．使用国有企业事业单位资金的项目。\n"
+    "前款所列项目的具体范围由国务院规定。\n\n"
+    "第二节　招标文件\n\n"
+    "第三条　招标人应当根据招标项目的特点和需要编制招标文件，招标文件应当包括\n"
+    "招标项目的技术要求和投标报价要求。\n"
+)
+
+
+def levels(nodes):
+    """(层级, 编号, 父节点编号) 列表"""
+    return [
+        (node['level'], node['label'], nodes[node['parent']]['label'] if node['parent'] is not None else None)
+        for node in nodes
+    ]
+
+
+def test_cn_to_int():
+    """中文数字转换为整数"""
+    cases = {'一': 1, '十': 10, '十二': 12, '二十': 20, '二十三': 23, '一百': 100,
+             '一百零三': 103, '一百一十五': 115, '三百二十': 320, '12': 12}
+    for text, expected in cases.items():
+        assert cn_to_int(text) == expected, text
+
+
+def test_int_to_cn():
+    """整数转换为法规编号写法的中文数字，与cn_to_int互逆"""
+    cases = {1: '一', 10: '十', 12: '十二', 20: '二十', 100: '一百', 103: '一百零三',
+             110: '一百一十', 115: '一百一十五', 320: '三百二十', 999: '九百九十九', 1000: '1000'}
+    for number, expected in cases.items():
+        assert int_to_cn(number) == expected, number
+    assert all(cn_to_int(int_to_cn(number)) == number for number in range(1, 1000))
+
+
+def test_extracts_hierarchy():
+    """目录被忽略；章、节、条、款、项按层级挂接；目并入项；折行并入同一款"""
+    nodes = extract_hierarchy([SAMPLE])
+    assert levels(nodes) == [
+        ('chapter', '第一章', None),
+        ('article', '第一条', '第一章'),
+        ('paragraph', '第一款', '第一条'),
+        ('chapter', '第二章', None),
+        ('section', '第一节', '第二章'),
+        ('article', '第二条', '第一节'),
+        ('paragraph', '第一款', '第二条'),
+        ('item', '（一）', '第一款'),
+        ('item', '（二）', '第一款'),
+        ('paragraph', '第二款', '第二条'),
+        ('section', '第二节', '第二章'),
+        ('article', '第三条', '第二节'),
+        ('paragraph', '第一款', '第三条'),
+    ]
+    assert nodes[0]['title'] == '总则'
+    assert [node['ordinal'] for node in nodes if node['level'] == 'item'] == [1, 2]
+    assert nodes[8]['content'].endswith('2．使用国有企业事业单位资金的项目。')
+    assert nodes[12]['content'] == '招标人应当根据招标项目的特点和需要编制招标文件，招标文件应当包括招标项目的技术要求和投标报价要求。'
+
+
+def test_streaming_matches_whole_document():
+    """逐字符输入与整篇输入的结果相同"""
+    assert extract_hierarchy(SAMPLE) == extract_hierarchy([SAMPLE])
+
+
+def test_articles_match_segmented_clauses():
+    """法规库中每部法规提取出的条与条款切分结果一一对应"""
+    for path in sorted(glob.glob(os.path.join(REGULATIONS_DIR, '*.md'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        nodes = extract_hierarchy([content])
+        articles = [node['label'] for node in nodes if node['level'] == 'article']
+        assert articles == [clause['clause_number'] for clause in segment_clauses(content)], path
+        assert all(node['parent'] is not None for node in nodes if node['level'] == 'article'), path
+
+
+def test_store_and_query(session):
+    """写库后按章、条、项序号查询"""
+    regulation_id = insert_regulations(session, [('测试条例', 'test.md', segment_clauses(SAMPLE))])[0]
+    assert store_hierarchy(session, regulation_id, extract_hierarchy([SAMPLE])) == 13
+    session.commit()
+
+    chapter = get_chapter_clauses(session, regulation_id, 2)
+    assert (chapter['label'], chapter['title']) == ('第二章', '招标')
+    assert [clause['clause_number'] for clause in chapter['clauses']] == ['第二条', '第三条']
+    assert get_chapter_clauses(session, regulation_id, 5) is None
+
+    result = get_article(session, regulation_id, 2, item=2)
+    assert result['article']['content'].startswith('第二条 下列项目必须进行招标')
+    assert [node['label'] for node in result['nodes']] == ['（二）']
+    assert result['nodes'][0]['clause_id'] == result['article']['clause_id']
+    assert [node['label'] for node in get_article(session, regulation_id, 2)['nodes']] == ['第一款', '第二款']
+    assert get_article(session, regulation_id, 2, paragraph=2, item=1) is None
+
+    tree = get_structure(session, regulation_id, max_level='section')
+    assert [(node['label'], [child['label'] for child in node['children']]) for node in tree] == [
+        ('第一章', []), ('第二章', ['第一节', '第二节'])
+    ]
+
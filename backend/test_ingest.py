@@ -0,0 +1,129 @@
+"""
+增量导入测试
+
+验证sync_regulations按内容哈希只写入有变化的条款，
+并保留未删除条款上的审核规则；insert_regulations一次写入多部法规时
+返回的ID与输入顺序一致，条款指向各自的法规。
+"""
+
+import pytest
+from sqlalchemy import select
+
+import ingest
+from database import Regulation, Clause, AuditorRole, DocumentType, AuditRule
+from ingest import (
+    sync_regulations, insert_regulations, clause_hash, regulation_hash, find_duplicate_regulation
+)
+
+TITLE = '测试招标投标法'
+
+
+def numbered_clauses(*contents):
+    """按顺序生成第一条、第二条……"""
+    numbers = '一二三四五六七八九'
+    return [
+        {'clause_number': f'第{numbers[i]}条', 'content': f'第{numbers[i]}条 {content}'}
+        for i, content in enumerate(contents)
+    ]
+
+
+@pytest.fixture
+def session(session):
+    """导入一部法规，每个条款关联一条审核规则"""
+    sync_regulations(session, [(TITLE, 'v1.md', numbered_clauses('招标分为公开招标和邀请招标。',
+                                                              '招标人应当编制招标文件。',
+                                                              '投标人应当具备承担项目的能力。'))])
+    role = AuditorRole(role_name='商务管理员')
+    doc_type = DocumentType(type_name='采购招标')
+    session.add_all([role, doc_type])
+    session.flush()
+    for clause in session.scalars(select(Clause)):
+        session.add(AuditRule(role_id=role.id, document_type_id=doc_type.id, clause_id=clause.id))
+    session.commit()
+    return session
+
+
+def clause_rows(session):
+    """(条款ID, 编号, 内容) 列表"""
+    return [(c.id, c.clause_number, c.content) for c in session.scalars(select(Clause).order_by(Clause.id))]
+
+
+def test_unchanged_regulation_is_skipped(session):
+    """内容未变时不写入任何条款"""
+    before = clause_rows(session)
+    stats = sync_regulations(session, [(TITLE, 'v1.md', numbered_clauses('招标分为公开招标和邀请招标。',
+                                                                      '招标人应当编制招标文件。',
+                                                                      '投标人应当具备承担项目的能力。'))])
+    assert stats['regulations_unchanged'] == 1
+    assert stats['clauses_added'] == stats['clauses_updated'] == stats['clauses_removed'] == 0
+    assert clause_rows(session) == before
+
+
+def test_amended_regulation_writes_only_changes(session):
+    """修订后只更新变化的条款，条款ID和审核规则保留"""
+    before = clause_rows(session)
+    rules_before = session.scalars(select(AuditRule.clause_id).order_by(AuditRule.id)).all()
+
+    stats = sync_regulations(session, [(TITLE, 'v2.md', numbered_clauses('招标分为公开招标和邀请招标。',
+                                                                      '招标人应当依法编制招标文件。',
+                                                                      '投标人应当具备承担项目的能力。',
+                                                                      '本法自公布之日起施行。'))])
+    assert stats['regulations_updated'] == 1
+    assert (stats['clauses_unchanged'], stats['clauses_updated'], stats['clauses_added']) == (2, 1, 1)
+
+    after = clause_rows(session)
+    assert [row[0] for row in after[:3]] == [row[0] for row in before]
+    assert after[1][2] == '第二条 招标人应当依法编制招标文件。'
+    assert session.scalars(select(AuditRule.clause_id).order_by(AuditRule.id)).all() == rules_before
+
+    regulation = session.scalars(select(Regulation)).one()
+    assert regulation.source_file == 'v2.md'
+    assert session.get(Clause, after[1][0]).content_hash == clause_hash('第二条', after[1][2])
+
+
+def test_removed_clause_deletes_its_rules(session):
+    """删除的条款连同引用它的审核规则一起删除"""
+    stats = sync_regulations(session, [(TITLE, 'v3.md', numbered_clauses('招标分为公开招标和邀请招标。',
+                                                                      '招标人应当编制招标文件。'))])
+    assert (stats['clauses_removed'], stats['rules_removed']) == (1, 1)
+    assert [row[1] for row in clause_rows(session)] == ['第一条', '第二条']
+    assert len(session.scalars(select(AuditRule)).all()) == 2
+
+
+def test_find_duplicate_regulation(session):
+    """条款完全相同时找到已有法规，内容不同时返回None"""
+    regulation = session.scalars(select(Regulation)).one()
+
+    duplicate = find_duplicate_regulation(session, numbered_clauses('招标分为公开招标和邀请招标。',
+                                                                '招标人应当编制招标文件。',
+                                                                '投标人应当具备承担项目的能力。'))
+    assert duplicate == {'regulation_id': regulation.id, 'regulation_title': TITLE, 'clause_count': 3}
+    assert find_duplicate_regulation(session, numbered_clauses('招标分为公开招标和邀请招标。')) is None
+
+
+
+def test_insert_regulations_keeps_input_order(session, monkeypatch):
+    """一次写入多部法规，返回的ID与输入顺序一致，条款分批写入后仍指向各自的法规"""
+    # 条款数超过批大小，验证分批写入
+    monkeypatch.setattr(ingest, 'CLAUSE_BATCH_SIZE', 2)
+    regulations = [
+        ('测试政府采购法', 'b.md', numbered_clauses('采购人可以委托采购代理机构。', '采购代理机构应当依法办理采购事宜。',
+                                                   '采购人应当编制采购预算。')),
+        ('测试采购文件管理办法', 'c.md', []),
+        ('测试合同法', 'a.md', numbered_clauses('当事人订立合同，应当具有相应的民事权利能力。')),
+    ]
+    existing = session.scalars(select(Regulation.id)).all()
+
+    ids = insert_regulations(session, regulations)
+    session.commit()
+
+    assert len(ids) == len(set(ids)) == 3 and not set(ids) & set(existing)
+    for regulation_id, (title, source_file, clauses) in zip(ids, regulations):
+        regulation = session.get(Regulation, regulation_id)
+        assert (regulation.title, regulation.source_file) == (title, source_file)
+        assert regulation.content_hash == regulation_hash(clauses)
+        rows = session.scalars(select(Clause).where(Clause.regulation_id == regulation_id).order_by(Clause.id)).all()
+        assert [(c.clause_number, c.content) for c in rows] == [(c['clause_number'], c['content']) for c in clauses]
+        assert all(c.content_hash == clause_hash(c.clause_number, c.content) for c in rows)
+
+    assert insert_regulations(session, []) == []
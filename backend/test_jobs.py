@@ -0,0 +1,259 @@
+"""
+导入任务队列测试
+
+验证文件领取的原子性、租约过期和续租、重试次数上限、租约丢失后的回滚、
+同名法规和重复内容的处理，以及解析进程崩溃后重建进程池。
+"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+import jobs
+from database import Base, Clause, IngestJob, IngestJobFile, Regulation
+from jobs import IngestWorker, MAX_ATTEMPTS, LEASE_SECONDS
+
+CLAUSES = [
+    {'clause_number': '第一条', 'content': '第一条 招标人应当以书面形式通知所有投标人。'},
+    {'clause_number': '第二条', 'content': '第二条 投标人不得相互串通投标报价。'},
+]
+
+
+def add_files(session_factory, filenames, directory=None):
+    """登记一个任务，返回文件ID列表；directory不为空时在其中创建上传文件"""
+    with session_factory() as session:
+        session.add(IngestJob(id='job', created_at=time.time()))
+        session.flush()
+        rows = []
+        for index, filename in enumerate(filenames):
+            file_path = f'/nonexistent/{index}/{filename}'
+            if directory is not None:
+                path = Path(directory) / str(index) / filename
+                path.parent.mkdir(parents=True)
+                path.write_text(filename)
+                file_path = str(path)
+            rows.append({'job_id': 'job', 'filename': filename, 'file_path': file_path,
+                         'status': jobs.STATUS_QUEUED, 'attempts': 0})
+        session.execute(insert(IngestJobFile), rows)
+        session.commit()
+        return list(session.scalars(select(IngestJobFile.id).order_by(IngestJobFile.id)))
+
+
+def get_file(session_factory, file_id):
+    """读取文件状态"""
+    with session_factory() as session:
+        return session.get(IngestJobFile, file_id)
+
+
+def expire_lease(session_factory, file_id):
+    """模拟工作进程异常退出: 租约已过期"""
+    with session_factory() as session:
+        session.execute(update(IngestJobFile).where(IngestJobFile.id == file_id)
+                        .values(lease_expires_at=time.time() - 1))
+        session.commit()
+
+
+def test_claim_next_never_hands_out_a_file_twice():
+    """多个工作进程并发领取时，每个文件只被领取一次（使用文件数据库，各线程有独立连接）"""
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'jobs.db')}",
+                           connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    file_ids = add_files(session_factory, [f'{i}.pdf' for i in range(40)])
+    claimed = []
+    lock = threading.Lock()
+
+    def claim_all(worker):
+        while True:
+            row = worker.claim_next()
+            if row is None:
+                return
+            with lock:
+                claimed.append((row[0], worker.worker_id))
+
+    workers = [IngestWorker(session_factory, worker_id=f'worker-{i}') for i in range(4)]
+    threads = [threading.Thread(target=claim_all, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(file_id for file_id, _ in claimed) == file_ids
+    with session_factory() as session:
+        owners = dict(session.execute(select(IngestJobFile.id, IngestJobFile.worker_id)).all())
+        assert all(row.status == jobs.STATUS_PARSING and row.attempts == 1
+                   for row in session.scalars(select(IngestJobFile)))
+    assert owners == dict(claimed)
+
+
+def test_expired_lease_is_reclaimed_and_renewal_is_owner_only(session_factory):
+    """租约过期后文件被其他工作进程接管，只有当前持有者能续租"""
+    file_id, = add_files(session_factory, ['a.pdf'])
+    first = IngestWorker(session_factory, worker_id='first')
+    second = IngestWorker(session_factory, worker_id='second')
+
+    assert first.claim_next()[0] == file_id
+    assert second.claim_next() is None
+
+    expire_lease(session_factory, file_id)
+    first.renew_leases([file_id])  # 过期前续租成功，租约延长
+    assert get_file(session_factory, file_id).lease_expires_at > time.time() + LEASE_SECONDS / 2
+
+    expire_lease(session_factory, file_id)
+    assert second.claim_next()[0] == file_id
+    file = get_file(session_factory, file_id)
+    assert file.worker_id == 'second' and file.attempts == 2
+
+    expire_lease(session_factory, file_id)
+    first.renew_leases([file_id])  # 已被接管，续租不生效
+    assert get_file(session_factory, file_id).lease_expires_at < time.time()
+    second.renew_leases([file_id])
+    assert get_file(session_factory, file_id).lease_expires_at > time.time()
+
+
+def test_file_fails_after_max_attempts(session_factory):
+    """中断MAX_ATTEMPTS次的文件不再领取，标记失败"""
+    file_id, = add_files(session_factory, ['a.pdf'])
+    for attempt in range(MAX_ATTEMPTS):
+        worker = IngestWorker(session_factory, worker_id=f'worker-{attempt}')
+        assert worker.claim_next()[0] == file_id
+        expire_lease(session_factory, file_id)
+
+    assert IngestWorker(session_factory).claim_next() is None
+    file = get_file(session_factory, file_id)
+    assert file.status == jobs.STATUS_FAILED
+    assert file.attempts == MAX_ATTEMPTS and '处理中断次数过多' in file.error
+
+
+def test_release_counts_attempts_only_for_crashes(session_factory):
+    """正常停止退回的文件不计领取次数，进程池崩溃退回的计入"""
+    file_id, = add_files(session_factory, ['a.pdf'])
+    worker = IngestWorker(session_factory)
+
+    worker.claim_next()
+    worker.release([file_id], count_attempt=False)
+    file = get_file(session_factory, file_id)
+    assert file.status == jobs.STATUS_QUEUED and file.attempts == 0
+
+    for _ in range(MAX_ATTEMPTS):
+        assert worker.claim_next()[0] == file_id
+        worker.release([file_id])
+    assert worker.claim_next() is None
+    assert get_file(session_factory, file_id).status == jobs.STATUS_FAILED
+
+
+def test_finish_rolls_back_when_lease_was_lost(session_factory):
+    """租约过期被接管后，原工作进程的写入回滚，由新持有者导入"""
+    file_id, = add_files(session_factory, ['a.pdf'])
+    first = IngestWorker(session_factory, worker_id='first')
+    second = IngestWorker(session_factory, worker_id='second')
+    first.claim_next()
+    expire_lease(session_factory, file_id)
+    second.claim_next()
+
+    first.finish(file_id, '/nonexistent/a.pdf', 'a.pdf', ('测试法', CLAUSES, None, [], False), 0.1)
+    with session_factory() as session:
+        assert session.query(Regulation).count() == 0
+        assert session.query(Clause).count() == 0
+    file = get_file(session_factory, file_id)
+    assert file.status == jobs.STATUS_PARSING and file.worker_id == 'second'
+
+    second.finish(file_id, '/nonexistent/a.pdf', 'a.pdf', ('测试法', CLAUSES, None, [], False), 0.1)
+    file = get_file(session_factory, file_id)
+    assert file.status == jobs.STATUS_SUCCEEDED and file.clause_count == 2
+    with session_factory() as session:
+        assert session.query(Clause).count() == 2
+
+
+def test_duplicate_title_and_duplicate_content(session_factory):
+    """同名法规导入失败，条款完全相同的文件标记为duplicate"""
+    file_ids = add_files(session_factory, ['a.pdf', 'b.pdf', 'c.pdf'])
+    worker = IngestWorker(session_factory)
+    other = [{'clause_number': '第一条', 'content': '第一条 采购人应当及时支付资金。'}]
+
+    results = [('测试法', CLAUSES, None, [], False), ('测试法', other, None, [], False),
+               ('另一部法', CLAUSES, None, [], True)]
+    for result in results:
+        file_id, file_path, filename, _ = worker.claim_next()
+        worker.finish(file_id, file_path, filename, result, 0.1)
+
+    first, same_title, same_content = (get_file(session_factory, file_id) for file_id in file_ids)
+    assert first.status == jobs.STATUS_SUCCEEDED
+    assert same_title.status == jobs.STATUS_FAILED and "'测试法' 已存在" in same_title.error
+    assert same_content.status == jobs.STATUS_DUPLICATE
+    assert same_content.regulation_id == first.regulation_id and same_content.regulation_title == '测试法'
+    with session_factory() as session:
+        assert session.query(Regulation).count() == 1
+
+
+class _NoRows:
+    """query(...).filter(...).first() 总是返回None"""
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return None
+
+
+def test_title_unique_index_rejects_concurrent_import(session_factory, monkeypatch):
+    """检查之后才写入的同名法规由唯一索引拒绝，导入报告为同名法规已存在"""
+    with session_factory() as session:
+        session.add(Regulation(title='测试法'))
+        session.commit()
+        with pytest.raises(IntegrityError):
+            session.add(Regulation(title='测试法'))
+            session.flush()
+        session.rollback()
+
+    # 模拟另一个工作进程在检查之后写入: 跳过按标题的检查
+    file_id, = add_files(session_factory, ['a.pdf'])
+    worker = IngestWorker(session_factory)
+    worker.claim_next()
+    original = jobs.import_parsed_regulation
+
+    def import_without_check(session, title, source_file, clauses):
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(session, 'query', lambda *args: _NoRows())
+            return original(session, title, source_file, clauses)
+
+    monkeypatch.setattr(jobs, 'import_parsed_regulation', import_without_check)
+    worker.finish(file_id, '/nonexistent/a.pdf', 'a.pdf', ('测试法', CLAUSES, None, [], False), 0.1)
+    file = get_file(session_factory, file_id)
+    assert file.status == jobs.STATUS_FAILED and "'测试法' 已存在" in file.error
+    with session_factory() as session:
+        assert session.query(Clause).count() == 0
+
+
+def parse_or_crash(file_path, file_hash=None):
+    """测试用的解析函数: crash开头的文件使解析进程退出，once开头的只在第一次退出"""
+    name = os.path.basename(file_path)
+    marker = file_path + '.crashed'
+    if name.startswith('crash') or (name.startswith('once') and not os.path.exists(marker)):
+        Path(marker).touch()
+        os._exit(1)
+    return name, [{'clause_number': '第一条', 'content': f'第一条 {name}'}], None, [], False
+
+
+def test_run_recovers_from_broken_process_pool(session_factory, monkeypatch):
+    """解析进程崩溃后重建进程池: 偶发崩溃的文件重试成功，反复崩溃的文件达到上限后失败"""
+    directory = tempfile.mkdtemp()
+    once_id, crash_id, good_id = add_files(session_factory, ['once.pdf', 'crash.pdf', 'good.pdf'], directory)
+    monkeypatch.setattr(jobs, 'parse_document', parse_or_crash)
+
+    worker = IngestWorker(session_factory, parse_workers=1, semantic_index_dir=os.path.join(directory, 'index'))
+    worker.run(until_idle=True)
+
+    once, crash, good = (get_file(session_factory, file_id) for file_id in (once_id, crash_id, good_id))
+    assert once.status == jobs.STATUS_SUCCEEDED and once.attempts == 2
+    assert crash.status == jobs.STATUS_FAILED and crash.attempts == MAX_ATTEMPTS
+    assert good.status == jobs.STATUS_SUCCEEDED and good.attempts == 1
+    assert not os.path.exists(good.file_path)
+
@@ -0,0 +1,171 @@
+"""
+上传和导入任务接口测试
+
+通过TestClient验证上传接口立即返回202和任务ID、后台工作进程导入后轮询到
+succeeded、内容相同的文件换名重新上传标记为duplicate、不支持的文件格式
+返回400，以及批量上传、任务列表和不存在的任务ID返回404。
+"""
+
+import io
+import time
+
+import pytest
+from docx import Document
+from sqlalchemy import create_engine, event
+
+import jobs
+from cache import ParseCache
+from database import Base, Regulation
+from document_parser import PARSER_VERSION
+from jobs import IngestWorker
+from search_index import register_functions
+
+PARAGRAPHS = [
+    '第一条 为了规范政府采购行为，制定本办法。',
+    '第二条 采购人应当按照采购文件确定的事项签订政府采购合同。',
+    '第三条 采购人应当及时向供应商支付采购资金。',
+]
+
+
+def docx_bytes(paragraphs=PARAGRAPHS):
+    """生成Word文档内容"""
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """覆盖公共夹具: 工作进程线程和请求线程各自使用独立连接，需要文件数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'compliance.db'}",
+                           connect_args={"check_same_thread": False, "timeout": 30})
+    event.listen(engine, "connect", lambda connection, _: register_functions(connection))
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def upload_env(tmp_path, session_factory, monkeypatch):
+    """上传目录、解析缓存和任务登记使用的会话都指向临时目录和测试数据库"""
+    cache_dir = tmp_path / 'parse_cache'
+    # 解析子进程以spawn方式启动，重新导入jobs模块时按环境变量创建解析缓存
+    monkeypatch.setenv('PARSE_CACHE_DIR', str(cache_dir))
+    monkeypatch.setattr(jobs, 'parse_cache', ParseCache(str(cache_dir), 64 * 1024 * 1024, version=PARSER_VERSION))
+    monkeypatch.setattr(jobs, 'UPLOAD_DIR', tmp_path / 'uploads')
+    monkeypatch.setattr(jobs, 'SessionLocal', session_factory)
+    return tmp_path
+
+
+@pytest.fixture
+def worker(upload_env, session_factory):
+    """在后台线程中运行的导入工作进程"""
+    worker = IngestWorker(session_factory, parse_workers=1,
+                          semantic_index_dir=str(upload_env / 'index'))
+    worker.start()
+    yield worker
+    worker.stop(timeout=30)
+
+
+def poll_job(client, job_id, timeout=60):
+    """轮询任务状态直到结束"""
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f'/api/jobs/{job_id}')
+        assert response.status_code == 200
+        job = response.json()
+        if job['status'] not in (jobs.STATUS_QUEUED, jobs.STATUS_RUNNING):
+            return job
+        assert time.monotonic() < deadline, job
+        time.sleep(0.1)
+
+
+def upload(client, filename, content):
+    """上传单个法规文档"""
+    return client.post('/api/regulations/upload', files={'file': (filename, content)})
+
+
+def test_upload_returns_job_and_imports_in_background(client, upload_env, worker, session):
+    """上传立即返回202和任务ID，后台导入完成后轮询到succeeded"""
+    response = upload(client, '测试采购办法.docx', docx_bytes())
+    assert response.status_code == 202
+    job = response.json()
+    assert job['job_id'] and job['progress']['total_files'] == 1
+    assert job['files'][0]['filename'] == '测试采购办法.docx'
+
+    worker.notify()
+    job = poll_job(client, job['job_id'])
+    assert job['status'] == jobs.STATUS_SUCCEEDED
+    file, = job['files']
+    assert file['status'] == jobs.STATUS_SUCCEEDED
+    assert file['regulation_title'] == '测试采购办法' and file['clause_count'] == 3
+    assert job['progress']['percent'] == 100.0 and job['errors'] == []
+    assert session.query(Regulation).count() == 1
+    # 导入完成后删除上传文件
+    assert not any(path.is_file() for path in (upload_env / 'uploads').rglob('*'))
+
+
+def test_reupload_with_new_name_is_duplicate(client, upload_env, worker, session):
+    """内容相同的文件换个文件名再次上传，标记为duplicate，不重复导入"""
+    content = docx_bytes()
+    first = poll_job(client, upload(client, '测试采购办法.docx', content).json()['job_id'])
+    regulation_id = first['files'][0]['regulation_id']
+
+    response = upload(client, '采购办法（副本）.docx', content)
+    assert response.status_code == 202
+    job = poll_job(client, response.json()['job_id'])
+    assert job['status'] == jobs.STATUS_SUCCEEDED
+    file, = job['files']
+    assert file['status'] == jobs.STATUS_DUPLICATE
+    assert file['regulation_id'] == regulation_id and file['regulation_title'] == '测试采购办法'
+    assert job['progress']['duplicate_files'] == 1
+    assert session.query(Regulation).count() == 1
+
+
+def test_rejected_extension(client, upload_env):
+    """不支持的文件格式返回400，不保存文件、不登记任务"""
+    response = upload(client, '说明.txt', b'not a regulation')
+    assert response.status_code == 400
+    assert '不支持的文件格式: 说明.txt' in response.json()['detail']
+    assert not (upload_env / 'uploads').exists()
+    assert client.get('/api/jobs').json() == []
+
+
+def test_batch_job_and_job_list(client, upload_env, worker):
+    """批量上传的文件作为一个任务导入，解析失败的文件使任务为partial；任务列表按创建时间倒序"""
+    single = upload(client, '测试采购办法.docx', docx_bytes()).json()['job_id']
+    response = client.post('/api/jobs', files=[
+        ('files', ('测试验收办法.docx', docx_bytes(['第一条 采购人应当组织对供应商履约的验收。']))),
+        ('files', ('损坏的文件.pdf', b'not a pdf')),
+    ])
+    assert response.status_code == 202
+    batch = response.json()
+    assert batch['progress']['total_files'] == 2
+    assert [file['status'] for file in batch['files']] == [jobs.STATUS_QUEUED] * 2
+
+    worker.notify()
+    job = poll_job(client, batch['job_id'])
+    assert job['status'] == jobs.STATUS_PARTIAL
+    assert [file['status'] for file in job['files']] == [jobs.STATUS_SUCCEEDED, jobs.STATUS_FAILED]
+    error, = job['errors']
+    assert error['filename'] == '损坏的文件.pdf' and error['error'].startswith('文档处理失败')
+    assert job['throughput']['clauses_imported'] == 1
+
+    listed = client.get('/api/jobs', params={'limit': 10}).json()
+    assert [job['job_id'] for job in listed] == [batch['job_id'], single]
+    assert client.get('/api/jobs', params={'limit': 1}).json()[0]['job_id'] == batch['job_id']
+
+    response = client.post('/api/jobs', files=[
+        ('files', ('测试采购办法.docx', docx_bytes())), ('files', ('说明.txt', b'text')),
+    ])
+    assert response.status_code == 400
+
+
+def test_unknown_job_id(client):
+    """不存在的任务ID返回404"""
+    response = client.get('/api/jobs/0123456789abcdef')
+    assert response.status_code == 404
+    assert response.json()['detail'] == '未找到任务: 0123456789abcdef'
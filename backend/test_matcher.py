@@ -0,0 +1,95 @@
+"""
+匹配器查询次数回归测试
+
+确保match_clauses、get_all_audit_rules和get_regulations_summary
+执行的SQL语句数量是常数，
+不随规则数量增长（防止重新引入逐行懒加载的N+1查询）。
+"""
+
+import pytest
+from sqlalchemy import event, select
+
+from database import Regulation, Clause, AuditorRole, DocumentType, AuditRule
+from matcher import SimpleMatcher
+
+ROLE = '商务管理员'
+DOC_TYPE = '采购招标/比选/谈判/评审结论建议'
+
+
+@pytest.fixture
+def session(session):
+    """写入审核角色和单据类型"""
+    session.add_all([AuditorRole(role_name=ROLE), DocumentType(type_name=DOC_TYPE)])
+    session.commit()
+    return session
+
+
+def add_rules(session, start, stop):
+    """写入编号为start到stop-1的规则（每条规则对应不同法规的条款）"""
+    role = session.scalars(select(AuditorRole)).one()
+    doc_type = session.scalars(select(DocumentType)).one()
+    for i in range(start, stop):
+        regulation = Regulation(title=f'测试法规{i}')
+        clause = Clause(regulation=regulation, clause_number=f'第{i}条', content=f'测试条款内容{i}')
+        session.add(AuditRule(role_id=role.id, document_type_id=doc_type.id,
+                              clause=clause, priority=i))
+    session.commit()
+    # 清空会话中已加载的对象，之后的查询不会命中identity map
+    session.expunge_all()
+
+
+def count_statements(engine, fn):
+    """执行fn并统计期间发出的SQL语句数量"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements), result
+
+
+def measure_query_counts(engine, session, method):
+    """在规则数量逐步增加时调用matcher方法，返回 [(规则数, 语句数, 结果数)]"""
+    measurements = []
+    rule_count = 0
+    for target in (1, 10, 50):
+        add_rules(session, rule_count, target)
+        rule_count = target
+        matcher = SimpleMatcher(session)
+        statement_count, results = count_statements(engine, lambda: method(matcher))
+        measurements.append((rule_count, statement_count, len(results)))
+    return measurements
+
+
+def test_match_clauses_query_count_is_constant(engine, session):
+    """match_clauses的SQL语句数与规则数量无关"""
+    measurements = measure_query_counts(engine, session, lambda m: m.match_clauses(ROLE, DOC_TYPE))
+    assert [results for _, _, results in measurements] == [1, 10, 50]
+    assert len({count for _, count, _ in measurements}) == 1, measurements
+
+
+def test_match_clauses_sorted_by_priority(session):
+    """匹配结果按优先级从高到低排序"""
+    add_rules(session, 0, 5)
+    results = SimpleMatcher(session).match_clauses(ROLE, DOC_TYPE)
+    assert [r['priority'] for r in results] == [4, 3, 2, 1, 0]
+    assert results[0]['regulation_title'] == '测试法规4'
+
+
+def test_audit_rules_query_count_is_constant(engine, session):
+    """get_all_audit_rules的SQL语句数与规则数量无关"""
+    measurements = measure_query_counts(engine, session, lambda m: m.get_all_audit_rules())
+    assert [results for _, _, results in measurements] == [1, 10, 50]
+    assert len({count for _, count, _ in measurements}) == 1, measurements
+
+
+def test_regulations_summary_query_count_is_constant(engine, session):
+    """get_regulations_summary的SQL语句数与法规数量无关"""
+    measurements = measure_query_counts(engine, session, lambda m: m.get_regulations_summary())
+    assert [results for _, _, results in measurements] == [1, 10, 50]
+    assert len({count for _, count, _ in measurements}) == 1, measurements
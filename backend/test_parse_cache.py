@@ -0,0 +1,76 @@
+"""
+解析结果缓存测试
+
+验证ParseCache按内容哈希和解析器版本命中，并按总大小淘汰最久未使用的条目。
+"""
+
+import os
+import tempfile
+import time
+
+from cache import ParseCache, file_digest
+
+CLAUSES = [
+    {'clause_number': '第一条', 'content': '第一条 为了规范招标投标活动，制定本法。'},
+    {'clause_number': '第二条', 'content': '第二条 招标人是依照本法规定提出招标项目的法人。'}
+]
+
+
+def make_digest(text):
+    """写入临时文件并计算内容哈希"""
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    try:
+        return file_digest(path)
+    finally:
+        os.remove(path)
+
+
+def test_round_trip_and_version():
+    """写入后同版本命中、结果一致；解析器版本变化后不再命中"""
+    directory = tempfile.mkdtemp()
+    digest = make_digest('招标投标法')
+    cache = ParseCache(directory, max_bytes=1024 * 1024, version='1')
+
+    assert cache.get(digest) is None
+    nodes = [{'level': 'article', 'ordinal': 1, 'label': '第一条', 'title': None, 'content': None, 'parent': None}]
+    cache.put(digest, CLAUSES, {'page_count': 2}, nodes)
+    assert cache.get(digest) == {'clauses': CLAUSES, 'page_stats': {'page_count': 2}, 'nodes': nodes}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert ParseCache(directory, max_bytes=1024 * 1024, version='2').get(digest) is None
+
+
+def test_evicts_least_recently_used():
+    """总大小超过上限时淘汰最久未使用（未命中过）的条目"""
+    directory = tempfile.mkdtemp()
+    digests = [make_digest(f'法规{i}') for i in range(3)]
+    cache = ParseCache(directory, max_bytes=1024 * 1024, version='1')
+    for i, digest in enumerate(digests):
+        cache.put(digest, CLAUSES)
+        past = time.time() - 100 + i
+        os.utime(cache._path(digest), (past, past))
+
+    # 读取第一个条目使其成为最近使用，再把上限收紧到只能容纳两个条目
+    assert cache.get(digests[0]) is not None
+    cache.max_bytes = cache.stats()['bytes'] * 2 // 3
+    cache.evict()
+
+    assert cache.get(digests[1]) is None
+    assert cache.get(digests[0]) is not None
+    assert cache.get(digests[2]) is not None
+    assert cache.evictions == 1
+
+
+def test_corrupt_entry_is_a_miss():
+    """损坏的条目当作未命中并被删除"""
+    directory = tempfile.mkdtemp()
+    digest = make_digest('政府采购法')
+    cache = ParseCache(directory, max_bytes=1024 * 1024, version='1')
+    cache.put(digest, CLAUSES)
+    cache._path(digest).write_bytes(b'not gzip')
+
+    assert cache.get(digest) is None
+    assert not cache._path(digest).exists()
+
@@ -0,0 +1,58 @@
+"""
+法规目录解析测试
+
+验证多进程并行解析与逐个解析的结果和顺序相同，并为每个文件记录耗时统计。
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+
+from parser import RegulationParser
+
+REGULATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'regulations')
+
+
+def make_directory():
+    """复制regulations目录中的法规，再加入一个无法解码的文件和一个非.md文件"""
+    directory = tempfile.mkdtemp()
+    for path in glob.glob(os.path.join(REGULATIONS_DIR, '*.md')):
+        shutil.copy(path, directory)
+    with open(os.path.join(directory, '损坏的法规_20200101.md'), 'wb') as f:
+        f.write(b'\xff\xfe\x00invalid')
+    with open(os.path.join(directory, '说明.txt'), 'w', encoding='utf-8') as f:
+        f.write('不是法规文档')
+    return directory
+
+
+def test_stats_empty_before_parsing():
+    """尚未解析目录时统计为空"""
+    assert RegulationParser().last_parse_stats == {}
+
+
+def test_parallel_matches_sequential():
+    """并行解析的结果、顺序和逐个解析相同，每个文件都有统计"""
+    directory = make_directory()
+    sequential_parser = RegulationParser()
+    sequential = sequential_parser.parse_directory(directory, workers=1, verbose=False)
+    parallel_parser = RegulationParser()
+    parallel = parallel_parser.parse_directory(directory, workers=3, verbose=False)
+
+    assert len(sequential) == len(glob.glob(os.path.join(REGULATIONS_DIR, '*.md')))
+    assert [title for title, _, _ in sequential] == sorted(title for title, _, _ in sequential)
+    assert [(title, path, [dict(c) for c in clauses]) for title, path, clauses in parallel] == \
+        [(title, path, [dict(c) for c in clauses]) for title, path, clauses in sequential]
+
+    for parser, workers in ((sequential_parser, 1), (parallel_parser, 3)):
+        stats = parser.last_parse_stats
+        assert stats['workers'] == workers
+        assert stats['file_count'] == len(sequential) + 1 and stats['failed_count'] == 1
+        assert [stat['file'] for stat in stats['files']] == sorted(
+            filename for filename in os.listdir(directory) if filename.endswith('.md')
+        )
+        assert stats['clause_count'] == sum(len(clauses) for _, _, clauses in sequential)
+        assert all(stat['seconds'] >= 0 for stat in stats['files'])
+        failed, = [stat for stat in stats['files'] if stat['error'] is not None]
+        assert failed['file'] == '损坏的法规_20200101.md' and failed['clause_count'] == 0
+
@@ -0,0 +1,102 @@
+"""
+审核规则关联测试
+
+验证Aho–Corasick自动机与逐个子串查找的结果一致，
+以及link_rules关联到第一个匹配条款（ASCII字母不区分大小写）、
+本批内和重复执行都不产生重复规则，并分别统计。
+"""
+
+import random
+
+import pytest
+from sqlalchemy import select
+
+from database import AuditorRole, DocumentType, AuditRule
+from rule_linker import KeywordAutomaton, link_rules
+
+
+@pytest.fixture
+def session(session, add_regulation):
+    """导入一部法规、一个角色和一个单据类型"""
+    add_regulation('测试政府采购法', [
+        '第一条 采用竞争性谈判方式采购的，应当遵循下列程序。',
+        '第二条 招标后没有供应商投标或者没有合格标的。',
+        '第三条 招标后没有供应商投标或者没有合格标的，重新招标。',
+        '第四条 PPP项目的采购应当符合本法规定。',
+    ])
+    session.add_all([AuditorRole(role_name='商务管理员'), DocumentType(type_name='采购招标')])
+    session.commit()
+    return session
+
+
+def rule_links(session):
+    """(角色ID, 单据类型ID, 条款编号) 集合"""
+    return {
+        (rule.role_id, rule.document_type_id, rule.clause.clause_number)
+        for rule in session.scalars(select(AuditRule))
+    }
+
+
+def test_automaton_matches_substring_search():
+    """自动机找到的模式串与逐个 in 判断一致（含互为前后缀的模式串）"""
+    rng = random.Random(7)
+    alphabet = '招标采购供应商'
+    for _ in range(200):
+        patterns = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(12)]
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        expected = {index for index, pattern in enumerate(patterns) if pattern in text}
+        assert KeywordAutomaton(patterns).find(text) == expected
+
+
+def test_keyword_links_first_matching_clause(session):
+    """每个关键词关联到第一个包含它的条款，未匹配的关键词单独返回"""
+    stats = link_rules(session, [
+        (1, 1, '招标后没有供应商投标或者没有合格标的'),
+        (1, 1, '采用竞争性谈判方式采购的'),
+        (1, 1, '不存在的关键词'),
+    ])
+    session.commit()
+
+    assert rule_links(session) == {(1, 1, '第一条'), (1, 1, '第二条')}
+    assert stats['rules_inserted'] == 2
+    assert stats['unmatched'] == ['不存在的关键词']
+
+
+def test_keywords_ignore_ascii_case(session):
+    """与LIKE一致，关键词中的ASCII字母不区分大小写"""
+    stats = link_rules(session, [(1, 1, 'ppp项目的采购'), (1, 1, 'Ppp项目')])
+    session.commit()
+
+    assert rule_links(session) == {(1, 1, '第四条')}
+    assert stats['unmatched'] == []
+
+
+def test_in_batch_duplicates_are_counted_separately(session):
+    """本批中关联到同一条款的关键词只写入一条规则，不计为已存在"""
+    stats = link_rules(session, [
+        (1, 1, '招标后没有供应商投标或者没有合格标的'),
+        (1, 1, '招标后没有供应商投标'),
+        (1, 1, '采用竞争性谈判方式采购的'),
+    ])
+    session.commit()
+
+    assert rule_links(session) == {(1, 1, '第一条'), (1, 1, '第二条')}
+    assert stats['rules_inserted'] == 2
+    assert stats['rules_existing'] == 0
+    assert stats['rules_duplicate'] == 1
+
+
+def test_rerun_is_idempotent(session):
+    """重复执行由唯一索引跳过已存在的规则，不会改关联到下一个匹配条款"""
+    mappings = [(1, 1, '招标后没有供应商投标或者没有合格标的')]
+    link_rules(session, mappings)
+    session.commit()
+
+    stats = link_rules(session, mappings)
+    session.commit()
+
+    assert stats['rules_inserted'] == 0
+    assert stats['rules_existing'] == 1
+    assert stats['rules_duplicate'] == 0
+    assert rule_links(session) == {(1, 1, '第二条')}
+
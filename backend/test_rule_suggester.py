@@ -0,0 +1,97 @@
+"""
+审核规则自动推荐测试
+
+验证分块计算的组合得分与逐个组合计算的结果相同，以及自动规则的写入和重新推荐。
+"""
+
+import tempfile
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+import rule_suggester
+from database import AuditorRole, AuditRule, Clause, DocumentType
+from rule_suggester import AUTO_PRIORITY_MAX, suggest_rules, top_pairs
+
+CONTENTS = [
+    '第一条 招标人对已发出的招标文件进行必要的澄清或者修改的，应当以书面形式通知所有招标文件收受人。',
+    '第二条 在招标采购中，符合专业条件的供应商或者对招标文件作实质响应的供应商不足三家的，应予废标。',
+    '第三条 投标人不得相互串通投标报价，不得排挤其他投标人的公平竞争。',
+    '第四条 政府采购合同的双方当事人不得擅自变更、中止或者终止合同。',
+    '第五条 采购人应当按照合同约定及时向供应商支付资金，验收合格后出具验收书。',
+    '第六条 单位应当建立健全财务报销制度，报销凭证应当真实、合法、完整。',
+]
+
+
+@pytest.fixture
+def session(session, add_regulation):
+    """导入一部法规、两个角色和两种单据类型"""
+    add_regulation('测试采购法', CONTENTS)
+    session.add_all([
+        AuditorRole(role_name='招标审核员', responsibilities='审核招标文件的澄清修改、废标和串通投标等情形'),
+        AuditorRole(role_name='财务审核员', responsibilities='审核合同付款、验收和报销凭证'),
+        DocumentType(type_name='招标文件', description='招标公告、招标文件及其澄清修改'),
+        DocumentType(type_name='付款申请', description='合同付款、验收书和报销凭证'),
+    ])
+    session.commit()
+    return session
+
+
+def test_top_pairs_matches_per_pair_loop(monkeypatch):
+    """分块计算的结果与逐个组合计算几何平均后排序的结果相同"""
+    rng = np.random.default_rng(0)
+    role_scores = rng.random((3, 50)).astype(np.float32) * (rng.random((3, 50)) < 0.5)
+    document_scores = rng.random((4, 50)).astype(np.float32)
+
+    monkeypatch.setattr(rule_suggester, 'PAIR_BLOCK_ELEMENTS', 120)  # 每块两个组合
+    role_rows, document_rows, columns, scores = top_pairs(role_scores, document_scores, 5, 0.3)
+
+    expected = []
+    for role in range(3):
+        for document in range(4):
+            pair_scores = np.sqrt(role_scores[role] * document_scores[document])
+            for column in np.argsort(-pair_scores, kind='stable')[:5]:
+                if pair_scores[column] > 0 and pair_scores[column] >= 0.3:
+                    expected.append((role, document, pair_scores[column]))
+    actual = list(zip(role_rows.tolist(), document_rows.tolist(), scores.tolist()))
+    assert [(r, d) for r, d, _ in actual] == [(r, d) for r, d, _ in expected]
+    assert np.allclose([s for _, _, s in actual], [s for _, _, s in expected])
+    assert all(np.isclose(np.sqrt(role_scores[r, c] * document_scores[d, c]), s)
+               for r, d, c, s in zip(role_rows, document_rows, columns, scores))
+
+
+def test_suggest_rules_writes_auto_rules(session):
+    """每个组合推荐与角色和单据都相关的条款；示例规则保留，重新推荐替换上一次的自动规则"""
+    role = session.execute(select(AuditorRole).where(AuditorRole.role_name == '财务审核员')).scalar_one()
+    document_type = session.execute(select(DocumentType).where(DocumentType.type_name == '付款申请')).scalar_one()
+    example_clause = session.execute(select(Clause.id).where(Clause.clause_number == '第六条')).scalar_one()
+    session.add(AuditRule(role_id=role.id, document_type_id=document_type.id, clause_id=example_clause,
+                          source='example', priority=10))
+    session.commit()
+
+    directory = tempfile.mkdtemp() + '/index'
+    stats = suggest_rules(session, k=2, min_score=0.0, directory=directory)
+    session.commit()
+    assert stats['pairs'] == 4
+    # 招标审核员×付款申请、财务审核员×招标文件没有同时相关的条款
+    assert stats['candidates'] == 4
+    assert stats['rules_existing'] == 1 and stats['rules_inserted'] == 3
+    pairs = session.execute(select(AuditRule.role_id, AuditRule.document_type_id).distinct()).all()
+    assert len(pairs) == 2
+
+    rules = session.execute(
+        select(AuditRule.source, AuditRule.priority, Clause.clause_number)
+        .join(Clause, Clause.id == AuditRule.clause_id)
+        .where(AuditRule.role_id == role.id, AuditRule.document_type_id == document_type.id)
+        .order_by(AuditRule.priority.desc())
+    ).all()
+    assert rules[0] == ('example', 10, '第六条')
+    assert [number for source, _, number in rules if source == 'auto'] == ['第五条']
+    assert all(1 <= priority <= AUTO_PRIORITY_MAX for source, priority, _ in rules if source == 'auto')
+
+    again = suggest_rules(session, k=2, min_score=0.0, directory=directory)
+    session.commit()
+    assert again['rules_removed'] == 3 and again['rules_inserted'] == 3
+    assert session.query(AuditRule).filter(AuditRule.source == 'auto').count() == 3
+
@@ -0,0 +1,123 @@
+"""
+条款全文索引测试
+
+验证二元组切分、检索词到FTS5表达式的转换，触发器在条款插入、更新、
+删除时同步索引，以及关键词检索的BM25排序和命中位置。
+"""
+
+from sqlalchemy import text
+
+from database import Regulation, Clause
+from matcher import SimpleMatcher
+from search_index import (
+    FTS_TABLE, bigram_tokens, term_query, is_single_run, find_highlights, ensure_search_index
+)
+
+
+def search(session, term):
+    """在全文索引上检索，返回命中的条款ID"""
+    rows = session.execute(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query ORDER BY rowid"),
+        {'query': term_query(term)}
+    )
+    return [rowid for rowid, in rows]
+
+
+def test_bigram_tokens():
+    """每段连续文字切成相邻二元组并追加末字，标点和空白作为分隔，字母转小写"""
+    assert bigram_tokens('公开招标') == '公开 开招 招标 标'
+    assert bigram_tokens('招标，废标') == '招标 标 废标 标'
+    assert bigram_tokens('PPP项目') == 'pp pp p项 项目 目'
+    assert bigram_tokens('标') == '标'
+    assert bigram_tokens('') == '' and bigram_tokens(None) == ''
+
+
+def test_term_query():
+    """连续文字转为二元组短语，单字转为前缀查询，多段之间为AND"""
+    assert term_query('公开招标') == '"公开 开招 招标"'
+    assert term_query('标') == '"标"*'
+    assert term_query('招标，废标') == '"招标" AND "废标"'
+    assert term_query('PPP') == '"pp pp"'
+    assert term_query('，。') is None
+    assert is_single_run('公开招标') and not is_single_run('招标 废标')
+
+
+def test_triggers_keep_index_in_sync(engine, session):
+    """条款的插入、更新和删除通过触发器同步到全文索引"""
+    ensure_search_index(engine)
+
+    regulation = Regulation(title='测试法')
+    first = Clause(regulation=regulation, clause_number='第一条', content='第一条 采用公开招标方式采购。')
+    second = Clause(regulation=regulation, clause_number='第二条', content='第二条 邀请招标适用于特殊项目。')
+    session.add_all([first, second])
+    session.commit()
+    assert search(session, '招标') == [first.id, second.id]
+    assert search(session, '公开招标') == [first.id]
+    assert search(session, '标') == [first.id, second.id]
+    assert search(session, '开标') == []
+
+    first.content = '第一条 采用竞争性谈判方式采购。'
+    session.commit()
+    assert search(session, '公开招标') == []
+    assert search(session, '竞争性谈判') == [first.id]
+
+    session.delete(second)
+    session.commit()
+    assert search(session, '邀请招标') == []
+    assert search(session, '招标') == []
+    assert session.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize")).scalar() == 1
+
+
+def test_ensure_search_index_rebuilds_existing_clauses(engine, session):
+    """建索引之前已导入的条款在ensure_search_index时补建索引"""
+    clause = Clause(regulation=Regulation(title='测试法'), clause_number='第一条', content='第一条 废标后重新招标。')
+    session.add(clause)
+    session.commit()
+
+    ensure_search_index(engine)
+    assert search(session, '重新招标') == [clause.id]
+    ensure_search_index(engine)  # 条目数一致时不重建
+    assert session.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize")).scalar() == 1
+
+
+def test_bm25_ranks_stronger_match_first(engine, session):
+    """检索词出现次数多、条款短的排在前面"""
+    ensure_search_index(engine)
+    contents = [
+        '第一条 采购人应当在合同中约定付款期限，并按照约定及时支付采购资金，不得无故拖延。',
+        '第二条 符合专业条件的供应商或者对招标文件作实质响应的供应商不足三家的，应予废标。',
+        '第三条 出现废标情形的，应当重新招标。',
+        '第四条 废标后，采购人应当将废标理由通知所有投标人，并依法重新组织废标项目的招标。',
+    ] + [f'第{number}条 采购文件的保存期限为从采购结束之日起至少十五年。' for number in '五六七八九十']
+    session.add(Regulation(title='测试法', clauses=[
+        Clause(clause_number=content.split(' ')[0], content=content) for content in contents
+    ]))
+    session.commit()
+
+    # 第四条出现三次；第二条、第三条各一次，较短的第三条排在前面（与条款ID顺序相反）
+    results = SimpleMatcher(session).search_clauses_by_keyword('废标')
+    assert [result['clause_number'] for result in results] == ['第四条', '第三条', '第二条']
+    scores = [result['score'] for result in results]
+    assert scores[0] > scores[1] > scores[2] > 0
+
+
+def test_highlights_land_on_matched_terms(engine, session):
+    """命中位置覆盖原文中的检索词（忽略ASCII大小写），重叠的区间合并"""
+    content = '第五条 PPP项目采用公开招标方式，招标文件应当载明PPP合同的主要条款。'
+    spans = find_highlights(content, ['招标', 'ppp'])
+    assert [content[start:end] for start, end in spans] == ['PPP', '招标', '招标', 'PPP']
+    assert spans == sorted(spans)
+
+    spans = find_highlights(content, ['公开招标', '招标方式'])
+    assert [content[start:end] for start, end in spans] == ['公开招标方式']
+
+    # 含标点的检索词按各段文字分别标出，相邻的区间合并
+    spans = find_highlights(content, ['方式，招标'])
+    assert [content[start:end] for start, end in spans] == ['招标方式', '招标']
+
+    ensure_search_index(engine)
+    session.add(Clause(regulation=Regulation(title='测试法'), clause_number='第五条', content=content))
+    session.commit()
+    result, = SimpleMatcher(session).search_clauses_by_keyword('公开招标 NOT 邀请')
+    assert [content[start:end] for start, end in result['highlights']] == ['公开招标']
+
@@ -0,0 +1,125 @@
+"""
+检索式解析测试
+
+验证运算优先级、引号短语、法规过滤和排除、以及语法错误提示，
+并在内存数据库上确认 NOT 法规:X 确实排除该法规的条款，检索词和法规标题中的
+% 和 _ 按字面匹配。
+"""
+
+import pytest
+
+from matcher import SimpleMatcher
+from search_index import ensure_search_index
+from search_query import QuerySyntaxError, parse_query
+
+
+@pytest.fixture
+def session(engine, session, add_regulation):
+    """建立全文索引，导入两部法规"""
+    ensure_search_index(engine)
+    add_regulation('中华人民共和国政府采购法', ['第一条 采购人可以委托招标代理机构办理招标事宜。'])
+    add_regulation('中华人民共和国招标投标法', ['第一条 招标分为公开招标和邀请招标。'])
+    return session
+
+
+def test_and_binds_tighter_than_or():
+    """NOT > AND > OR，括号改变优先级"""
+    assert parse_query('废标 OR 流标 供应商').match_expression == '("废标") OR (("流标") AND ("供应 应商"))'
+    assert parse_query('(废标 OR 流标) 供应商').match_expression == '(("废标") OR ("流标")) AND ("供应 应商")'
+    assert parse_query('公开招标 AND 国有资金').match_expression == parse_query('公开招标 国有资金').match_expression
+
+
+def test_not_excludes_terms():
+    """NOT和-前缀等价，被排除的词不参与高亮"""
+    parsed = parse_query('招标 NOT 邀请招标')
+    assert parsed.match_expression == '(("招标")) NOT ("邀请 请招 招标")'
+    assert parse_query('招标 -邀请招标').match_expression == parsed.match_expression
+    assert parsed.highlight_terms == ['招标']
+
+
+def test_quoted_phrases():
+    """引号内的空格属于短语；含空白的短语需在原文中核对"""
+    parsed = parse_query('"公开 招标"')
+    assert parsed.match_expression == '"公开" AND "招标"'
+    assert parsed.verify_terms == ['公开 招标']
+    parsed = parse_query('“公开招标” OR 邀请')
+    assert parsed.highlight_terms == ['公开招标', '邀请']
+    assert parsed.verify_terms == []
+
+
+def test_regulation_filters():
+    """顶层的法规过滤条件之间为OR，NOT 法规:X 为排除"""
+    parsed = parse_query('招标 法规:政府采购法 regulation:实施条例')
+    assert parsed.match_expression == '"招标"'
+    assert parsed.regulation_filters == ['政府采购法', '实施条例']
+
+    parsed = parse_query('招标 NOT 法规:政府采购法')
+    assert parsed.match_expression == '"招标"'
+    assert parsed.regulation_filters == []
+    assert parsed.excluded_regulations == ['政府采购法']
+
+    # 括号内的AND仍是顶层条件
+    parsed = parse_query('招标 (法规:政府采购法 废标)')
+    assert parsed.regulation_filters == ['政府采购法']
+    assert parsed.match_expression == '("招标") AND ("废标")'
+
+    parsed = parse_query('法规：政府采购法')
+    assert parsed.match_expression is None and parsed.regulation_filters == ['政府采购法']
+
+
+@pytest.mark.parametrize('query, message', [
+    ('(法规:政府采购法 OR 招标)', '不能放在OR或括号内的NOT中'),
+    ('招标 NOT (法规:政府采购法 废标)', '不能放在OR或括号内的NOT中'),
+    ('NOT 法规:政府采购法', 'NOT 必须与其他检索条件组合使用'),
+    ('NOT 招标', 'NOT 必须与其他检索条件组合使用'),
+    ('招标 -，', '检索词中没有可检索的文字: ，'),
+    ('法规:政府采购法 ，', '检索词中没有可检索的文字: ，'),
+    ('"公开招标', '引号未闭合'),
+    ('(招标', '括号未闭合'),
+    ('招标)', '多余的符号: )'),
+    ('法规: 招标', '法规过滤条件不能为空'),
+    ('   ', '检索式为空'),
+])
+def test_syntax_errors(query, message):
+    """语法错误给出明确的提示，而不是忽略部分条件"""
+    with pytest.raises(QuerySyntaxError, match=message.replace('(', r'\(').replace(')', r'\)')):
+        parse_query(query)
+
+
+def test_punctuation_only_query_falls_back():
+    """整个检索式只有标点时不报错，由匹配器退回原文匹配"""
+    parsed = parse_query('，')
+    assert parsed.match_expression is None and parsed.regulation_filters == []
+
+
+def test_search_excludes_negated_regulation(session):
+    """NOT 法规:X 的结果中没有该法规的条款"""
+    matcher = SimpleMatcher(session)
+    titles = {r['regulation_title'] for r in matcher.search_clauses_by_keyword('招标')}
+    assert titles == {'中华人民共和国政府采购法', '中华人民共和国招标投标法'}
+
+    results = matcher.search_clauses_by_keyword('招标 NOT 法规:政府采购法')
+    assert [r['regulation_title'] for r in results] == ['中华人民共和国招标投标法']
+    results = matcher.search_clauses_by_keyword('招标 法规:政府采购法')
+    assert [r['regulation_title'] for r in results] == ['中华人民共和国政府采购法']
+
+
+
+def test_like_wildcards_match_literally(session, add_regulation):
+    """检索词和法规标题中的 % 和 _ 按字面匹配，不作为LIKE通配符"""
+    add_regulation('企业内控_采购规范', ['第一条 投标保证金不得超过采购项目预算金额的10%。'])
+    add_regulation('企业内控A采购规范', ['第一条 履约保证金不得超过采购合同金额的105万元。'])
+    matcher = SimpleMatcher(session)
+
+    def titles(keyword):
+        return [r['regulation_title'] for r in matcher.search_clauses_by_keyword(keyword)]
+
+    # 含标点的检索词在原文中核对
+    assert titles('10%') == ['企业内控_采购规范']
+    assert titles('保证金 10%') == ['企业内控_采购规范']
+    # 只有标点时退回原文匹配
+    assert titles('%') == ['企业内控_采购规范']
+    assert titles('_') == []
+    # 法规过滤和排除
+    assert titles('保证金 法规:内控_采购') == ['企业内控_采购规范']
+    assert titles('保证金 NOT 法规:内控_采购') == ['企业内控A采购规范']
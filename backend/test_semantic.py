@@ -0,0 +1,155 @@
+"""
+语义检索测试
+
+验证倒排存储的稀疏矩阵得分与逐条计算的余弦相似度一致，
+批量检索与逐个检索结果相同，索引重建后自动重新加载，以及增量更新。
+"""
+
+import tempfile
+
+import numpy as np
+import pytest
+from sqlalchemy import delete
+
+import semantic
+from database import Clause
+from semantic import (
+    SemanticIndex, SemanticIndexUnavailable, build_semantic_index, update_semantic_index,
+    extract_features, get_semantic_index, semantic_search
+)
+
+CONTENTS = [
+    '第一条 招标人对已发出的招标文件进行必要的澄清或者修改的，应当以书面形式通知所有招标文件收受人。',
+    '第二条 在招标采购中，符合专业条件的供应商或者对招标文件作实质响应的供应商不足三家的，应予废标。',
+    '第三条 投标人不得相互串通投标报价，不得排挤其他投标人的公平竞争。',
+    '第四条 政府采购合同的双方当事人不得擅自变更、中止或者终止合同。',
+    '第五条 投标人相互串通投标或者与招标人串通投标的，中标无效，处中标项目金额千分之五以上的罚款。',
+]
+
+
+@pytest.fixture
+def session(session, add_regulation):
+    """导入一部法规"""
+    add_regulation('测试招标投标法', CONTENTS)
+    return session
+
+
+def dense_vectors(index, texts):
+    """逐条计算归一化TF-IDF向量（稠密表示，作为对照）"""
+    documents, features, weights = index.vectorize(texts)
+    vectors = {}
+    for document, feature, weight in zip(documents, features, weights):
+        vectors.setdefault(int(document), {})[int(feature)] = float(weight)
+    return [vectors.get(i, {}) for i in range(len(texts))]
+
+
+def test_scores_match_cosine_similarity(session):
+    """倒排表累加出的得分等于查询向量与条款向量的点积"""
+    directory = tempfile.mkdtemp() + '/index'
+    stats = build_semantic_index(session, directory)
+    index = SemanticIndex(directory)
+    assert stats['clauses'] == len(CONTENTS) == len(index)
+
+    queries = ['串通投标的法律责任', '供应商不足三家']
+    clause_vectors = dense_vectors(index, CONTENTS)
+    for query, hits in zip(queries, index.search(queries, k=len(CONTENTS))):
+        query_vector = dense_vectors(index, [query])[0]
+        expected = {}
+        for clause_id, vector in zip(index.clause_ids, clause_vectors):
+            score = sum(weight * vector.get(feature, 0.0) for feature, weight in query_vector.items())
+            if score > 0:
+                expected[int(clause_id)] = score
+        assert {clause_id for clause_id, _ in hits} == set(expected)
+        for clause_id, score in hits:
+            assert score == pytest.approx(expected[clause_id], rel=1e-4)
+        assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_batch_search_matches_single_queries(session):
+    """批量检索与逐个检索的结果相同（精确检索和IVF）"""
+    queries = ['招标文件的澄清和修改', '合同变更', '罚款', '串通投标', '。。。']
+    for ann in ('exact', 'ivf'):
+        directory = tempfile.mkdtemp() + '/index'
+        assert build_semantic_index(session, directory, ann)['searcher'] == ann
+        index = SemanticIndex(directory)
+
+        batched = index.search(queries, k=3)
+        assert batched == [index.search([query], k=3)[0] for query in queries]
+        assert batched[-1] == []
+
+
+def test_search_reloads_rebuilt_index(session):
+    """最相关的条款排在第一；删除条款后重建索引，查询自动使用新索引"""
+    directory = tempfile.mkdtemp() + '/index'
+    with pytest.raises(SemanticIndexUnavailable):
+        get_semantic_index(directory)
+
+    build_semantic_index(session, directory)
+    results = semantic_search(session, '招标文件的澄清或者修改', 2, directory)
+    assert results[0]['clause_number'] == '第一条'
+    assert 0 < results[0]['score'] <= 1
+
+    session.execute(delete(Clause).where(Clause.clause_number == '第一条'))
+    session.commit()
+    # 索引重建前，已删除的条款不出现在结果中
+    assert '第一条' not in [r['clause_number'] for r in semantic_search(session, '招标文件的澄清或者修改', 2, directory)]
+
+    build_semantic_index(session, directory)
+    assert len(get_semantic_index(directory)) == len(CONTENTS) - 1
+
+
+def test_update_writes_changed_clauses_to_delta(session, add_regulation, monkeypatch):
+    """上传后新增、修改的条款进入增量段，修改前的内容不再被检索到"""
+    directory = tempfile.mkdtemp() + '/index'
+    assert update_semantic_index(session, directory) == {'mode': 'missing'}
+    build_semantic_index(session, directory)
+
+    amended = CONTENTS[:3] + ['第四条 采购合同履行中需要追加与合同标的相同的货物的，可以签订补充合同。'] + CONTENTS[4:]
+    add_regulation('测试招标投标法', amended)
+    add_regulation('测试政府采购法', ['第一条 采购人可以委托集中采购机构在委托的范围内代理采购。'], 'new.md')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(semantic, 'DELTA_MAX_RATIO', 1.0)
+        stats = update_semantic_index(session, directory)
+        assert stats['mode'] == 'delta'
+        assert stats['delta_clauses'] == 2 and stats['removed'] == 1
+        assert update_semantic_index(session, directory)['mode'] == 'unchanged'
+    assert len(get_semantic_index(directory)) == len(CONTENTS) + 1
+
+    top = semantic_search(session, '委托集中采购机构代理采购', 1, directory)[0]
+    assert top['regulation_title'] == '测试政府采购法'
+    top = semantic_search(session, '追加货物签订补充合同', 1, directory)[0]
+    assert top['clause_number'] == '第四条' and '补充合同' in top['content']
+    # 修改前的第四条在主索引中已标记为无效
+    assert all('擅自变更' not in r['content'] for r in semantic_search(session, '擅自变更、中止或者终止合同', 5, directory))
+
+    # 增量段超过比例时整体重建
+    session.execute(delete(Clause).where(Clause.clause_number == '第一条'))
+    session.commit()
+    assert update_semantic_index(session, directory)['mode'] == 'rebuild'
+    assert len(get_semantic_index(directory)) == len(CONTENTS) - 1
+
+
+def test_features_do_not_cross_punctuation():
+    """n-gram不跨标点和文本边界"""
+    _, features, _ = extract_features(['招标，投标'])
+    _, expected, _ = extract_features(['招标', '投标'])
+    assert np.array_equal(np.sort(features), np.sort(expected))
+
+
+
+def test_texts_shorter_than_ngrams(session, add_regulation):
+    """空文本和单字文本没有特征，不影响建索引、增量更新和检索"""
+    for texts in ([''], ['标'], []):
+        documents, features, counts = extract_features(texts)
+        assert len(documents) == len(features) == len(counts) == 0
+
+    directory = tempfile.mkdtemp() + '/index'
+    add_regulation('测试单字条款法', ['第一条 略'])
+    assert build_semantic_index(session, directory)['clauses'] == len(CONTENTS) + 1
+    assert semantic_search(session, '标', 5, directory) == []
+    assert '串通投标' in semantic_search(session, '串通投标', 1, directory)[0]['content']
+
+    add_regulation('测试单字条款法', ['第一条 略', '第二条 无'])
+    assert update_semantic_index(session, directory)['mode'] in ('delta', 'rebuild')
+    assert semantic_search(session, '', 5, directory) == []
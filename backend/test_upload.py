@@ -4,6 +4,7 @@
 
 import requests
 import os
+import time
 
 API_BASE_URL = "http://localhost:10000"
 
@@ -36,12 +37,22 @@ def test_upload_regulation():
             
             print(f"状态码: {response.status_code}")
             
-            if response.status_code == 200:
-                result = response.json()
-                print("\n✅ 上传成功!")
-                print(f"  法规标题: {result['regulation_title']}")
-                print(f"  条款数量: {result['clause_count']}")
-                print(f"  消息: {result['message']}")
+            if response.status_code == 202:
+                # 上传接口立即返回任务ID，轮询任务状态直到处理结束
+                job = response.json()
+                print(f"  任务ID: {job['job_id']}")
+                while job['status'] in ('queued', 'running'):
+                    time.sleep(0.5)
+                    job = requests.get(f"{API_BASE_URL}/api/jobs/{job['job_id']}").json()
+                
+                result = job['files'][0]
+                if result['status'] == 'succeeded':
+                    print("\n✅ 上传成功!")
+                    print(f"  法规标题: {result['regulation_title']}")
+                    print(f"  条款数量: {result['clause_count']}")
+                    print(f"  解析耗时: {result['parse_seconds']}秒")
+                else:
+                    print(f"\n❌ 上传失败: {result['error']}")
             else:
                 error = response.json()
                 print(f"\n❌ 上传失败: {error.get('detail', '未知错误')}")
@@ -0,0 +1,93 @@
+"""
+条款向量检索索引测试
+
+验证分段二分查找、球面k-means分簇，以及IVF检索全部簇时与精确检索结果相同。
+"""
+
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from semantic import FEATURE_SPACE, extract_features, tfidf_weights
+from vector_index import ExactSearcher, IVFSearcher, lower_bound
+
+
+def make_vectors(count, seed=3):
+    """由随机文本生成归一化的稀疏向量 (行号, 特征, 权重)"""
+    rng = random.Random(seed)
+    topics = ['招标投标', '政府采购', '合同履行', '评标委员会', '行政处罚', '供应商资格']
+    texts = [
+        ''.join(rng.choice(topics) + rng.choice('的和与及') for _ in range(rng.randint(3, 8)))
+        for _ in range(count)
+    ]
+    documents, features, counts = extract_features(texts)
+    idf = np.ones(FEATURE_SPACE, dtype=np.float32)
+    weights = tfidf_weights(documents, features, counts, idf, count)
+    return texts, documents.astype(np.int32), features.astype(np.int32), weights, idf
+
+
+def test_lower_bound_matches_searchsorted():
+    """分段二分查找与逐段np.searchsorted结果相同"""
+    rng = np.random.default_rng(0)
+    segments = [np.sort(rng.integers(0, 50, size=rng.integers(0, 20))) for _ in range(30)]
+    values = np.concatenate(segments)
+    starts = np.cumsum([0] + [len(segment) for segment in segments[:-1]])
+    ends = starts + [len(segment) for segment in segments]
+    targets = rng.integers(-5, 55, size=len(segments))
+
+    expected = [start + np.searchsorted(segment, target) for start, segment, target in zip(starts, segments, targets)]
+    assert lower_bound(values, starts, ends, targets).tolist() == expected
+
+
+def test_ivf_with_all_lists_matches_exact():
+    """IVF的行按簇连续排列；检查全部簇时结果与精确检索相同"""
+    texts, documents, features, weights, idf = make_vectors(400)
+    rng = np.random.default_rng(0)
+
+    exact_dir = Path(tempfile.mkdtemp())
+    ExactSearcher.build(exact_dir, documents, features, weights, len(texts), FEATURE_SPACE, rng)
+    exact = ExactSearcher(exact_dir, {'rows': len(texts)})
+
+    ivf_dir = Path(tempfile.mkdtemp())
+    order, meta = IVFSearcher.build(ivf_dir, documents, features, weights, len(texts), FEATURE_SPACE, rng)
+    ivf = IVFSearcher(ivf_dir, {'rows': len(texts), **meta})
+    assert meta['lists'] == 20
+    assert sorted(order.tolist()) == list(range(len(texts)))
+    assert ivf.offsets[0] == 0 and ivf.offsets[-1] == len(texts)
+
+    query_documents, query_features, query_counts = extract_features(['政府采购的合同履行', '评标委员会与行政处罚'])
+    query_weights = tfidf_weights(query_documents, query_features, query_counts, idf, 2)
+    for query in range(2):
+        selected = query_documents == query
+        vector = (query_features[selected], query_weights[selected])
+        exact_rows, exact_scores = exact.search(*vector, len(texts))
+        ivf_rows, ivf_scores = ivf.search(*vector, len(texts), nprobe=meta['lists'])
+        # IVF的行号映射回原来的行号后，每一行的得分相同
+        expected = dict(zip(exact_rows.tolist(), exact_scores.tolist()))
+        actual = dict(zip(order[ivf_rows].tolist(), ivf_scores.tolist()))
+        assert expected.keys() == actual.keys()
+        assert all(abs(expected[row] - actual[row]) < 1e-6 for row in expected)
+
+        # 只检查一个簇时结果是全部簇结果的近似，得分不超过精确结果
+        few_rows, few_scores = ivf.search(*vector, 10, nprobe=1)
+        assert len(few_scores) == 0 or few_scores[0] <= exact_scores[0] + 1e-6
+
+
+def test_alive_mask_hides_rows():
+    """被标记为无效的行不出现在结果中"""
+    texts, documents, features, weights, idf = make_vectors(100)
+    directory = Path(tempfile.mkdtemp())
+    order, meta = IVFSearcher.build(directory, documents, features, weights, len(texts), FEATURE_SPACE,
+                                    np.random.default_rng(0))
+    ivf = IVFSearcher(directory, {'rows': len(texts), **meta})
+
+    query_documents, query_features, query_counts = extract_features(['招标投标'])
+    query_weights = tfidf_weights(query_documents, query_features, query_counts, idf, 1)
+    rows, _ = ivf.search(query_features, query_weights, 5, nprobe=meta['lists'])
+    alive = np.ones(len(texts), dtype=bool)
+    alive[rows[0]] = False
+    hidden_rows, _ = ivf.search(query_features, query_weights, 5, alive=alive, nprobe=meta['lists'])
+    assert rows[0] not in hidden_rows.tolist()
+
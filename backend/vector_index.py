@@ -0,0 +1,347 @@
+"""
+条款向量检索索引
+
+语义检索的条款向量是稀疏TF-IDF向量，矩阵按特征列存储（倒排表）：
+indptr[f]:indptr[f+1] 是特征f在rows（行号）和weights（权重）中的区间，
+同一列内行号递增。
+
+- ExactSearcher: 取出查询特征的全部倒排表累加得分，结果精确，耗时与
+  查询特征的文档频率之和成正比，条款越多越慢；
+- IVFSearcher: 倒排文件（IVF）近似检索。构建时用球面k-means把条款聚成
+  nlist 个簇，行号按簇连续排列，每一列的倒排表因此也按簇分段；查询时
+  先与各簇中心比较，只在最相近的 nprobe 个簇的区间内累加得分，区间端点
+  在各列倒排表中二分查找。
+
+检索方式通过 SEARCHERS 登记，实现相同的 build / 构造函数 / search 接口即可
+接入其他近似检索算法。每种检索方式都保存完整的按列存储矩阵（indptr、
+rows、weights属性），批量任务可以直接在上面计算全部条款的得分。
+"""
+
+import math
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# IVF簇数，0表示按条款数自动确定（约为条款数的平方根）
+IVF_LISTS = int(os.getenv('SEMANTIC_IVF_LISTS', '0'))
+
+# 查询时检查的簇数
+IVF_PROBES = int(os.getenv('SEMANTIC_IVF_PROBES', '16'))
+
+# 簇中心只保留权重最大的若干个特征
+CENTROID_FEATURES = int(os.getenv('SEMANTIC_IVF_CENTROID_FEATURES', '256'))
+
+# 聚类时每一行只用权重最大的若干个特征（分配簇的耗时与之成正比）
+CLUSTER_ROW_FEATURES = int(os.getenv('SEMANTIC_IVF_ROW_FEATURES', '32'))
+
+# k-means迭代次数和参与迭代的抽样条款数（每簇）
+KMEANS_ITERATIONS = 6
+KMEANS_SAMPLE_PER_LIST = 64
+
+# 分配簇时每批处理的条款数
+ASSIGN_BATCH_SIZE = 2048
+
+
+def to_columns(documents: np.ndarray, features: np.ndarray, weights: np.ndarray,
+               row_count: int, feature_space: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    把 (行号, 特征, 权重) 三元组转换为按特征列存储的矩阵
+
+    Returns:
+        (indptr, rows, weights)，列内按行号递增
+    """
+    order = np.lexsort((documents, features))
+    indptr = np.zeros(feature_space + 1, dtype=np.int64)
+    np.cumsum(np.bincount(features, minlength=feature_space), out=indptr[1:])
+    return indptr, documents[order].astype(np.int32), weights[order].astype(np.float32)
+
+
+def expand_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """把若干区间 [start, start + length) 展开成连续的下标数组"""
+    total = int(lengths.sum())
+    return np.arange(total, dtype=np.int64) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+
+def gather_postings(indptr: np.ndarray, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    取出若干特征的倒排表
+
+    Returns:
+        (倒排表元素的下标, 每个特征的倒排表长度)
+    """
+    starts = indptr[features]
+    lengths = indptr[features + 1] - starts
+    return expand_ranges(starts, lengths), lengths
+
+
+def accumulate_scores(indptr: np.ndarray, rows: np.ndarray, weights: np.ndarray, row_count: int,
+                      owners: np.ndarray, features: np.ndarray, values: np.ndarray,
+                      count: int) -> np.ndarray:
+    """
+    稀疏矩阵乘稀疏向量：取出查询特征的倒排表，一次bincount累加出 (查询数, 行数) 得分
+
+    Args:
+        indptr, rows, weights: 按特征列存储的矩阵
+        row_count: 矩阵行数
+        owners: 每个查询特征所属的查询下标（0 ~ count-1）
+        features: 查询特征编号
+        values: 查询特征权重
+        count: 查询数
+    """
+    positions, lengths = gather_postings(indptr, features)
+    contributions = weights[positions] * np.repeat(values, lengths)
+    return np.bincount(
+        np.repeat(owners, lengths) * row_count + rows[positions],
+        weights=contributions, minlength=count * row_count
+    ).reshape(count, row_count)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    取得分最高的k个位置（得分为0的不返回）
+
+    Returns:
+        (位置, 得分)，按得分从高到低、相同时按位置排序
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[scores[candidates] > 0]
+    candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return candidates, scores[candidates]
+
+
+def lower_bound(values: np.ndarray, low: np.ndarray, high: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    分段二分查找：对每个 i，在有序区间 values[low[i]:high[i]] 中找第一个不小于
+    targets[i] 的位置，所有区间同时进行
+    """
+    low = low.copy()
+    high = high.copy()
+    active = low < high
+    while active.any():
+        middle = (low + high) // 2
+        probe = values[np.where(active, middle, 0)]
+        right = active & (probe < targets)
+        low = np.where(right, middle + 1, low)
+        high = np.where(active & ~right, middle, high)
+        active = low < high
+    return low
+
+
+def _save_matrix(directory: Path, prefix: str, indptr, rows, weights):
+    """保存按特征列存储的矩阵"""
+    np.save(directory / f'{prefix}indptr.npy', indptr)
+    np.save(directory / f'{prefix}rows.npy', rows)
+    np.save(directory / f'{prefix}weights.npy', weights)
+
+
+def _load_matrix(directory: Path, prefix: str):
+    """以内存映射方式打开按特征列存储的矩阵"""
+    return tuple(
+        np.load(directory / f'{prefix}{name}.npy', mmap_mode='r')
+        for name in ('indptr', 'rows', 'weights')
+    )
+
+
+class ExactSearcher:
+    """精确检索：累加查询特征的全部倒排表"""
+
+    name = 'exact'
+
+    @staticmethod
+    def build(directory: Path, documents: np.ndarray, features: np.ndarray, weights: np.ndarray,
+              row_count: int, feature_space: int, rng: np.random.Generator) -> Tuple[np.ndarray, Dict]:
+        """
+        构建并保存索引
+
+        Args:
+            directory: 索引目录
+            documents, features, weights: 按行号排序的 (行号, 特征, 权重) 三元组
+            row_count: 行数
+            feature_space: 特征空间维数
+            rng: 随机数生成器
+
+        Returns:
+            (行的新顺序, 写入meta.json的参数)，第i个新行是原来的第order[i]行
+        """
+        _save_matrix(directory, '', *to_columns(documents, features, weights, row_count, feature_space))
+        return np.arange(row_count), {}
+
+    def __init__(self, directory: Path, meta: Dict):
+        self.row_count = meta['rows']
+        self.indptr, self.rows, self.weights = _load_matrix(directory, '')
+
+    def search(self, features: np.ndarray, values: np.ndarray, k: int,
+               alive: Optional[np.ndarray] = None, **options) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        检索一个查询
+
+        Args:
+            features, values: 查询向量
+            k: 返回的行数
+            alive: 行是否有效的布尔数组，无效行不返回
+
+        Returns:
+            (行号, 得分)
+        """
+        scores = accumulate_scores(
+            self.indptr, self.rows, self.weights, self.row_count,
+            np.zeros(len(features), dtype=np.int64), features, values, 1
+        )[0]
+        if alive is not None:
+            scores[~alive] = 0
+        return top_k(scores, k)
+
+
+def spherical_kmeans(documents: np.ndarray, features: np.ndarray, weights: np.ndarray, row_count: int,
+                     list_count: int, feature_space: int, rng: np.random.Generator) -> Tuple[np.ndarray, Tuple]:
+    """
+    球面k-means聚类（余弦相似度）
+
+    每一行只取权重最大的CLUSTER_ROW_FEATURES个特征参与聚类，在抽样的行上
+    迭代，簇中心只保留权重最大的CENTROID_FEATURES个特征，最后把所有行分配
+    到最相近的簇中心。
+
+    Returns:
+        (每一行所属的簇, 按特征列存储的簇中心矩阵)
+    """
+    row_starts = np.searchsorted(documents, np.arange(row_count + 1))
+    order = np.lexsort((-weights, documents))
+    keep = np.arange(len(order)) - row_starts[documents[order]] < CLUSTER_ROW_FEATURES
+    order = order[keep]
+    documents, features, weights = documents[order], features[order], weights[order]
+    row_starts = np.searchsorted(documents, np.arange(row_count + 1))
+
+    def gather(selected):
+        """取出若干行的非零元素，行号换成在selected中的下标"""
+        lengths = row_starts[selected + 1] - row_starts[selected]
+        positions = expand_ranges(row_starts[selected], lengths)
+        return np.repeat(np.arange(len(selected)), lengths), features[positions], weights[positions]
+
+    def make_centroids(owners, owner_features, owner_weights, count):
+        """按簇累加向量，截断后归一化，得到按特征列存储的簇中心矩阵"""
+        keys, inverse = np.unique(owners * feature_space + owner_features, return_inverse=True)
+        sums = np.bincount(inverse, weights=owner_weights)
+        clusters = keys // feature_space
+        order = np.lexsort((-sums, clusters))
+        clusters, centroid_features, sums = clusters[order], keys[order] % feature_space, sums[order]
+        rank = np.arange(len(clusters)) - np.searchsorted(clusters, clusters)
+        keep = rank < CENTROID_FEATURES
+        clusters, centroid_features, sums = clusters[keep], centroid_features[keep], sums[keep]
+        norms = np.sqrt(np.bincount(clusters, weights=sums * sums, minlength=count))
+        norms[norms == 0] = 1.0
+        return to_columns(clusters, centroid_features, sums / norms[clusters], count, feature_space)
+
+    def assign(selected, centroids):
+        """把若干行分配到最相近的簇中心"""
+        labels = np.empty(len(selected), dtype=np.int64)
+        for start in range(0, len(selected), ASSIGN_BATCH_SIZE):
+            batch = selected[start:start + ASSIGN_BATCH_SIZE]
+            owners, batch_features, batch_weights = gather(batch)
+            scores = accumulate_scores(*centroids, list_count, owners, batch_features, batch_weights, len(batch))
+            labels[start:start + len(batch)] = scores.argmax(axis=1)
+        return labels
+
+    sample_size = min(row_count, list_count * KMEANS_SAMPLE_PER_LIST)
+    sample = np.sort(rng.choice(row_count, size=sample_size, replace=False))
+    sample_owners, sample_features, sample_weights = gather(sample)
+
+    # 随机选取list_count个抽样行作为初始簇中心
+    seeds = rng.choice(sample_size, size=list_count, replace=False)
+    labels = np.full(sample_size, -1, dtype=np.int64)
+    labels[seeds] = np.arange(list_count)
+    seeded = labels[sample_owners] >= 0
+    centroids = make_centroids(labels[sample_owners][seeded], sample_features[seeded],
+                               sample_weights[seeded], list_count)
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = assign(sample, centroids)
+        # 空簇保留一个随机抽样行，避免簇中心消失
+        empty = np.setdiff1d(np.arange(list_count), labels)
+        if len(empty):
+            labels[rng.choice(sample_size, size=len(empty), replace=False)] = empty
+        centroids = make_centroids(labels[sample_owners], sample_features, sample_weights, list_count)
+
+    return assign(np.arange(row_count), centroids), centroids
+
+
+class IVFSearcher:
+    """倒排文件（IVF）近似检索：只在与查询最相近的nprobe个簇内累加得分"""
+
+    name = 'ivf'
+
+    @staticmethod
+    def build(directory: Path, documents: np.ndarray, features: np.ndarray, weights: np.ndarray,
+              row_count: int, feature_space: int, rng: np.random.Generator) -> Tuple[np.ndarray, Dict]:
+        """构建并保存索引（参数和返回值同ExactSearcher.build），行按簇重新排列"""
+        list_count = IVF_LISTS or max(1, int(round(math.sqrt(row_count))))
+        list_count = max(1, min(list_count, row_count))
+        labels, centroids = spherical_kmeans(documents, features, weights, row_count,
+                                             list_count, feature_space, rng)
+
+        order = np.argsort(labels, kind='stable')
+        new_rows = np.empty(row_count, dtype=np.int64)
+        new_rows[order] = np.arange(row_count)
+        offsets = np.zeros(list_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=list_count), out=offsets[1:])
+
+        _save_matrix(directory, '', *to_columns(new_rows[documents], features, weights,
+                                                row_count, feature_space))
+        _save_matrix(directory, 'centroid_', *centroids)
+        np.save(directory / 'list_offsets.npy', offsets)
+        return order, {'lists': list_count}
+
+    def __init__(self, directory: Path, meta: Dict):
+        self.row_count = meta['rows']
+        self.list_count = meta['lists']
+        self.indptr, self.rows, self.weights = _load_matrix(directory, '')
+        self.centroids = _load_matrix(directory, 'centroid_')
+        self.offsets = np.load(directory / 'list_offsets.npy')
+
+    def search(self, features: np.ndarray, values: np.ndarray, k: int,
+               alive: Optional[np.ndarray] = None, nprobe: Optional[int] = None,
+               **options) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        检索一个查询（参数和返回值同ExactSearcher.search）
+
+        Args:
+            nprobe: 检查的簇数，默认IVF_PROBES；等于簇数时结果与精确检索相同
+        """
+        nprobe = min(nprobe or IVF_PROBES, self.list_count)
+        owners = np.zeros(len(features), dtype=np.int64)
+        centroid_scores = accumulate_scores(*self.centroids, self.list_count,
+                                            owners, features, values, 1)[0]
+        probes = np.sort(np.argpartition(-centroid_scores, nprobe - 1)[:nprobe])
+        list_starts = self.offsets[probes]
+        list_sizes = self.offsets[probes + 1] - list_starts
+
+        # 每个 (查询特征, 簇) 在倒排表中的区间
+        column_starts = np.repeat(self.indptr[features], nprobe)
+        column_ends = np.repeat(self.indptr[features + 1], nprobe)
+        begins = lower_bound(self.rows, column_starts, column_ends, np.tile(list_starts, len(features)))
+        ends = lower_bound(self.rows, begins, column_ends, np.tile(list_starts + list_sizes, len(features)))
+        lengths = ends - begins
+
+        # 只在选中簇的行上累加得分，行号压缩为候选下标
+        positions = expand_ranges(begins, lengths)
+        pair_lists = np.tile(np.arange(nprobe), len(features))
+        candidate_starts = np.cumsum(list_sizes) - list_sizes
+        shift = (candidate_starts - list_starts)[pair_lists]
+        candidates = self.rows[positions] + np.repeat(shift, lengths)
+        scores = np.bincount(
+            candidates,
+            weights=self.weights[positions] * np.repeat(np.repeat(values, nprobe), lengths),
+            minlength=int(list_sizes.sum())
+        )
+        candidate_rows = expand_ranges(list_starts, list_sizes)
+        if alive is not None:
+            scores[~alive[candidate_rows]] = 0
+        positions, scores = top_k(scores, k)
+        return candidate_rows[positions], scores
+
+
+SEARCHERS = {searcher.name: searcher for searcher in (ExactSearcher, IVFSearcher)}
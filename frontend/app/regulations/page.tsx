@@ -6,7 +6,7 @@
 
 import { useState, useEffect, useRef } from 'react'
 import { BookOpen, FileText, Upload, X, CheckCircle, AlertCircle } from 'lucide-react'
-import { getRegulations, type Regulation } from '@/lib/api'
+import { getRegulations, waitForJob, type Regulation } from '@/lib/api'
 
 export default function RegulationsPage() {
     const [regulations, setRegulations] = useState<Regulation[]>([])
@@ -89,11 +89,18 @@ export default function RegulationsPage() {
                 throw new Error(error.detail || '上传失败')
             }
             
-            const result = await response.json()
+            // 上传接口立即返回任务ID，解析和导入在后台进行
+            const job = await waitForJob((await response.json()).job_id)
+            const result = job.files[0]
+            if (!result || (result.status !== 'succeeded' && result.status !== 'duplicate')) {
+                throw new Error(result?.error || '上传失败')
+            }
             
             setUploadStatus({
                 success: true,
-                message: `上传成功！已解析 ${result.clause_count} 条法规条款`
+                message: result.status === 'duplicate'
+                    ? `该文档已存在于系统中（${result.regulation_title}），未重复导入`
+                    : `上传成功！已解析 ${result.clause_count} 条法规条款`
             })
             
             // 刷新法规列表
@@ -81,10 +81,57 @@ export interface SearchResult {
         regulation_title: string
         clause_number: string
         content: string
+        score: number
+        highlights: Array<[number, number]>
     }>
     total: number
 }
 
+export interface UploadJobFile {
+    file_id: number
+    filename: string
+    status: 'queued' | 'parsing' | 'importing' | 'succeeded' | 'failed' | 'duplicate'
+    attempts: number
+    started_at: number | null
+    finished_at: number | null
+    parse_seconds: number | null
+    parse_cached: boolean | null
+    import_seconds: number | null
+    page_stats: {
+        page_count: number
+        total_seconds: number
+        slowest_pages: Array<{ page: number; seconds: number; chars: number }>
+    } | null
+    regulation_id: number | null
+    regulation_title: string | null
+    clause_count: number | null
+    error: string | null
+}
+
+export interface UploadJob {
+    job_id: string
+    status: 'queued' | 'running' | 'succeeded' | 'failed' | 'partial'
+    created_at: number
+    started_at: number | null
+    finished_at: number | null
+    progress: {
+        total_files: number
+        finished_files: number
+        succeeded_files: number
+        failed_files: number
+        duplicate_files: number
+        percent: number
+    }
+    throughput: {
+        elapsed_seconds: number | null
+        clauses_imported: number
+        files_per_second: number | null
+        clauses_per_second: number | null
+    }
+    files: UploadJobFile[]
+    errors: Array<{ file_id: number; filename: string; error: string }>
+}
+
 // ============ API函数 ============
 
 /**
@@ -136,6 +183,26 @@ export async function getRegulations(): Promise<Regulation[]> {
     return request<Regulation[]>('/api/regulations')
 }
 
+/**
+ * 查询后台任务状态
+ */
+export async function getJob(jobId: string): Promise<UploadJob> {
+    return request<UploadJob>(`/api/jobs/${jobId}`)
+}
+
+/**
+ * 轮询后台任务直到所有文件处理结束
+ */
+export async function waitForJob(jobId: string, intervalMs: number = 1000): Promise<UploadJob> {
+    while (true) {
+        const job = await getJob(jobId)
+        if (job.status !== 'queued' && job.status !== 'running') {
+            return job
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs))
+    }
+}
+
 /**
  * 健康检查
  */